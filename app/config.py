@@ -18,9 +18,73 @@ class Settings(BaseSettings):
     # --- ✅ New, Faster Machine Learning Model ---
     MODEL_NAME: str = "all-MiniLM-L6-v2"
 
+    # --- Encoder Backend ---
+    # torch, onnx or onnx-int8 (dynamic quantization). The ONNX backends need
+    # `sentence-transformers[onnx]`, are exported from the cached model into
+    # ENCODER_EXPORT_DIR, and are only used once
+    # `python -m app.services.encoder_backends <backend>` has recorded a passing
+    # parity check (mean cosine and recall@k against the torch model).
+    ENCODER_BACKEND: str = "torch"
+    ENCODER_EXPORT_DIR: str = "/data/encoders"
+    ENCODER_QUANTIZATION: str = "avx2"
+    ENCODER_REQUIRE_PARITY: bool = True
+    ENCODER_PARITY_SAMPLE: int = 1000
+    ENCODER_PARITY_K: int = 10
+    ENCODER_PARITY_MIN_COSINE: float = 0.99
+    ENCODER_PARITY_MIN_RECALL: float = 0.9
+
+    # --- Query Encoding ---
+    QUERY_BATCH_MAX_SIZE: int = 32
+    QUERY_BATCH_MAX_WAIT_MS: float = 5.0
+    QUERY_CACHE_SIZE: int = 50000
+    SEARCH_BATCH_MAX_QUERIES: int = 64
+
     # --- File Paths (for persistent disk) ---
     ITEMS_PATH: str = "/data/items.json"
+    ITEM_COLUMNS_PATH: str = "/data/items.bin"
     FAISS_INDEX_PATH: str = "/data/faiss.index"
+    EMBEDDING_STORE_PATH: str = "/data/embeddings.npy"
+    QUERY_CACHE_PATH: str = "/data/query_embeddings.npz"
+    DELTA_LOG_PATH: str = "/data/deltas.log"
+    STREAM_STATE_PATH: str = "/data/stream_state.json"
+
+    # --- Change Stream Ingestion ---
+    INGEST_BATCH_WINDOW_MS: float = 200.0
+    INGEST_BATCH_MAX_SIZE: int = 500
+    # A batch that fails to apply is retried after INGEST_RETRY_BASE_MS, doubling
+    # per consecutive failure up to INGEST_RETRY_MAX_SECONDS.
+    INGEST_RETRY_BASE_MS: float = 500.0
+    INGEST_RETRY_MAX_SECONDS: float = 30.0
+
+    # --- Response Cache ---
+    # Finished /search bodies keyed on the normalized query and the engine generation,
+    # which the writer bumps on every applied change or rebuild, so entries are never
+    # stale. With RESPONSE_CACHE_SHARED, workers on a node also share entries through
+    # an SQLite file. Concurrent identical misses in a worker are computed once.
+    # Shared reads wait at most RESPONSE_CACHE_READ_TIMEOUT_MS on a locked store
+    # before counting as a miss.
+    RESPONSE_CACHE_SIZE: int = 5000
+    RESPONSE_CACHE_TTL_SECONDS: float = 3600.0
+    RESPONSE_CACHE_SHARED: bool = False
+    RESPONSE_CACHE_PATH: str = "/data/response_cache.db"
+    RESPONSE_CACHE_READ_TIMEOUT_MS: float = 20.0
+
+    # --- Full Rebuilds ---
+    REBUILD_ENCODE_CHUNK: int = 1024
+    REBUILD_JOB_HISTORY: int = 20
+
+    # --- Snapshotting ---
+    SNAPSHOT_INTERVAL_SECONDS: float = 60.0
+    SNAPSHOT_MAX_DELTAS: int = 1000
+
+    # --- Multi-Worker Mode ---
+    # One elected writer owns ingestion and publishes versioned snapshots; the other
+    # workers mmap them read-only and tail the delta log.
+    MULTI_WORKER: bool = False
+    SNAPSHOT_DIR: str = "/data/snapshots"
+    SNAPSHOT_KEEP: int = 3
+    SNAPSHOT_POLL_SECONDS: float = 2.0
+    WRITER_LOCK_PATH: str = "/data/writer.lock"
 
     # --- Search Algorithm Tuning ---
     CATEGORY_BOOST: float = 0.1
@@ -28,6 +92,55 @@ class Settings(BaseSettings):
     CATEGORY_NAME_WEIGHT: float = 0.4
     SERVICE_DESCRIPTION_WEIGHT: float = 0.1
 
+    # --- Vector Index ---
+    # INDEX_TYPE is one of auto, flat, ivfflat, ivfpq, sq8, hnsw. "auto" keeps a flat
+    # index below INDEX_FLAT_MAX_ITEMS and otherwise tunes INDEX_TUNE_FAMILIES for the
+    # lowest latency that meets INDEX_RECALL_TARGET (recall@INDEX_TUNE_K vs exact search).
+    INDEX_TYPE: str = "auto"
+    INDEX_FLAT_MAX_ITEMS: int = 1000
+    INDEX_RECALL_TARGET: float = 0.95
+    INDEX_TUNE_K: int = 50
+    INDEX_TUNE_SAMPLE: int = 200
+    INDEX_TUNE_MAX_VECTORS: int = 50000
+    INDEX_TUNE_FAMILIES: List[str] = ["flat", "ivfflat", "ivfpq", "sq8", "hnsw"]
+    # Quantized indexes (ivfpq, sq8) keep a float16 copy of the vectors and re-score
+    # their top INDEX_RERANK_DEPTH candidates exactly.
+    INDEX_RERANK: bool = True
+    INDEX_RERANK_DEPTH: int = 200
+    # Above 1, services are partitioned by label across INDEX_SHARDS independently
+    # tuned and persisted indexes, searched in parallel and merged. A persisted index
+    # is loaded with the shard count it was saved with.
+    INDEX_SHARDS: int = 1
+
+    # --- Lexical Search ---
+    # BM25 over name/category/description, fused with dense results by reciprocal
+    # rank. With the fast path on, a query that exactly names an item (e.g. a
+    # category) is answered lexically without encoding it.
+    LEXICAL_FUSION: bool = True
+    LEXICAL_FAST_PATH: bool = True
+    LEXICAL_CANDIDATES: int = 200
+    RRF_K: int = 60
+    BM25_K1: float = 1.2
+    BM25_B: float = 0.75
+    # Query terms found in more than this fraction of items (stopword-like) only
+    # rescore items a rarer query term matched, when the query has one.
+    LEXICAL_MAX_DF: float = 0.2
+
+    # --- Filtering & Pagination ---
+    # Filters become a FAISS ID selector; IVF nprobe / HNSW efSearch grow as the
+    # allowed set shrinks, and below FILTER_SCAN_SELECTIVITY an HNSW index scans its
+    # stored vectors instead of walking the graph.
+    FILTER_SCAN_SELECTIVITY: float = 0.02
+    SEARCH_MAX_OFFSET: int = 1000
+
+    # --- Item Store ---
+    ITEM_STORE_COMPACT_RATIO: float = 0.25
+    ITEM_STORE_MAX_UNSORTED: int = 1024
+
+    # --- Autocomplete ---
+    AUTOCOMPLETE_SCAN_LIMIT: int = 2000
+    AUTOCOMPLETE_CACHE_DEPTH: int = 50
+
     # --- Predefined Data ---
     PREDEFINED_CATEGORIES: List[str] = [
         "Catering", "Decorations", "Photography", "Videography",
@@ -1,22 +1,41 @@
 # FILE: app/main.py
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Response
+from collections import OrderedDict
 from contextlib import asynccontextmanager
 import asyncio
 import logging
-from cachetools import TTLCache
-from typing import Optional
+import numpy as np
+from datetime import datetime, timezone
+from pymongo.errors import OperationFailure
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
 from app.config import settings
 from app.models.pydantic_models import (
-    SearchResponse, StatusResponse, HealthResponse, RefreshResponse, AutocompleteResponse
+    SearchResponse, BatchSearchRequest, BatchSearchResponse, StatusResponse, HealthResponse, RefreshResponse, AutocompleteResponse
 )
-from app.services.data_loader import fetch_and_extract_items, fetch_one_service
-from app.services.encoder import create_blended_embeddings, get_model
+from app.services.data_loader import (
+    fetch_and_extract_items, fetch_many_services, fetch_service_ids_updated_since, fetch_all_service_ids
+)
+from app.services.encoder import (
+    create_blended_embeddings, get_model, model_loaded, normalize_query, query_encoder, query_embedding_cache
+)
+from app.services.encoder_backends import encoder_id
 from app.models.faiss_manager import FaissManager
+from app.models.sharded_index import create_faiss_manager
+from app.models.filter_index import SearchFilters
+from app.models.embedding_store import EmbeddingStore
 from app.services.hybrid_search import HybridSearchEngine
-from app.utils.persistence import load_items, save_items
+from app.services.rebuild import RebuildJob, build_engine
+from app.services.ingestion import ChangeIngestor
+from app.utils.persistence import load_items, load_stream_state, save_stream_state
+from app.utils.item_columns import load_item_columns, save_item_rows
+from app.utils.delta_log import DeltaLog, Snapshotter
+from app.utils.snapshots import SnapshotDirectory, WriterLease
 from app.utils.database import connect_to_mongo, close_mongo_connection, get_database
 from app.utils.locks import data_lock
+from app.utils.payloads import with_query
+from app.utils.response_cache import ResponseCache, SingleFlight
+from app.utils import metrics
 from fastapi.middleware.cors import CORSMiddleware
 
 logging.basicConfig(level=logging.INFO,
@@ -24,29 +43,200 @@ logging.basicConfig(level=logging.INFO,
 logger = logging.getLogger(__name__)
 
 # --- Global State ---
-faiss_manager: FaissManager | None = None
+# The live engine owns its index, item store and autocomplete; rebuilds replace it
+# with a single assignment, and requests hold their own reference while in flight.
 hybrid_engine: HybridSearchEngine | None = None
-search_cache = TTLCache(maxsize=500, ttl=300)
+rebuild_jobs: "OrderedDict[str, RebuildJob]" = OrderedDict()
+_current_rebuild: RebuildJob | None = None
+_rebuild_dirty_ids: Set[str] | None = None
+response_cache = ResponseCache(path=settings.RESPONSE_CACHE_PATH if settings.RESPONSE_CACHE_SHARED else None)
+search_flight = SingleFlight()
+delta_log = DeltaLog()
+stream_state: Dict[str, Any] = {}
+writer_lease = WriterLease()
+snapshot_dir = SnapshotDirectory()
+_loaded_snapshot_version: int | None = None
 
 # --- Real-Time Update Logic ---
 
 
-async def _update_single_item(service_id: str):
-    logger.info(f"Real-time update triggered for service ID: {service_id}")
+def _as_datetime(value: Any) -> datetime | None:
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    # Mongo hands back naive UTC datetimes; keep everything comparable with them.
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+
+async def _advance_stream_state(items: List[Dict[str, Any]], resume_token: Any = None):
+    marks = [mark for mark in (_as_datetime(item.get("updatedAt")) for item in items) if mark]
+    high_water_mark = _as_datetime(stream_state.get("high_water_mark"))
+    if marks and (high_water_mark is None or max(marks) > high_water_mark):
+        stream_state["high_water_mark"] = max(marks)
+    if resume_token is not None:
+        stream_state["resume_token"] = resume_token
+    # A copy, so the file write in the worker thread never sees the dict change.
+    await asyncio.to_thread(save_stream_state, dict(stream_state))
+
+
+async def _apply_change_batch(changes: Dict[str, str], resume_token: Any = None):
+    if hybrid_engine is None:
+        logger.info("Engine not built yet; skipping change batch (the rebuild will pick it up).")
+        return
+    ids = list(changes)
+    logger.info(f"Applying real-time change batch of {len(ids)} services.")
     async with data_lock:
-        item = await fetch_one_service(service_id)
-        if item:
-            embedding = create_blended_embeddings([item])
-            faiss_manager.update_items([item], embedding)
-            hybrid_engine.update_item_in_map(item)
-            logger.info(
-                f"Successfully updated item {service_id} in real-time.")
-        else:
-            faiss_manager.remove_items([service_id])
-            hybrid_engine.remove_item_from_map(service_id)
-            logger.info(f"Removed item {service_id} in real-time.")
-        save_items(hybrid_engine.items)
-        faiss_manager.save()
+        engine = hybrid_engine
+        if _rebuild_dirty_ids is not None:
+            _rebuild_dirty_ids.update(ids)
+        to_fetch = [doc_id for doc_id, op in changes.items() if op != "delete"]
+        fetched = await fetch_many_services(to_fetch)
+        upserts = [fetched[doc_id] for doc_id in to_fetch
+                   if doc_id in fetched and fetched[doc_id].get("name")]
+        upserted_ids = {item['_id'] for item in upserts}
+        deletes = [doc_id for doc_id in ids if doc_id not in upserted_ids]
+
+        embeddings = None
+        if upserts:
+            embeddings = await asyncio.to_thread(create_blended_embeddings, upserts)
+        engine.fm.remove_items(ids)
+        engine.fm.add_items(upserts, embeddings)
+
+        for doc_id in deletes:
+            engine.remove_item_from_map(doc_id)
+            delta_log.append_delete(doc_id)
+        for item, embedding in zip(upserts, embeddings if upserts else []):
+            engine.update_item_in_map(item)
+            delta_log.append_upsert(item, embedding)
+        # bump() invalidates before its first await, so no response computed on the old state is stored as current.
+        delta_log.append_generation(await response_cache.bump())
+        snapshotter.notify()
+        await _advance_stream_state(upserts, resume_token)
+        logger.info(
+            f"Applied change batch: {len(upserts)} upserts, {len(deletes)} deletes.")
+
+
+def _apply_delta_records(engine: HybridSearchEngine, records: Iterable[Tuple]) -> int:
+    latest = {}
+    for op, item_id, item, vector in records:
+        if op in ("upsert", "delete"):
+            latest[item_id] = (item, vector)
+    if not latest:
+        return 0
+
+    deleted = [item_id for item_id, (item, _) in latest.items() if item is None]
+    upserted = [(item, vector) for item, vector in latest.values()
+                if item is not None and vector.shape[0] == engine.fm.dim]
+    engine.fm.remove_items(deleted)
+    for item_id in deleted:
+        engine.remove_item_from_map(item_id)
+    if upserted:
+        engine.fm.update_items([item for item, _ in upserted],
+                               np.stack([vector for _, vector in upserted]))
+        for item, _ in upserted:
+            engine.update_item_in_map(item)
+    return len(latest)
+
+
+def _generation_after(records: List[Tuple], generation: int | None) -> int | None:
+    """The writer's generation for the state reached by applying `records`; None if changes follow the last marker."""
+    for op, value, _, _ in records:
+        generation = value if op == "generation" else None
+    return generation
+
+
+def _replay_delta_log(engine: HybridSearchEngine):
+    applied = _apply_delta_records(engine, delta_log.replay())
+    if applied:
+        logger.info(f"Replayed delta log: {applied} changed items.")
+
+
+def _persist_snapshot(engine: HybridSearchEngine) -> bool:
+    """
+    Writes a full snapshot straight from the engine's store, without building item
+    dicts; in multi-worker mode it is published as a new version for readers. Blocking,
+    and the caller holds `data_lock` so the store doesn't change underneath.
+    """
+    if settings.MULTI_WORKER:
+        return snapshot_dir.publish(lambda items_path, index_path: save_item_rows(
+            engine.store.rows(), items_path) and engine.fm.save(index_path), response_cache.generation) is not None
+    return save_item_rows(engine.store.rows()) and engine.fm.save()
+
+
+def _load_persisted_engine(read_only: bool = False) -> HybridSearchEngine | None:
+    global _loaded_snapshot_version
+    version = snapshot_dir.current_version() if settings.MULTI_WORKER else None
+    if version is not None:
+        items_path, index_path = snapshot_dir.paths(version)
+        items = load_item_columns(items_path)
+    elif read_only:
+        return None
+    else:
+        # The columnar snapshot is the primary format; items.json is still accepted as an import.
+        index_path = settings.FAISS_INDEX_PATH
+        items = load_item_columns() or load_items()
+    if not items:
+        return None
+
+    metadata = FaissManager.read_metadata(index_path)
+    if metadata.get("model_name") not in (None, encoder_id()):
+        logger.warning(
+            f"Persisted index was built with '{metadata['model_name']}', not '{encoder_id()}'; ignoring it.")
+        return None
+    # Only snapshots written before the metadata existed need the model for their dimension.
+    model_dim = metadata.get("dim") or get_model().get_sentence_embedding_dimension()
+    faiss_manager = create_faiss_manager(
+        model_dim, model_name=encoder_id(), shards=(metadata.get("config") or {}).get("shards", 1))
+    if not faiss_manager.load(index_path, mmap=read_only):
+        return None
+    _loaded_snapshot_version = version
+    return HybridSearchEngine(faiss_manager, items)
+
+
+async def _snapshot_engine():
+    if hybrid_engine is None:
+        return
+    async with data_lock:
+        engine = hybrid_engine
+        if await asyncio.to_thread(_persist_snapshot, engine):
+            delta_log.truncate()
+            logger.info(f"Snapshot written with {len(engine.store)} items.")
+
+
+snapshotter = Snapshotter(delta_log, _snapshot_engine)
+change_ingestor = ChangeIngestor(_apply_change_batch)
+
+
+async def _catch_up_changes():
+    """Queues everything changed since the snapshot's high-water mark when the stream can't resume."""
+    if hybrid_engine is None:
+        return
+    services = [item for item in hybrid_engine.store if not item.get("isCategory")]
+    since = _as_datetime(stream_state.get("high_water_mark"))
+    if since is None:
+        since = max(filter(None, (_as_datetime(item.get("updatedAt")) for item in services)), default=None)
+
+    changed_ids = set(await fetch_service_ids_updated_since(since)) if since else set()
+    live_ids = await fetch_all_service_ids()
+    known_ids = {item['_id'] for item in services}
+    upserted_ids = changed_ids | (live_ids - known_ids)
+    deleted_ids = known_ids - live_ids
+    for doc_id in upserted_ids:
+        change_ingestor.submit(doc_id, "update")
+    for doc_id in deleted_ids:
+        change_ingestor.submit(doc_id, "delete")
+    logger.info(
+        f"Catch-up queued {len(upserted_ids)} changed and {len(deleted_ids)} deleted services since {since}.")
+
+
+def _submit_change(change: Dict[str, Any]):
+    doc_id = str(change['documentKey']['_id'])
+    if change['operationType'] in ['insert', 'update', 'replace', 'delete']:
+        change_ingestor.submit(doc_id, change['operationType'], change['_id'])
 
 
 async def watch_mongodb_changes():
@@ -55,13 +245,32 @@ async def watch_mongodb_changes():
         logger.error("Cannot start MongoDB watcher: No database connection.")
         return
 
+    collection = db[settings.COLLECTION_NAME]
+    resume_token = stream_state.get("resume_token")
+    resumed = resume_token is not None
     try:
-        change_stream = db[settings.COLLECTION_NAME].watch()
-        logger.info("MongoDB Change Stream watcher started...")
+        change_stream = collection.watch(resume_after=resume_token)
+        try:
+            # try_next opens the cursor, which is where an expired token is rejected.
+            first_change = await change_stream.try_next()
+        except OperationFailure as e:
+            logger.warning(
+                f"Could not resume change stream from saved token ({e}); catching up on updatedAt instead.")
+            resumed = False
+            await change_stream.close()
+            change_stream = collection.watch()
+            first_change = await change_stream.try_next()
+            await _catch_up_changes()
+        else:
+            if not resumed:
+                await _catch_up_changes()
+
+        logger.info(
+            f"MongoDB Change Stream watcher started ({'resumed' if resumed else 'fresh'})...")
+        if first_change is not None:
+            _submit_change(first_change)
         async for change in change_stream:
-            doc_id = str(change['documentKey']['_id'])
-            if change['operationType'] in ['insert', 'update', 'replace', 'delete']:
-                asyncio.create_task(_update_single_item(doc_id))
+            _submit_change(change)
     except Exception as e:
         logger.error(
             f"MongoDB Change Stream watcher failed: {e}. Real-time updates are disabled.")
@@ -69,25 +278,129 @@ async def watch_mongodb_changes():
 # --- Core Engine Management ---
 
 
-async def _rebuild_search_engine_full():
-    logger.info("Starting full engine rebuild...")
-    global faiss_manager, hybrid_engine
+async def _run_rebuild(job: RebuildJob):
+    global hybrid_engine, _current_rebuild, _rebuild_dirty_ids
+    logger.info(f"Starting full engine rebuild (job {job.job_id})...")
+    _rebuild_dirty_ids = set()
+    try:
+        job.advance("fetching", 0.01)
+        items = await fetch_and_extract_items()
+        job.advance("loading_model", 0.05)
+        model_dim = await asyncio.to_thread(lambda: get_model().get_sentence_embedding_dimension())
+        embedding_store = EmbeddingStore(model_name=encoder_id())
+        engine, stats = await asyncio.to_thread(build_engine, items, model_dim, embedding_store, job)
+
+        job.advance("swapping", 0.9)
+        async with data_lock:
+            hybrid_engine = engine
+            dirty_ids, _rebuild_dirty_ids = _rebuild_dirty_ids, None
+            await response_cache.bump()
+            if items:
+                job.advance("persisting", 0.95)
+                await asyncio.to_thread(_persist_snapshot, engine)
+                delta_log.truncate()
+                await _advance_stream_state(items)
+
+        # Changes applied to the old engine after the fetch are replayed onto the new one.
+        for doc_id in dirty_ids:
+            change_ingestor.submit(doc_id, "update")
+        job.finish()
+        metrics.REBUILD_SECONDS.observe(job.finished_at - job.started_at, status="succeeded")
+        logger.info(
+            f"Full engine rebuild complete with {len(items)} items "
+            f"({stats['reused']} embeddings reused, {stats['computed']} computed); "
+            f"re-queued {len(dirty_ids)} ids changed during the build.")
+    except Exception as e:
+        logger.exception(f"Full engine rebuild {job.job_id} failed.")
+        job.finish(error=str(e))
+        metrics.REBUILD_SECONDS.observe(job.finished_at - job.started_at, status="failed")
+    finally:
+        _rebuild_dirty_ids = None
+        _current_rebuild = None
+
+
+def _start_rebuild() -> RebuildJob:
+    """Starts a background rebuild, or returns the one already running."""
+    global _current_rebuild
+    if _current_rebuild is not None and not _current_rebuild.done:
+        return _current_rebuild
+    job = RebuildJob()
+    _current_rebuild = job
+    rebuild_jobs[job.job_id] = job
+    while len(rebuild_jobs) > settings.REBUILD_JOB_HISTORY:
+        rebuild_jobs.popitem(last=False)
+    asyncio.create_task(_run_rebuild(job))
+    return job
+
+# --- Worker Roles ---
+
+
+def _start_writer_tasks():
+    snapshotter.start()
+    change_ingestor.start()
+    asyncio.create_task(watch_mongodb_changes())
 
-    items = await fetch_and_extract_items()
-    model_dim = get_model().get_sentence_embedding_dimension()
 
-    async with data_lock:
-        faiss_manager = FaissManager(dim=model_dim)
-        if not items:
-            faiss_manager.build_index([], None)
-            hybrid_engine = HybridSearchEngine(faiss_manager, [])
-        else:
-            embeddings = create_blended_embeddings(items)
-            faiss_manager.build_index(items, embeddings)
-            hybrid_engine = HybridSearchEngine(faiss_manager, items)
-            save_items(items)
-            faiss_manager.save()
-        logger.info(f"Full engine rebuild complete with {len(items)} items.")
+async def _become_writer():
+    global hybrid_engine
+    engine = _load_persisted_engine()
+    if engine is not None:
+        _replay_delta_log(engine)
+        hybrid_engine = engine
+        await response_cache.bump()
+        logger.info("Successfully loaded persisted search engine.")
+    else:
+        _start_rebuild()
+    _start_writer_tasks()
+
+
+async def _follow_writer():
+    """Reader loop: picks up newly published snapshots, tails the delta log, and takes over if the writer dies."""
+    global hybrid_engine
+    position = None
+    # Set once this worker may have missed a change; cleared by loading a snapshot.
+    diverged = False
+    while True:
+        await asyncio.sleep(settings.SNAPSHOT_POLL_SECONDS)
+        try:
+            if writer_lease.try_acquire():
+                logger.info("Writer lease acquired; promoting this worker to writer.")
+                await _become_writer()
+                return
+
+            version = snapshot_dir.current_version()
+            if version is not None and version != _loaded_snapshot_version:
+                engine = await asyncio.to_thread(_load_persisted_engine, True)
+                if engine is not None:
+                    hybrid_engine = engine
+                    position = None
+                    diverged = False
+                    response_cache.adopt(snapshot_dir.generation(version))
+                    logger.info(f"Loaded published snapshot version {version}.")
+
+            engine = hybrid_engine
+            if engine is None:
+                continue
+            records, next_position = delta_log.read_from(position)
+            if records:
+                _apply_delta_records(engine, records)
+                # A log replaced under us belongs to a snapshot this worker hasn't loaded yet,
+                # and a skipped corrupt record is a change this worker never applied.
+                replaced = position is not None and (
+                    next_position[0] != position[0] or next_position[1] < position[1])
+                diverged = diverged or replaced or any(op == "corrupt" for op, _, _, _ in records)
+                response_cache.adopt(None if diverged else _generation_after(records, response_cache.generation))
+            position = next_position
+        except Exception:
+            logger.exception("Snapshot follower poll failed.")
+
+
+async def _warm_up_model():
+    try:
+        await query_encoder.warm_up()
+        logger.info("Encoder model loaded and warmed up.")
+    except Exception:
+        logger.exception("Encoder warm-up failed; the model will load on first use.")
 
 # --- FastAPI Lifespan ---
 
@@ -96,25 +409,34 @@ async def _rebuild_search_engine_full():
 async def lifespan(app: FastAPI):
     logger.info("Application startup...")
     await connect_to_mongo()
+    query_embedding_cache.load()
+    stream_state.update(load_stream_state())
 
-    items = load_items()
-    if items:
+    if not settings.MULTI_WORKER or writer_lease.try_acquire():
         logger.info("Loading persisted engine from disk...")
-        model_dim = get_model().get_sentence_embedding_dimension()
-        global faiss_manager, hybrid_engine
-        faiss_manager = FaissManager(dim=model_dim)
-        if faiss_manager.load():
-            hybrid_engine = HybridSearchEngine(faiss_manager, items)
-            logger.info("Successfully loaded persisted search engine.")
-        else:
-            asyncio.create_task(_rebuild_search_engine_full())
+        await _become_writer()
     else:
-        asyncio.create_task(_rebuild_search_engine_full())
-
-    asyncio.create_task(watch_mongodb_changes())
+        global hybrid_engine
+        logger.info("Running as a read-only worker; following published snapshots.")
+        hybrid_engine = _load_persisted_engine(read_only=True)
+        if hybrid_engine is not None:
+            response_cache.adopt(snapshot_dir.generation(_loaded_snapshot_version))
+        asyncio.create_task(_follow_writer())
+
+    # The engine above was opened from disk without the model; /autocomplete, lexical
+    # hits and probes are served while the model loads in the background.
+    query_encoder.start()
+    asyncio.create_task(_warm_up_model())
 
     yield
 
+    await change_ingestor.stop()
+    await snapshotter.stop()
+    delta_log.close()
+    writer_lease.release()
+    await query_encoder.stop()
+    query_embedding_cache.save()
+    response_cache.close()
     await close_mongo_connection()
     logger.info("Application shutdown.")
 
@@ -146,48 +468,205 @@ def read_root():
     return StatusResponse(message="Smart Search API is running.")
 
 
+def _readiness() -> str:
+    engine = hybrid_engine
+    if engine is None or engine.fm.index is None:
+        return "initializing"
+    if not model_loaded():
+        return "warming_up"
+    return "ok"
+
+
+@app.get("/livez", response_model=HealthResponse, tags=["Health"])
+async def liveness():
+    """Liveness probe: the event loop is answering."""
+    return HealthResponse(status="ok")
+
+
+@app.get("/readyz", response_model=HealthResponse, tags=["Health"])
+async def readiness(response: Response):
+    """Readiness probe: an engine is loaded and the model is warm. Checks state only, never searches."""
+    status = _readiness()
+    if status != "ok":
+        response.status_code = 503
+    return HealthResponse(status=status)
+
+
+@app.get("/metrics", tags=["Health"])
+async def metrics_endpoint():
+    """Prometheus text exposition of per-stage search latencies, caches, index and ingestion state."""
+    engine = hybrid_engine
+    if engine is not None and engine.fm.index is not None:
+        metrics.INDEX_VECTORS.set(engine.fm.index.ntotal)
+        metrics.INDEX_ITEMS.set(len(engine.store))
+        metrics.INDEX_INFO.clear()
+        metrics.INDEX_INFO.set(1, type=engine.fm.config.get("type", "unknown"))
+    metrics.MODEL_LOADED.set(1 if model_loaded() else 0)
+    metrics.INGESTION_PENDING.set(change_ingestor.pending)
+
+    metrics.RESPONSE_CACHE_GENERATION.set(-1 if response_cache.generation is None else response_cache.generation)
+    # Coalesced misses were served without a computation of their own, like hits.
+    hits = (metrics.SEARCH_CACHE_REQUESTS.value(result="hit")
+            + metrics.SEARCH_CACHE_REQUESTS.value(result="coalesced"))
+    lookups = hits + metrics.SEARCH_CACHE_REQUESTS.value(result="miss")
+    metrics.CACHE_HIT_RATIO.set(hits / lookups if lookups else 0.0, cache="response")
+    metrics.CACHE_HIT_RATIO.set(query_embedding_cache.stats()["hit_ratio"], cache="query_embedding")
+    return Response(content=metrics.registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.get("/health", response_model=HealthResponse, tags=["Health"])
 def health_check():
-    if hybrid_engine is None or faiss_manager is None or faiss_manager.index is None:
-        return HealthResponse(status="initializing")
+    """End-to-end check that runs a real search; orchestrator probes should use /livez and /readyz."""
+    engine = hybrid_engine
+    status = _readiness()
+    if status != "ok":
+        return HealthResponse(status=status)
     try:
-        asyncio.run(hybrid_engine.search("test"))
+        asyncio.run(engine.search("test"))
         return HealthResponse(status="ok")
     except Exception as e:
         logger.error(f"Health check failed during test search: {e}")
         return HealthResponse(status="unhealthy")
 
 
-@app.post("/refresh", response_model=RefreshResponse, tags=["Admin"])
+@app.post("/refresh", response_model=RefreshResponse, status_code=202, tags=["Admin"])
 async def trigger_refresh():
-    await _rebuild_search_engine_full()
-    return RefreshResponse(
-        message="Full data refresh and index rebuild complete.",
-        n_items=len(hybrid_engine.items) if hybrid_engine else 0
-    )
+    if settings.MULTI_WORKER and not writer_lease.held:
+        raise HTTPException(
+            status_code=409, detail="This worker is a read-only replica; refresh is handled by the writer worker.")
+    job = _start_rebuild()
+    return RefreshResponse(message="Full data refresh and index rebuild started.", **job.to_dict())
+
+
+@app.get("/refresh/{job_id}", response_model=RefreshResponse, tags=["Admin"])
+async def refresh_status(job_id: str):
+    job = rebuild_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown refresh job.")
+    return RefreshResponse(message=f"Refresh job is {job.status}.", **job.to_dict())
+
+
+@app.get("/memory", tags=["Admin"])
+def memory_report():
+    """Approximate memory held by each structure of the live engine, in total and per item."""
+    engine = hybrid_engine
+    if engine is None:
+        raise HTTPException(
+            status_code=503, detail="Search engine is not ready.")
+    return engine.memory_report()
 
 
 @app.get("/autocomplete", response_model=AutocompleteResponse, tags=["Search"])
-def autocomplete(prefix: str):
-    if hybrid_engine is None:
+async def autocomplete(prefix: str):
+    # Runs on the loop, like the change batches that update the index, never beside them.
+    engine = hybrid_engine
+    if engine is None:
         raise HTTPException(
             status_code=503, detail="Search engine is not ready.")
-    suggestions = hybrid_engine.get_autocomplete_suggestions(prefix)
+    suggestions = engine.get_autocomplete_suggestions(prefix)
     return AutocompleteResponse(suggestions=suggestions)
 
 
+def _search_cache_key(q: str, filters: SearchFilters | None = None, offset: int = 0,
+                      limit: int = 50, category_limit: int = 5):
+    # The unfiltered first page keeps the bare query as its key, shared with /search/batch.
+    if (filters is None or not filters.active) and offset == 0 and limit == 50 and category_limit == 5:
+        return q
+    return (q, filters.key() if filters else None, offset, limit, category_limit)
+
+
+def _json_response(body: bytes) -> Response:
+    return Response(content=body, media_type="application/json")
+
+
 @app.get("/search", response_model=SearchResponse, tags=["Search"])
-async def search(q: str):
-    """Performs a simplified semantic search."""
-    if hybrid_engine is None:
+async def search(q: str,
+                 category: Optional[str] = None,
+                 min_price: Optional[float] = Query(None, ge=0),
+                 max_price: Optional[float] = Query(None, ge=0),
+                 min_rating: Optional[float] = Query(None, ge=0),
+                 offset: int = Query(0, ge=0, le=settings.SEARCH_MAX_OFFSET),
+                 limit: int = Query(50, ge=1, le=50)):
+    """Performs a semantic search, optionally filtered and paged over services."""
+    engine = hybrid_engine
+    if engine is None:
         raise HTTPException(
             status_code=503, detail="Search engine is not ready.")
 
-    if q in search_cache:
-        return search_cache[q]
-
-    results_dict = await hybrid_engine.search(q)
-    response = SearchResponse(query=q, **results_dict)
+    # The cache holds finished result bodies; hits skip validation and encoding entirely.
+    filters = SearchFilters(category, min_price, max_price, min_rating)
+    cache_key = _search_cache_key(normalize_query(q), filters, offset, limit)
+    generation = response_cache.generation
+    results = await response_cache.get(cache_key)
+    if results is not None:
+        metrics.SEARCH_CACHE_REQUESTS.inc(result="hit")
+        return _json_response(with_query(q, results))
+
+    async def compute() -> bytes:
+        body = engine.render_results(await engine.search(q, filters, offset, limit))
+        response_cache.set(cache_key, body, generation)
+        return body
+
+    if generation is None:
+        metrics.SEARCH_CACHE_REQUESTS.inc(result="miss")
+        return _json_response(with_query(q, await compute()))
+    # Identical concurrent misses at one generation wait on a single computation.
+    flight_key = (generation, cache_key)
+    metrics.SEARCH_CACHE_REQUESTS.inc(result="miss" if search_flight.pending(flight_key) is None else "coalesced")
+    return _json_response(with_query(q, await search_flight.do(flight_key, compute)))
+
+
+@app.post("/search/batch", response_model=BatchSearchResponse, tags=["Search"])
+async def search_batch(request: BatchSearchRequest):
+    """Runs many searches with a single query encode and a single index search."""
+    engine = hybrid_engine
+    if engine is None:
+        raise HTTPException(
+            status_code=503, detail="Search engine is not ready.")
+    if len(request.queries) > settings.SEARCH_BATCH_MAX_QUERIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.SEARCH_BATCH_MAX_QUERIES} queries per batch.")
+
+    generation = response_cache.generation
+    keys = [_search_cache_key(normalize_query(query.q), limit=query.limit, category_limit=query.category_limit)
+            for query in request.queries]
+    bodies = await response_cache.get_many(keys)
+    # Misses that a concurrent /search is already computing are awaited rather than recomputed.
+    in_flight = {pos: search_flight.pending((generation, key)) for pos, key in enumerate(keys)
+                 if bodies[pos] is None and generation is not None}
+    in_flight = {pos: future for pos, future in in_flight.items() if future is not None}
+    for pos, body in enumerate(bodies):
+        metrics.SEARCH_CACHE_REQUESTS.inc(
+            result="hit" if body is not None else "coalesced" if pos in in_flight else "miss")
+    misses = list(dict.fromkeys(query.q for pos, query in enumerate(request.queries)
+                                if bodies[pos] is None and pos not in in_flight))
+
+    async def compute_misses() -> Dict[str, Dict[str, Any]]:
+        return dict(zip(misses, await engine.search_batch(misses))) if misses else {}
+
+    # Awaited together, so a failing batch still collects (and reports) the shared searches.
+    shared = list(in_flight)
+    results, *outcomes = await asyncio.gather(
+        compute_misses(), *(asyncio.shield(in_flight[pos]) for pos in shared), return_exceptions=True)
+    errors = {}
+    if isinstance(results, BaseException):
+        errors.update((query, results) for query in misses)
+    else:
+        for pos, query in enumerate(request.queries):
+            if bodies[pos] is None and pos not in in_flight:
+                bodies[pos] = engine.render_results(results[query.q], query.limit, query.category_limit)
+                response_cache.set(keys[pos], bodies[pos], generation)
+    for pos, outcome in zip(shared, outcomes):
+        if isinstance(outcome, BaseException):
+            errors.setdefault(request.queries[pos].q, outcome)
+        else:
+            bodies[pos] = outcome
+    if errors:
+        for query, error in errors.items():
+            logger.error(f"Batch search failed for query {query!r}.", exc_info=error)
+        raise HTTPException(
+            status_code=500, detail=f"Search failed for queries: {', '.join(map(repr, errors))}.")
 
-    search_cache[q] = response
-    return response
+    return _json_response(b'{"results":[' + b",".join(
+        with_query(query.q, body) for query, body in zip(request.queries, bodies)) + b"]}")
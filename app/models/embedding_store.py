@@ -0,0 +1,116 @@
+# FILE: app/models/embedding_store.py
+import hashlib
+import json
+import os
+import numpy as np
+import logging
+from app.config import settings
+from app.utils.persistence import _ensure_dir
+from typing import List, Dict, Any, Callable, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(item: Dict[str, Any]) -> str:
+    category_name = "" if item.get("isCategory") else (item.get("category") or {}).get("name", "")
+    payload = "\x1f".join([item.get("name") or "", item.get("description") or "", category_name or ""])
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _encoding_signature(model_name: str) -> Dict[str, Any]:
+    """Anything that changes the blended vector for identical content invalidates the store."""
+    return {
+        "model_name": model_name,
+        "weights": [settings.SERVICE_NAME_WEIGHT, settings.SERVICE_DESCRIPTION_WEIGHT,
+                    settings.CATEGORY_NAME_WEIGHT],
+    }
+
+
+class EmbeddingStore:
+    """
+    Content-addressed cache of blended item embeddings.
+
+    Vectors live in a float32 .npy matrix opened memory-mapped; a JSON sidecar maps
+    each row to the item `_id` and the content hash it was encoded from. `model_name`
+    identifies the encoder (its `encoder_id`); a store written by another is ignored.
+    """
+
+    def __init__(self, path: str = settings.EMBEDDING_STORE_PATH, model_name: str = settings.MODEL_NAME):
+        self.path = path
+        self.model_name = model_name
+        self.meta_path = f"{path}.meta.json"
+        self._vectors: np.ndarray | None = None
+        self._rows: Dict[str, Tuple[int, str]] = {}
+
+    def load(self) -> bool:
+        if not (os.path.exists(self.path) and os.path.exists(self.meta_path)):
+            return False
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            vectors = np.load(self.path, mmap_mode="r")
+        except Exception as e:
+            logger.error(f"Failed to load embedding store from {self.path}: {e}")
+            return False
+        if meta.get("signature") != _encoding_signature(self.model_name) or len(meta["ids"]) != len(vectors):
+            logger.info("Embedding store is stale for the current model/weights; ignoring it.")
+            return False
+        self._vectors = vectors
+        self._rows = {item_id: (row, digest) for row, (item_id, digest)
+                      in enumerate(zip(meta["ids"], meta["hashes"]))}
+        return True
+
+    def save(self, item_ids: List[str], hashes: List[str], embeddings: np.ndarray):
+        try:
+            _ensure_dir(self.path)
+            tmp_path, tmp_meta = f"{self.path}.tmp", f"{self.meta_path}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.save(f, np.ascontiguousarray(embeddings, dtype="float32"))
+            with open(tmp_meta, "w", encoding="utf-8") as f:
+                json.dump({"signature": _encoding_signature(self.model_name), "ids": item_ids,
+                           "hashes": hashes}, f)
+            os.replace(tmp_path, self.path)
+            os.replace(tmp_meta, self.meta_path)
+        except Exception as e:
+            logger.error(f"Failed to save embedding store to {self.path}: {e}")
+
+    def embed(self, items: List[Dict[str, Any]],
+              encode: Callable[[List[Dict[str, Any]]], np.ndarray]) -> Tuple[np.ndarray, Dict[str, int]]:
+        """
+        Returns embeddings for `items`, encoding only those that are new or whose content
+        hash changed, then persists the refreshed store.
+        """
+        if self._vectors is None:
+            self.load()
+
+        hashes = [content_hash(item) for item in items]
+        reuse_rows, reuse_pos, missing_pos = [], [], []
+        for pos, (item, digest) in enumerate(zip(items, hashes)):
+            stored = self._rows.get(item['_id'])
+            if stored is not None and stored[1] == digest:
+                reuse_rows.append(stored[0])
+                reuse_pos.append(pos)
+            else:
+                missing_pos.append(pos)
+
+        computed = encode([items[pos] for pos in missing_pos]) if missing_pos else None
+        if computed is not None:
+            dim = computed.shape[1]
+        elif self._vectors is not None:
+            dim = self._vectors.shape[1]
+        else:
+            return np.empty((0, 0), dtype="float32"), {"reused": 0, "computed": 0}
+
+        embeddings = np.empty((len(items), dim), dtype="float32")
+        if reuse_pos:
+            embeddings[reuse_pos] = self._vectors[reuse_rows]
+        if missing_pos:
+            embeddings[missing_pos] = computed
+
+        stats = {"reused": len(reuse_pos), "computed": len(missing_pos)}
+        logger.info(
+            f"Embedding store reused {stats['reused']} vectors and computed {stats['computed']}.")
+        if missing_pos or len(items) != len(self._rows):
+            self.save([item['_id'] for item in items], hashes, embeddings)
+            self.load()
+        return embeddings, stats
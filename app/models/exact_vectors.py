@@ -0,0 +1,120 @@
+# FILE: app/models/exact_vectors.py
+import os
+import numpy as np
+import logging
+from app.utils.memory import deep_sizeof
+from app.utils.persistence import _ensure_dir
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class ExactVectors:
+    """
+    Float16 copy of the normalized item embeddings, addressed by FAISS label, used to
+    recompute exact inner products for the candidates a quantized index returns.
+
+    The base matrix is memory-mapped copy-on-write when loaded from disk; vectors for
+    labels added afterwards go to a small in-memory overflow matrix. Rows of removed
+    labels are reused by later additions, so the overflow only grows with the number
+    of live labels, and `save` writes the live rows compacted.
+    """
+
+    def __init__(self, dim: int, labels: np.ndarray = None, vectors: np.ndarray = None):
+        self.dim = dim
+        labels = np.empty(0, dtype=np.int64) if labels is None else np.asarray(labels, dtype=np.int64)
+        self._base = (np.empty((0, dim), dtype=np.float16) if vectors is None
+                      else np.asarray(vectors, dtype=np.float16))
+        self._rows: Dict[int, int] = dict(zip(labels.tolist(), range(len(labels))))
+        self._overflow = np.empty((0, dim), dtype=np.float16)
+        self._overflow_size = 0
+        self._free: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def nbytes(self) -> int:
+        return self._base.nbytes + self._overflow.nbytes + deep_sizeof(self._rows)
+
+    def upsert(self, labels: np.ndarray, vectors: np.ndarray):
+        vectors = np.asarray(vectors, dtype=np.float16)
+        for label, vector in zip(np.asarray(labels, dtype=np.int64).tolist(), vectors):
+            row = self._rows.get(label)
+            if row is None:
+                if not self._free:
+                    self._rows[label] = self._append(vector)
+                    continue
+                row = self._free.pop()
+                self._rows[label] = row
+            if row < len(self._base):
+                self._base[row] = vector
+            else:
+                self._overflow[row - len(self._base)] = vector
+
+    def _append(self, vector: np.ndarray) -> int:
+        if self._overflow_size == len(self._overflow):
+            grown = np.empty((max(16, len(self._overflow) * 2), self.dim), dtype=np.float16)
+            grown[:self._overflow_size] = self._overflow[:self._overflow_size]
+            self._overflow = grown
+        self._overflow[self._overflow_size] = vector
+        self._overflow_size += 1
+        return len(self._base) + self._overflow_size - 1
+
+    def remove(self, labels: np.ndarray):
+        for label in np.asarray(labels, dtype=np.int64).tolist():
+            row = self._rows.pop(label, None)
+            if row is not None:
+                self._free.append(row)
+
+    def rescore(self, queries: np.ndarray, labels: np.ndarray) -> np.ndarray:
+        """
+        Exact inner products of each query row with the vectors of its candidate
+        labels; unknown or -1 labels score -inf.
+        """
+        rows = np.array([self._rows.get(label, -1) for label in labels.ravel().tolist()],
+                        dtype=np.int64).reshape(labels.shape)
+        known = rows >= 0
+        vectors = np.zeros(labels.shape + (self.dim,), dtype=np.float16)
+        in_base = known & (rows < len(self._base))
+        vectors[in_base] = self._base[rows[in_base]]
+        in_overflow = known & ~in_base
+        if in_overflow.any():
+            vectors[in_overflow] = self._overflow[rows[in_overflow] - len(self._base)]
+        scores = np.einsum("nkd,nd->nk", vectors.astype(np.float32), queries.astype(np.float32))
+        return np.where(known, scores, -np.inf).astype(np.float32)
+
+    def save(self, path: str) -> bool:
+        """Writes the live vectors as `<path>` (float16 .npy) plus `<path>.labels.npy`."""
+        try:
+            _ensure_dir(path)
+            labels = np.fromiter(self._rows.keys(), dtype=np.int64, count=len(self._rows))
+            rows = np.fromiter(self._rows.values(), dtype=np.int64, count=len(self._rows))
+            vectors = np.empty((len(rows), self.dim), dtype=np.float16)
+            in_base = rows < len(self._base)
+            vectors[in_base] = self._base[rows[in_base]]
+            vectors[~in_base] = self._overflow[rows[~in_base] - len(self._base)]
+            for target, array in ((path, vectors), (f"{path}.labels.npy", labels)):
+                tmp_path = f"{target}.tmp"
+                with open(tmp_path, "wb") as f:
+                    np.save(f, array)
+                os.replace(tmp_path, target)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to save exact vectors to {path}: {e}")
+            return False
+
+    @classmethod
+    def load(cls, path: str, dim: int) -> "ExactVectors | None":
+        if not (os.path.exists(path) and os.path.exists(f"{path}.labels.npy")):
+            return None
+        try:
+            vectors = np.load(path, mmap_mode="c")
+            labels = np.load(f"{path}.labels.npy")
+        except Exception as e:
+            logger.error(f"Error loading exact vectors from {path}: {e}")
+            return None
+        if vectors.ndim != 2 or vectors.shape[1] != dim or len(vectors) != len(labels):
+            logger.warning(f"Exact vectors at {path} don't match the index; ignoring them.")
+            return None
+        return cls(dim, labels, vectors)
@@ -2,65 +2,195 @@
 import faiss
 import numpy as np
 import hashlib
+import time
 from app.config import settings
-from app.utils.persistence import save_faiss_index, load_faiss_index
+from app.models.exact_vectors import ExactVectors
+from app.models.index_tuner import default_config, build_base_index, apply_search_params, autotune
+from app.utils.persistence import save_faiss_index, load_faiss_index, save_index_config, load_index_config
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Index families whose returned scores are approximations of the inner product.
+QUANTIZED_TYPES = ("ivfpq", "sq8")
+
 
 def id_to_int(doc_id: str) -> int:
     return int(hashlib.md5(doc_id.encode()).hexdigest(), 16) & (2**63 - 1)
 
 
+def index_nbytes(index: faiss.Index | None) -> int:
+    """Approximate resident size of an index: stored codes and ids, coarse centroids and graph links."""
+    if index is None:
+        return 0
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexIDMap):
+        return index.ntotal * 8 + index_nbytes(index.index)
+    if isinstance(index, faiss.IndexHNSW):
+        hnsw = index.hnsw
+        return (index_nbytes(index.storage) + hnsw.neighbors.size() * 4
+                + hnsw.levels.size() * 4 + hnsw.offsets.size() * 8)
+    if isinstance(index, faiss.IndexIVF):
+        return index.ntotal * (index.code_size + 8) + index_nbytes(index.quantizer)
+    return index.ntotal * getattr(index, "code_size", index.d * 4)
+
+
 class FaissManager:
-    def __init__(self, dim: int):
+    def __init__(self, dim: int, index_type: str = None, model_name: str = None):
         self.dim = dim
-        self.index: faiss.Index | None = None
+        self.index_type = index_type or settings.INDEX_TYPE
+        # The encoder the vectors came from; recorded with the index so a restart can
+        # tell whether the snapshot is still usable without loading the model.
+        self.model_name = model_name
+        # Build and search parameters of the current index; persisted alongside it.
+        self.config: Dict[str, Any] = {"type": "flat"}
+        # Set when the index is a read-only mmap of a published snapshot. Changes then
+        # go to a small in-memory overlay, and base labels they supersede are masked.
+        self.read_only = False
+        # (index, overlay, masked labels), replaced in one assignment so a search
+        # running in a thread never pairs a new index with the old overlay or mask.
+        self._state: Tuple[faiss.Index | None, faiss.Index | None, np.ndarray] = (
+            None, None, np.empty(0, dtype=np.int64))
+        # Exact float16 vectors for re-ranking, kept only for quantized indexes.
+        self.exact: ExactVectors | None = None
+        # Category items live in their own small exact index, so they never compete
+        # with services for candidate slots in the (possibly approximate) main index.
+        self.categories: faiss.Index = self._empty_flat()
+        self._category_labels: np.ndarray | None = None
+
+    @property
+    def index(self) -> faiss.Index | None:
+        return self._state[0]
+
+    @index.setter
+    def index(self, index: faiss.Index | None):
+        self._state = (index,) + self._state[1:]
+
+    @property
+    def overlay(self) -> faiss.Index | None:
+        return self._state[1]
+
+    @property
+    def _masked(self) -> np.ndarray:
+        return self._state[2]
+
+    def _empty_flat(self) -> faiss.Index:
+        return faiss.IndexIDMap(faiss.IndexFlatIP(self.dim))
+
+    @property
+    def _rerank(self) -> bool:
+        return settings.INDEX_RERANK and self.config.get("type") in QUANTIZED_TYPES
+
+    @property
+    def _append_only(self) -> bool:
+        # HNSW graphs can't remove vectors, so they take the same overlay path as snapshots.
+        return self.read_only or self.config.get("type") == "hnsw"
+
+    def _choose_config(self, embeddings: np.ndarray) -> Dict[str, Any]:
+        n = len(embeddings)
+        if self.index_type != "auto":
+            return default_config(self.index_type, n, self.dim)
+        if n < settings.INDEX_FLAT_MAX_ITEMS:
+            return default_config("flat", n, self.dim)
+        return autotune(embeddings, self.dim)
+
+    def _split(self, items: List[Dict[str, Any]], embeddings: np.ndarray | None) -> tuple:
+        """Labels, float32 vectors and category flags of `items`."""
+        labels = np.fromiter((id_to_int(item['_id']) for item in items), dtype=np.int64, count=len(items))
+        if embeddings is None:
+            embeddings = np.empty((0, self.dim), dtype="float32")
+        vectors = np.ascontiguousarray(embeddings, dtype="float32").reshape(-1, self.dim)
+        is_category = np.fromiter((bool(item.get("isCategory")) for item in items), dtype=bool, count=len(items))
+        return labels, vectors, is_category
 
     def build_index(self, items: List[Dict[str, Any]], embeddings: np.ndarray):
-        if not items:
-            self.index = faiss.IndexIDMap(faiss.IndexFlatIP(self.dim))
+        labels, vectors, is_category = self._split(items, embeddings)
+        self.categories = self._empty_flat()
+        self._category_labels = None
+        if is_category.any():
+            self.categories.add_with_ids(vectors[is_category], labels[is_category])
+        self._build_services(labels[~is_category], np.ascontiguousarray(vectors[~is_category]))
+
+    def _build_services(self, int_ids: np.ndarray, embeddings: np.ndarray):
+        self.read_only = False
+        if not len(int_ids):
+            self.config = {"type": "flat"}
+            self._state = (self._empty_flat(), None, np.empty(0, dtype=np.int64))
+            self.exact = None
             return
 
-        if len(items) < 1000:
-            logger.info(
-                f"Building simple index (IndexFlatIP) for {len(items)} items.")
-            base_index = faiss.IndexFlatIP(self.dim)
-            self.index = faiss.IndexIDMap(base_index)
-            self.add_items(items, embeddings)
-        else:
-            logger.info(
-                f"Building quantized index (IVFPQ) for {len(items)} items.")
-            quantizer = faiss.IndexFlatIP(self.dim)
-            nlist = min(100, max(4, int(np.sqrt(len(items)))))
-            M = 64
-            if self.dim % M != 0:
-                M = [m for m in [32, 16, 8, 4, 2, 1] if self.dim % m == 0][0]
+        self.config = self._choose_config(embeddings)
+        logger.info(f"Building {self.config['type']} index for {len(int_ids)} items.")
+        index = faiss.IndexIDMap(build_base_index(self.config, self.dim, embeddings))
+        apply_search_params(index, self.config)
+        index.add_with_ids(embeddings, int_ids)
+        self._state = (index, self._new_overlay(), np.empty(0, dtype=np.int64))
+        self.exact = ExactVectors(self.dim, int_ids, embeddings) if self._rerank else None
+
+    def _new_overlay(self) -> faiss.Index | None:
+        return faiss.IndexIDMap(faiss.IndexFlatIP(self.dim)) if self._append_only else None
 
-            base_ivfpq_index = faiss.IndexIVFPQ(
-                quantizer, self.dim, nlist, M, 8)
-            base_ivfpq_index.metric_type = faiss.METRIC_INNER_PRODUCT
+    def memory_usage(self) -> Dict[str, int]:
+        usage = {"index_mapped" if self.read_only else "index": index_nbytes(self.index),
+                 "categories": index_nbytes(self.categories), "overlay": index_nbytes(self.overlay)
+                 + self._masked.nbytes}
+        if self.exact is not None:
+            usage["exact_vectors"] = self.exact.nbytes
+        return usage
 
-            logger.info("Training quantized index...")
-            base_ivfpq_index.train(embeddings)
+    def category_labels(self) -> np.ndarray:
+        """Sorted labels of the category index."""
+        if self._category_labels is None:
+            self._category_labels = np.sort(faiss.vector_to_array(self.categories.id_map))
+        return self._category_labels
 
-            self.index = faiss.IndexIDMap(base_ivfpq_index)
-            self.add_items(items, embeddings)
+    def _add_categories(self, int_ids: np.ndarray, embeddings: np.ndarray):
+        self.categories.remove_ids(int_ids)
+        self.categories.add_with_ids(embeddings, int_ids)
+        self._category_labels = None
 
     def add_items(self, items: List[Dict[str, Any]], embeddings: np.ndarray):
         if not items:
             return
-        int_ids = np.array([id_to_int(item['_id']) for item in items])
+        labels, vectors, is_category = self._split(items, embeddings)
+        if is_category.any():
+            self._add_categories(labels[is_category], vectors[is_category])
+        if not is_category.all():
+            self._add_services(labels[~is_category], np.ascontiguousarray(vectors[~is_category]))
+
+    def _add_services(self, int_ids: np.ndarray, embeddings: np.ndarray):
+        if self.exact is not None:
+            self.exact.upsert(int_ids, embeddings)
+        if self._append_only:
+            self._mask(int_ids)
+            self.overlay.add_with_ids(embeddings, int_ids)
+            return
         self.index.add_with_ids(embeddings, int_ids)
 
     def remove_items(self, item_ids: List[str]):
-        if not item_ids or self.index.ntotal == 0:
+        if not item_ids:
             return
         int_ids_to_remove = np.array(
-            [id_to_int(doc_id) for doc_id in item_ids])
-        self.index.remove_ids(int_ids_to_remove)
+            [id_to_int(doc_id) for doc_id in item_ids], dtype=np.int64)
+        if self.categories.remove_ids(int_ids_to_remove):
+            self._category_labels = None
+        self._remove_services(int_ids_to_remove)
+
+    def _remove_services(self, int_ids: np.ndarray):
+        if self.exact is not None:
+            self.exact.remove(int_ids)
+        if self._append_only:
+            self._mask(int_ids)
+            self.overlay.remove_ids(int_ids)
+            return
+        if self.index.ntotal == 0:
+            return
+        self.index.remove_ids(int_ids)
+
+    def _mask(self, int_ids: np.ndarray):
+        index, overlay, masked = self._state
+        self._state = (index, overlay, np.union1d(masked, int_ids.astype(np.int64)))
 
     def update_items(self, items: List[Dict[str, Any]], embeddings: np.ndarray):
         if not items:
@@ -69,20 +199,142 @@ class FaissManager:
         self.remove_items(ids_to_update)
         self.add_items(items, embeddings)
 
-    def search(self, query_embeddings: np.ndarray, k: int = 10) -> tuple:
-        if self.index is None or self.index.ntotal == 0:
-            return np.array([[]]), np.array([[]])
+    def search_categories(self, query_embeddings: np.ndarray, k: int = 5,
+                          allowed: np.ndarray | None = None) -> tuple:
+        """Exact top-k category items for each query row."""
+        if self.categories.ntotal == 0:
+            n = len(query_embeddings)
+            return np.empty((n, 0), dtype=np.float32), np.empty((n, 0), dtype=np.int64)
+        k = min(k, self.categories.ntotal)
+        if allowed is None:
+            return self.categories.search(query_embeddings, k)
+        params = faiss.SearchParameters(sel=faiss.IDSelectorBatch(allowed))
+        return self.categories.search(query_embeddings, k, params=params)
+
+    def search(self, query_embeddings: np.ndarray, k: int = 10, allowed: np.ndarray | None = None) -> tuple:
+        """Top-k services by inner product; `allowed` restricts results to those labels inside the index search."""
+        if self.exact is None:
+            return self._search(query_embeddings, k, allowed)
+        distances, labels = self._search(query_embeddings, max(k, settings.INDEX_RERANK_DEPTH), allowed)
+        if labels.size == 0:
+            return distances, labels
+        distances = self.exact.rescore(query_embeddings, labels)
+        order = np.argsort(-distances, axis=1, kind="stable")[:, :k]
+        distances = np.take_along_axis(distances, order, axis=1)
+        labels = np.take_along_axis(labels, order, axis=1)
+        labels[~np.isfinite(distances)] = -1
+        return distances, labels
+
+    def _search(self, query_embeddings: np.ndarray, k: int, allowed: np.ndarray | None = None) -> tuple:
+        index, overlay, masked = self._state
+        if overlay is not None and (len(masked) or overlay.ntotal):
+            return self._search_with_overlay(index, overlay, masked, query_embeddings, k, allowed)
+        if index is None or index.ntotal == 0:
+            n = len(query_embeddings)
+            return np.empty((n, 0), dtype=np.float32), np.empty((n, 0), dtype=np.int64)
+        return self._search_index(index, query_embeddings, k, allowed)
+
+    def _search_index(self, index: faiss.Index, query_embeddings: np.ndarray, k: int,
+                      allowed: np.ndarray | None) -> tuple:
+        if allowed is None:
+            return index.search(query_embeddings, k)
+
+        selector = faiss.IDSelectorBatch(allowed)
+        selectivity = max(len(allowed) / max(1, index.ntotal), 1e-6)
+        base = faiss.downcast_index(index.index)
+        if hasattr(base, "nprobe"):
+            # Fewer allowed vectors per list means more lists must be probed to find k.
+            nprobe = min(base.nlist, int(np.ceil(base.nprobe / selectivity)))
+            params = faiss.SearchParametersIVF(sel=selector, nprobe=nprobe)
+        elif hasattr(base, "hnsw"):
+            if selectivity < settings.FILTER_SCAN_SELECTIVITY:
+                # The graph walk can't reach a handful of scattered nodes; scan the stored vectors.
+                storage = faiss.downcast_index(base.storage)
+                translated = faiss.IDSelectorTranslated(index.id_map, selector)
+                distances, positions = storage.search(
+                    query_embeddings, k, params=faiss.SearchParameters(sel=translated))
+                id_map = faiss.vector_to_array(index.id_map)
+                return distances, np.where(positions >= 0, id_map[np.maximum(positions, 0)], -1)
+            ef_search = min(max(base.hnsw.efSearch, int(k / selectivity)), max(k, 4096))
+            params = faiss.SearchParametersHNSW(sel=selector, efSearch=ef_search)
+        else:
+            params = faiss.SearchParameters(sel=selector)
+        return index.search(query_embeddings, k, params=params)
+
+    def _search_with_overlay(self, index: faiss.Index | None, overlay: faiss.Index, masked: np.ndarray,
+                             query_embeddings: np.ndarray, k: int, allowed: np.ndarray | None = None) -> tuple:
+        n = query_embeddings.shape[0]
+        distances = [np.empty((n, 0), dtype="float32")]
+        labels = [np.empty((n, 0), dtype=np.int64)]
+        if index is not None and index.ntotal:
+            base_k = min(index.ntotal, k + len(masked))
+            base_d, base_l = self._search_index(index, query_embeddings, base_k, allowed)
+            stale = np.isin(base_l, masked)
+            distances.append(np.where(stale, -np.inf, base_d).astype("float32"))
+            labels.append(np.where(stale, -1, base_l))
+        if overlay.ntotal:
+            over_d, over_l = self._search_index(overlay, query_embeddings, min(k, overlay.ntotal), allowed)
+            distances.append(over_d)
+            labels.append(over_l)
+
+        merged_d, merged_l = np.hstack(distances), np.hstack(labels)
+        order = np.argsort(-merged_d, axis=1, kind="stable")[:, :k]
+        merged_d = np.take_along_axis(merged_d, order, axis=1)
+        merged_l = np.take_along_axis(merged_l, order, axis=1)
+        merged_l[~np.isfinite(merged_d)] = -1
+        return merged_d, merged_l
+
+    def _fold_overlay(self):
+        """
+        Rebuilds an append-only (HNSW) index without its masked vectors and with the
+        overlay merged in. Searches keep using the old state until the new one is published.
+        """
+        index, overlay, masked = self._state
+        if self.read_only or overlay is None or not (len(masked) or overlay.ntotal):
+            return
+        labels = faiss.vector_to_array(index.id_map)
+        vectors = index.index.reconstruct_n(0, index.ntotal)
+        keep = ~np.isin(labels, masked)
+        if overlay.ntotal:
+            labels = np.concatenate([labels[keep], faiss.vector_to_array(overlay.id_map)])
+            vectors = np.vstack([vectors[keep], overlay.index.reconstruct_n(0, overlay.ntotal)])
+        else:
+            labels, vectors = labels[keep], vectors[keep]
+        logger.info(f"Folding {overlay.ntotal} overlay vectors into the {self.config['type']} index.")
+        folded = faiss.IndexIDMap(build_base_index(self.config, self.dim, vectors))
+        apply_search_params(folded, self.config)
+        folded.add_with_ids(vectors, labels)
+        self._state = (folded, self._new_overlay(), np.empty(0, dtype=np.int64))
 
-        if hasattr(self.index, 'nprobe'):
-            self.index.nprobe = 10
-        return self.index.search(query_embeddings, k)
+    @staticmethod
+    def read_metadata(path: str = settings.FAISS_INDEX_PATH) -> Dict[str, Any]:
+        """Dim, encoder, size and build parameters saved next to the index, without reading it."""
+        return load_index_config(path)
 
-    def save(self, path: str = settings.FAISS_INDEX_PATH):
-        save_faiss_index(self.index, path)
+    def save(self, path: str = settings.FAISS_INDEX_PATH) -> bool:
+        self._fold_overlay()
+        metadata = {"dim": self.dim, "model_name": self.model_name, "ntotal": int(self.index.ntotal),
+                    "saved_at": time.time(), "config": self.config}
+        if not (save_faiss_index(self.index, path) and save_faiss_index(self.categories, f"{path}.categories")
+                and save_index_config(metadata, path)):
+            return False
+        return self.exact is None or self.exact.save(f"{path}.vectors.npy")
 
-    def load(self, path: str = settings.FAISS_INDEX_PATH) -> bool:
-        index = load_faiss_index(path)
+    def load(self, path: str = settings.FAISS_INDEX_PATH, mmap: bool = False) -> bool:
+        index = load_faiss_index(path, mmap=mmap)
+        categories = load_faiss_index(f"{path}.categories")
+        if index and index.d == self.dim and categories is None:
+            logger.warning(f"Index at {path} predates the separate category index; it needs a rebuild.")
+            return False
         if index and index.d == self.dim:
-            self.index = index
+            self.categories = categories
+            self._category_labels = None
+            metadata = load_index_config(path)
+            self.config = metadata.get("config", metadata) or {"type": "unknown"}
+            self.model_name = metadata.get("model_name", self.model_name)
+            apply_search_params(index, self.config)
+            self.read_only = mmap
+            self._state = (index, self._new_overlay(), np.empty(0, dtype=np.int64))
+            self.exact = ExactVectors.load(f"{path}.vectors.npy", self.dim) if self._rerank else None
             return True
         return False
@@ -0,0 +1,182 @@
+# FILE: app/models/filter_index.py
+import numpy as np
+import logging
+from app.config import settings
+from app.models.faiss_manager import id_to_int
+from app.utils.item_columns import ItemColumns, IS_CATEGORY, HAS_PRICE, HAS_RATING, item_price
+from typing import List, Dict, Any, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def item_category(item: Dict[str, Any]) -> str | None:
+    """Lowercased category name; a category item belongs to its own category."""
+    name = item.get("name") if item.get("isCategory") else (item.get("category") or {}).get("name")
+    return name.lower() if isinstance(name, str) else None
+
+
+class SearchFilters:
+    def __init__(self, category: str | None = None, min_price: float | None = None,
+                 max_price: float | None = None, min_rating: float | None = None):
+        self.category = category
+        self.min_price = min_price
+        self.max_price = max_price
+        self.min_rating = min_rating
+
+    @property
+    def active(self) -> bool:
+        return any(v is not None for v in (self.category, self.min_price, self.max_price, self.min_rating))
+
+    def key(self) -> Tuple:
+        return (self.category.lower() if self.category else None,
+                self.min_price, self.max_price, self.min_rating)
+
+
+class SortedAttribute:
+    """
+    Numeric attribute over FAISS labels for range queries: a value-sorted array of
+    labels plus the set of labels changed since it was last sorted, which are
+    checked individually until there are more than `max_unsorted` of them.
+    """
+
+    def __init__(self, labels: np.ndarray = None, values: np.ndarray = None,
+                 max_unsorted: int = settings.ITEM_STORE_MAX_UNSORTED):
+        self.max_unsorted = max_unsorted
+        labels = np.empty(0, dtype=np.int64) if labels is None else labels
+        values = np.empty(0, dtype=np.float64) if values is None else values
+        self._values: Dict[int, float] = dict(zip(labels.tolist(), values.tolist()))
+        self._dirty: Set[int] = set()
+        self._resort()
+
+    def _resort(self):
+        labels = np.fromiter(self._values.keys(), dtype=np.int64, count=len(self._values))
+        values = np.fromiter(self._values.values(), dtype=np.float64, count=len(self._values))
+        order = np.argsort(values, kind="stable")
+        self._sorted_labels = labels[order]
+        self._sorted_values = values[order]
+        self._dirty.clear()
+
+    def set(self, label: int, value: float | None):
+        if value is None:
+            self.remove(label)
+            return
+        self._values[label] = value
+        self._touch(label)
+
+    def remove(self, label: int):
+        if self._values.pop(label, None) is not None:
+            self._touch(label)
+
+    def _touch(self, label: int):
+        self._dirty.add(label)
+        if len(self._dirty) > self.max_unsorted:
+            self._resort()
+
+    def range(self, lo: float | None = None, hi: float | None = None) -> np.ndarray:
+        start = 0 if lo is None else np.searchsorted(self._sorted_values, lo, side="left")
+        stop = len(self._sorted_values) if hi is None else np.searchsorted(self._sorted_values, hi, side="right")
+        labels = self._sorted_labels[start:stop]
+        if not self._dirty:
+            return labels
+        labels = labels[~np.isin(labels, np.fromiter(self._dirty, dtype=np.int64, count=len(self._dirty)))]
+        changed = [label for label in self._dirty if label in self._values
+                   and (lo is None or self._values[label] >= lo) and (hi is None or self._values[label] <= hi)]
+        return np.concatenate([labels, np.array(changed, dtype=np.int64)])
+
+
+class FilterIndex:
+    """
+    Per-attribute lookups from filter values to FAISS labels: a label set per
+    category and sorted arrays for price and rating. `allowed` intersects them into
+    the label array handed to the index's ID selector.
+    """
+
+    def __init__(self, items: List[Dict[str, Any]] | ItemColumns = None,
+                 max_unsorted: int = settings.ITEM_STORE_MAX_UNSORTED):
+        self._categories: Dict[str, Set[int]] = {}
+        self._category_of: Dict[int, str] = {}
+        self._category_arrays: Dict[str, np.ndarray] = {}
+
+        if isinstance(items, ItemColumns):
+            labels = np.array(items.labels, dtype=np.int64)
+            names = [category.get("name") for category in items.categories]
+            for row, label in enumerate(labels.tolist()):
+                category_id = int(items.category_ids[row])
+                name = items.name(row) if items.flags[row] & IS_CATEGORY else (
+                    names[category_id] if category_id >= 0 else None)
+                self._add_category(label, name.lower() if isinstance(name, str) else None)
+            has_price = (items.flags & HAS_PRICE) > 0
+            has_rating = (items.flags & HAS_RATING) > 0
+            self.price = SortedAttribute(labels[has_price], items.prices[has_price], max_unsorted)
+            self.rating = SortedAttribute(labels[has_rating], items.ratings[has_rating], max_unsorted)
+            return
+
+        prices, ratings = [], []
+        for item in items or []:
+            label = id_to_int(item['_id'])
+            self._add_category(label, item_category(item))
+            price = item_price(item)
+            if price is not None:
+                prices.append((label, price))
+            rating = item.get("avgRating")
+            if isinstance(rating, (int, float)) and not isinstance(rating, bool):
+                ratings.append((label, float(rating)))
+        self.price = SortedAttribute(*self._columns(prices), max_unsorted=max_unsorted)
+        self.rating = SortedAttribute(*self._columns(ratings), max_unsorted=max_unsorted)
+
+    @staticmethod
+    def _columns(pairs: List[Tuple[int, float]]) -> Tuple[np.ndarray, np.ndarray]:
+        return (np.array([label for label, _ in pairs], dtype=np.int64),
+                np.array([value for _, value in pairs], dtype=np.float64))
+
+    def _add_category(self, label: int, category: str | None):
+        if category is None:
+            return
+        self._categories.setdefault(category, set()).add(label)
+        self._category_of[label] = category
+        self._category_arrays.pop(category, None)
+
+    def _remove_category(self, label: int):
+        category = self._category_of.pop(label, None)
+        if category is not None:
+            self._categories[category].discard(label)
+            self._category_arrays.pop(category, None)
+
+    def upsert(self, item: Dict[str, Any]):
+        label = id_to_int(item['_id'])
+        self._remove_category(label)
+        self._add_category(label, item_category(item))
+        self.price.set(label, item_price(item))
+        rating = item.get("avgRating")
+        self.rating.set(label, float(rating) if isinstance(rating, (int, float))
+                        and not isinstance(rating, bool) else None)
+
+    def remove(self, item_id: str):
+        label = id_to_int(item_id)
+        self._remove_category(label)
+        self.price.remove(label)
+        self.rating.remove(label)
+
+    def _category_labels(self, category: str) -> np.ndarray:
+        category = category.lower()
+        if category not in self._category_arrays:
+            labels = self._categories.get(category, set())
+            self._category_arrays[category] = np.sort(
+                np.fromiter(labels, dtype=np.int64, count=len(labels)))
+        return self._category_arrays[category]
+
+    def allowed(self, filters: SearchFilters | None) -> np.ndarray | None:
+        """Sorted labels matching every active filter, or None when nothing is filtered."""
+        if filters is None or not filters.active:
+            return None
+        parts = []
+        if filters.category is not None:
+            parts.append(self._category_labels(filters.category))
+        if filters.min_price is not None or filters.max_price is not None:
+            parts.append(self.price.range(filters.min_price, filters.max_price))
+        if filters.min_rating is not None:
+            parts.append(self.rating.range(filters.min_rating, None))
+        allowed = np.unique(parts[0])
+        for part in parts[1:]:
+            allowed = np.intersect1d(allowed, part, assume_unique=False)
+        return allowed
@@ -0,0 +1,139 @@
+# FILE: app/models/index_tuner.py
+import time
+import faiss
+import numpy as np
+import logging
+from app.config import settings
+from typing import List, Dict, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+INDEX_FAMILIES = ("flat", "ivfflat", "ivfpq", "sq8", "hnsw")
+
+
+def _pq_m(dim: int, preferred: int = 64) -> int:
+    return preferred if dim % preferred == 0 else [m for m in [32, 16, 8, 4, 2, 1] if dim % m == 0][0]
+
+
+def default_config(family: str, n: int, dim: int) -> Dict[str, Any]:
+    """Untuned parameters for an index family, sized for `n` vectors."""
+    nlist = min(100, max(4, int(np.sqrt(n))))
+    if family == "flat":
+        return {"type": "flat"}
+    if family == "ivfflat":
+        return {"type": "ivfflat", "nlist": nlist, "nprobe": 10}
+    if family == "ivfpq":
+        return {"type": "ivfpq", "nlist": nlist, "M": _pq_m(dim), "nbits": 8, "nprobe": 10}
+    if family == "sq8":
+        return {"type": "sq8"}
+    if family == "hnsw":
+        return {"type": "hnsw", "hnsw_m": 32, "ef_construction": 80, "ef_search": 64}
+    raise ValueError(f"Unknown index type '{family}'")
+
+
+def build_base_index(config: Dict[str, Any], dim: int, train_vectors: np.ndarray) -> faiss.Index:
+    family = config["type"]
+    if family == "flat":
+        return faiss.IndexFlatIP(dim)
+    if family == "sq8":
+        index = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT)
+    elif family == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, config["hnsw_m"], faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = config["ef_construction"]
+    else:
+        # IVF lists can't outnumber the training points.
+        nlist = max(1, min(config["nlist"], len(train_vectors)))
+        config["nlist"] = nlist
+        quantizer = faiss.IndexFlatIP(dim)
+        if family == "ivfflat":
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+        else:
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, config["M"], config["nbits"])
+            index.metric_type = faiss.METRIC_INNER_PRODUCT
+    if not index.is_trained:
+        logger.info(f"Training {family} index on {len(train_vectors)} vectors...")
+        index.train(train_vectors)
+    return index
+
+
+def apply_search_params(index: faiss.Index, config: Dict[str, Any]):
+    """Sets nprobe / efSearch on the index underneath any IndexIDMap wrapper."""
+    base = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+    if "nprobe" in config and hasattr(base, "nprobe"):
+        base.nprobe = int(config["nprobe"])
+    if "ef_search" in config and hasattr(base, "hnsw"):
+        base.hnsw.efSearch = int(config["ef_search"])
+
+
+def _measure(index: faiss.Index, queries: np.ndarray, truth: np.ndarray, k: int) -> Tuple[float, float]:
+    start = time.perf_counter()
+    hits = 0
+    for i in range(len(queries)):
+        _, labels = index.search(queries[i:i + 1], k)
+        hits += len(np.intersect1d(labels[0], truth[i]))
+    latency_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    return hits / truth.size, latency_ms
+
+
+def _sweep(config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    if config["type"] in ("ivfflat", "ivfpq"):
+        probes = sorted({p for p in (1, 2, 4, 8, 16, 32, 64, 128) if p <= config["nlist"]} | {config["nlist"]})
+        return [{**config, "nprobe": p} for p in probes]
+    if config["type"] == "hnsw":
+        return [{**config, "ef_search": ef} for ef in (16, 32, 64, 128, 256)]
+    return [config]
+
+
+def autotune(vectors: np.ndarray, dim: int,
+             families: List[str] = None,
+             recall_target: float = settings.INDEX_RECALL_TARGET,
+             k: int = settings.INDEX_TUNE_K,
+             sample_size: int = settings.INDEX_TUNE_SAMPLE,
+             max_train: int = settings.INDEX_TUNE_MAX_VECTORS) -> Dict[str, Any]:
+    """
+    Builds each candidate index family on (a subsample of) `vectors`, holds out a query
+    sample, and sweeps nprobe / efSearch. Returns the config with the lowest per-query
+    latency whose recall@k against exact search meets `recall_target`, or the most
+    accurate one if none does. IVF list counts are rescaled from the tuning subsample
+    to the full catalog size.
+    """
+    families = families or settings.INDEX_TUNE_FAMILIES
+    rng = np.random.default_rng(0)
+    n = len(vectors)
+    order = rng.permutation(n)
+    n_queries = min(sample_size, max(1, n // 10))
+    queries = np.ascontiguousarray(vectors[order[:n_queries]])
+    database = np.ascontiguousarray(vectors[order[n_queries:n_queries + max_train]])
+    k = min(k, len(database))
+
+    exact = faiss.IndexFlatIP(dim)
+    exact.add(database)
+    _, truth = exact.search(queries, k)
+
+    results = []
+    for family in families:
+        base_config = default_config(family, len(database), dim)
+        try:
+            index = build_base_index(dict(base_config), dim, database)
+            index.add(database)
+        except Exception as e:
+            logger.warning(f"Skipping {family} during index tuning: {e}")
+            continue
+        for candidate in _sweep(base_config):
+            apply_search_params(index, candidate)
+            recall, latency_ms = _measure(index, queries, truth, k)
+            results.append((candidate, recall, latency_ms))
+            logger.info(f"Index tuning: {candidate} recall@{k}={recall:.3f} latency={latency_ms:.3f}ms")
+
+    meeting = [r for r in results if r[1] >= recall_target]
+    chosen, recall, latency_ms = (min(meeting, key=lambda r: r[2]) if meeting
+                                  else max(results, key=lambda r: (r[1], -r[2])))
+    chosen = dict(chosen)
+    if "nlist" in chosen and n > len(database):
+        scale = np.sqrt(n / len(database))
+        chosen["nlist"] = int(chosen["nlist"] * scale)
+        chosen["nprobe"] = max(1, int(round(chosen["nprobe"] * scale)))
+    chosen["tuned"] = {"recall": round(recall, 4), "latency_ms": round(latency_ms, 4), "k": k,
+                       "recall_target": recall_target, "sample_queries": n_queries}
+    logger.info(f"Index tuning chose {chosen}.")
+    return chosen
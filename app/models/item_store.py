@@ -0,0 +1,176 @@
+# FILE: app/models/item_store.py
+import numpy as np
+import logging
+from app.config import settings
+from app.models.faiss_manager import id_to_int
+from app.utils.item_columns import ItemColumns, ItemRecord, Row
+from app.utils.memory import deep_sizeof
+from app.utils.payloads import render_item
+from typing import List, Dict, Any, Iterator
+
+logger = logging.getLogger(__name__)
+
+_TOMBSTONE = -1
+
+
+class ItemStore:
+    """
+    Slot-based item table addressed by FAISS label.
+
+    Each item occupies a slot; `_labels[slot]` holds its int64 FAISS label and
+    `_rows` maps label -> slot for O(1) add/update/delete. Deletes leave tombstones
+    that are compacted away once they exceed ITEM_STORE_COMPACT_RATIO. A label-sorted
+    view of the slots resolves a whole FAISS result row with one searchsorted call;
+    slots appended since the last sort are resolved through `_rows`.
+
+    Items are never held as dicts. The initial items live in an `ItemColumns`
+    buffer (mapped from disk, or laid out in memory from a list) and their slots
+    hold the row number; upserts are stored as slotted `ItemRecord`s that share
+    interned category dicts. Either is hydrated into a dict only when looked up.
+
+    Each slot also keeps the item's response JSON fragment, rendered when the item
+    is stored (or on first use for column rows), so responses never re-encode it.
+    """
+
+    def __init__(self, items: List[Dict[str, Any]] | ItemColumns = None,
+                 compact_ratio: float = settings.ITEM_STORE_COMPACT_RATIO,
+                 max_unsorted: int = settings.ITEM_STORE_MAX_UNSORTED):
+        self.compact_ratio = compact_ratio
+        self.max_unsorted = max_unsorted
+        self._labels = np.empty(0, dtype=np.int64)
+        self._items: List[ItemRecord | int | None] = []
+        self._fragments: List[bytes | None] = []
+        self._categories: Dict[str, Dict[str, Any]] = {}
+        self._rows: Dict[int, int] = {}
+        self._tombstones = 0
+        self._sorted_labels = np.empty(0, dtype=np.int64)
+        self._sorted_slots = np.empty(0, dtype=np.int64)
+        self._sorted_upto = 0
+        if not isinstance(items, ItemColumns):
+            items = ItemColumns.from_items(list({item['_id']: item for item in items or []}.values()))
+        self._base = items
+        self._load(list(range(len(items))), np.array(items.labels, dtype=np.int64), [None] * len(items))
+
+    def _load(self, entries: List[ItemRecord | int], labels: np.ndarray,
+              fragments: List[bytes | None]):
+        self._items = entries
+        self._fragments = fragments
+        self._labels = labels
+        self._rows = dict(zip(labels.tolist(), range(len(labels))))
+        self._tombstones = 0
+        self._resort()
+
+    def _hydrate(self, entry: ItemRecord | int) -> Dict[str, Any]:
+        return self._base.item(entry) if isinstance(entry, int) else entry.item()
+
+    def _resort(self):
+        size = len(self._items)
+        live = self._labels[:size]
+        order = np.argsort(live, kind="stable")
+        self._sorted_labels = live[order]
+        self._sorted_slots = order.astype(np.int64)
+        self._sorted_upto = size
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, item_id: str) -> bool:
+        return id_to_int(item_id) in self._rows
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return (self._hydrate(entry) for entry in self._items if entry is not None)
+
+    def rows(self) -> Iterator[Row]:
+        """Live items as column rows, for writing a snapshot without hydrating them."""
+        return (self._base.row(entry) if isinstance(entry, int) else entry.row()
+                for entry in self._items if entry is not None)
+
+    def get(self, item_id: str) -> Dict[str, Any] | None:
+        slot = self._rows.get(id_to_int(item_id))
+        return None if slot is None else self._hydrate(self._items[slot])
+
+    def fragment(self, item_id: str) -> bytes | None:
+        """The item's pre-rendered JSON, as it appears in search responses."""
+        slot = self._rows.get(id_to_int(item_id))
+        if slot is None:
+            return None
+        if self._fragments[slot] is None:
+            self._fragments[slot] = render_item(self._hydrate(self._items[slot]))
+        return self._fragments[slot]
+
+    def upsert(self, item: Dict[str, Any]):
+        label = id_to_int(item['_id'])
+        slot = self._rows.get(label)
+        record = ItemRecord(item, self._categories)
+        if slot is not None:
+            self._items[slot] = record
+            self._fragments[slot] = render_item(item)
+            return
+
+        slot = len(self._items)
+        if slot >= len(self._labels):
+            grown = np.empty(max(16, len(self._labels) * 2), dtype=np.int64)
+            grown[:slot] = self._labels[:slot]
+            self._labels = grown
+        self._labels[slot] = label
+        self._items.append(record)
+        self._fragments.append(render_item(item))
+        self._rows[label] = slot
+        if len(self._items) - self._sorted_upto > self.max_unsorted:
+            self._resort()
+
+    def remove(self, item_id: str) -> bool:
+        slot = self._rows.pop(id_to_int(item_id), None)
+        if slot is None:
+            return False
+        self._items[slot] = None
+        self._fragments[slot] = None
+        self._labels[slot] = _TOMBSTONE
+        self._tombstones += 1
+        if self._tombstones > self.compact_ratio * max(1, len(self._items)):
+            self.compact()
+        return True
+
+    def compact(self):
+        logger.info(
+            f"Compacting item store: dropping {self._tombstones} tombstones.")
+        live = np.flatnonzero(self._labels[:len(self._items)] != _TOMBSTONE)
+        slots = live.tolist()
+        self._load([self._items[slot] for slot in slots], self._labels[live],
+                   [self._fragments[slot] for slot in slots])
+
+    def resolve(self, labels: np.ndarray) -> np.ndarray:
+        """Maps FAISS labels to slots; unknown, deleted or -1 labels map to -1."""
+        labels = np.asarray(labels, dtype=np.int64)
+        slots = np.full(labels.shape, _TOMBSTONE, dtype=np.int64)
+        if len(self._sorted_labels):
+            pos = np.searchsorted(self._sorted_labels, labels)
+            pos = np.minimum(pos, len(self._sorted_labels) - 1)
+            hit = self._sorted_labels[pos] == labels
+            candidate = self._sorted_slots[pos[hit]]
+            # A sorted slot may have been tombstoned since the last sort.
+            slots[hit] = np.where(self._labels[candidate] == labels[hit], candidate, _TOMBSTONE)
+        if len(self._items) > self._sorted_upto:
+            for i in np.flatnonzero((slots == _TOMBSTONE) & (labels != _TOMBSTONE)):
+                slots[i] = self._rows.get(int(labels[i]), _TOMBSTONE)
+        return slots
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Approximate bytes held per structure; mapped columns are file-backed and reclaimable."""
+        return {
+            "columns_in_memory": 0 if self._base.path else self._base.nbytes,
+            "columns_mapped": self._base.nbytes if self._base.path else 0,
+            # Slot entries: column row numbers and the records of upserted items.
+            "slots": deep_sizeof(self._items) + deep_sizeof(self._categories),
+            "label_lookup": deep_sizeof(self._rows) + self._labels.nbytes
+            + self._sorted_labels.nbytes + self._sorted_slots.nbytes,
+            "fragments": deep_sizeof(self._fragments),
+        }
+
+    def at(self, slots: np.ndarray) -> List[Dict[str, Any]]:
+        """Items in live slots, as returned by `resolve`."""
+        return [self._hydrate(self._items[slot]) for slot in np.asarray(slots).tolist()]
+
+    def lookup(self, labels: np.ndarray) -> List[Dict[str, Any] | None]:
+        return [None if slot == _TOMBSTONE else self._hydrate(self._items[slot])
+                for slot in self.resolve(labels).tolist()]
@@ -1,6 +1,6 @@
 # FILE: app/models/pydantic_models.py
-from pydantic import BaseModel
-from typing import List, Dict, Any
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Optional
 
 
 class SearchResultItem(BaseModel):
@@ -14,13 +14,36 @@ class SearchResponse(BaseModel):
     services: List[SearchResultItem]
 
 
+class BatchSearchQuery(BaseModel):
+    q: str
+    limit: int = Field(50, ge=0, le=50)
+    category_limit: int = Field(5, ge=0, le=5)
+
+
+class BatchSearchRequest(BaseModel):
+    queries: List[BatchSearchQuery] = Field(..., min_length=1)
+
+
+class BatchSearchResponse(BaseModel):
+    results: List[SearchResponse]
+
+
 class AutocompleteResponse(BaseModel):
     suggestions: List[str]
 
 
 class RefreshResponse(BaseModel):
     message: str
+    job_id: str
+    status: str
+    stage: str
+    progress: float
     n_items: int
+    n_reused_embeddings: int = 0
+    n_computed_embeddings: int = 0
+    error: Optional[str] = None
+    started_at: float
+    finished_at: Optional[float] = None
 
 
 class StatusResponse(BaseModel):
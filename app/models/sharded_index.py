@@ -0,0 +1,133 @@
+# FILE: app/models/sharded_index.py
+import faiss
+import numpy as np
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app.config import settings
+from app.models.faiss_manager import FaissManager
+from app.utils.persistence import save_faiss_index, load_faiss_index, save_index_config, load_index_config
+import logging
+from typing import List, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+
+def shard_path(path: str, shard: int) -> str:
+    return f"{path}.shard{shard}"
+
+
+class ShardedFaissManager(FaissManager):
+    """
+    Services partitioned by label across K FaissManager shards (label % K), each
+    with its own tuned index, overlay and exact vectors. Queries fan out to every
+    shard on a thread pool (FAISS releases the GIL while searching) and the
+    per-shard top-k are merged; upserts and deletes go to the owning shard only.
+    Categories stay in the single exact index inherited from FaissManager.
+
+    `index` is a read-only `faiss.IndexShards` view over the shard indexes, kept
+    for callers that only need the vector count.
+    """
+
+    def __init__(self, dim: int, shards: int, index_type: str = None, model_name: str = None):
+        super().__init__(dim, index_type, model_name)
+        self.n_shards = max(1, shards)
+        self.shards = [FaissManager(dim, self.index_type, model_name) for _ in range(self.n_shards)]
+        self.config = {"type": "sharded", "shards": self.n_shards}
+        self._pool = ThreadPoolExecutor(max_workers=self.n_shards, thread_name_prefix="faiss-shard")
+
+    def _link(self):
+        view = faiss.IndexShards(self.dim, False, False)
+        for shard in self.shards:
+            view.add_shard(shard.index)
+        self.index = view
+
+    def _route(self, int_ids: np.ndarray) -> List[np.ndarray]:
+        """Positions in `int_ids` owned by each shard."""
+        owner = np.mod(int_ids, self.n_shards)
+        return [np.flatnonzero(owner == shard) for shard in range(self.n_shards)]
+
+    def _build_services(self, int_ids: np.ndarray, embeddings: np.ndarray):
+        self.read_only = False
+        # Shards train and tune independently, so they build in parallel too.
+        list(self._pool.map(lambda shard, rows: shard._build_services(int_ids[rows], embeddings[rows]),
+                            self.shards, self._route(int_ids)))
+        self.config = {"type": "sharded", "shards": self.n_shards,
+                       "shard_types": [shard.config.get("type") for shard in self.shards]}
+        self._link()
+
+    def _add_services(self, int_ids: np.ndarray, embeddings: np.ndarray):
+        for shard, rows in zip(self.shards, self._route(int_ids)):
+            if len(rows):
+                shard._add_services(int_ids[rows], np.ascontiguousarray(embeddings[rows]))
+        self.index.syncWithSubIndexes()
+
+    def _remove_services(self, int_ids: np.ndarray):
+        for shard, rows in zip(self.shards, self._route(int_ids)):
+            if len(rows):
+                shard._remove_services(int_ids[rows])
+        self.index.syncWithSubIndexes()
+
+    def memory_usage(self) -> Dict[str, int]:
+        usage = {"categories": super().memory_usage()["categories"]}
+        for shard in self.shards:
+            for name, size in shard.memory_usage().items():
+                if name != "categories":
+                    usage[name] = usage.get(name, 0) + size
+        return usage
+
+    def search(self, query_embeddings: np.ndarray, k: int = 10, allowed: np.ndarray | None = None) -> tuple:
+        """Scatter-gather top-k: every shard returns its own top-k, re-ranked if quantized, then merged."""
+        n = len(query_embeddings)
+        if allowed is None:
+            allowed_by_shard = [None] * self.n_shards
+        else:
+            # Each shard sees only its own labels, so its filter selectivity is right.
+            allowed = np.asarray(allowed, dtype=np.int64)
+            allowed_by_shard = [allowed[rows] for rows in self._route(allowed)]
+
+        def search_shard(shard: FaissManager, shard_allowed: np.ndarray | None) -> tuple:
+            if shard.index is None or (shard_allowed is not None and not len(shard_allowed)):
+                return np.empty((n, 0), dtype=np.float32), np.empty((n, 0), dtype=np.int64)
+            return shard.search(query_embeddings, k, shard_allowed)
+
+        parts = list(self._pool.map(search_shard, self.shards, allowed_by_shard))
+        distances = np.hstack([part[0] for part in parts]).astype(np.float32, copy=False)
+        labels = np.hstack([part[1] for part in parts])
+        order = np.argsort(-distances, axis=1, kind="stable")[:, :k]
+        return np.take_along_axis(distances, order, axis=1), np.take_along_axis(labels, order, axis=1)
+
+    def save(self, path: str = settings.FAISS_INDEX_PATH) -> bool:
+        """Each shard is saved as an independent index at `<path>.shard<i>`; `path` itself holds the metadata."""
+        saved = all(self._pool.map(lambda i: self.shards[i].save(shard_path(path, i)), range(self.n_shards)))
+        self._link()
+        metadata = {"dim": self.dim, "model_name": self.model_name, "ntotal": int(self.index.ntotal),
+                    "saved_at": time.time(), "config": self.config}
+        return (saved and save_faiss_index(self.categories, f"{path}.categories")
+                and save_index_config(metadata, path))
+
+    def load(self, path: str = settings.FAISS_INDEX_PATH, mmap: bool = False) -> bool:
+        config = load_index_config(path).get("config") or {}
+        if config.get("type") != "sharded" or config.get("shards") != self.n_shards:
+            logger.warning(f"Index at {path} is not a {self.n_shards}-shard index.")
+            return False
+        categories = load_faiss_index(f"{path}.categories")
+        if categories is None or categories.d != self.dim:
+            return False
+        if not all(self._pool.map(lambda i: self.shards[i].load(shard_path(path, i), mmap=mmap),
+                                  range(self.n_shards))):
+            logger.warning(f"A shard of the index at {path} is missing or unreadable; it needs a rebuild.")
+            return False
+        self.categories = categories
+        self._category_labels = None
+        self.config = config
+        self.read_only = mmap
+        self._link()
+        return True
+
+
+def create_faiss_manager(dim: int, model_name: str = None, shards: int = None) -> FaissManager:
+    """A single FaissManager, or a ShardedFaissManager when more than one shard is asked for."""
+    shards = settings.INDEX_SHARDS if shards is None else shards
+    if shards > 1:
+        return ShardedFaissManager(dim, shards, model_name=model_name)
+    return FaissManager(dim, model_name=model_name)
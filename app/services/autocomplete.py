@@ -0,0 +1,152 @@
+# FILE: app/services/autocomplete.py
+import bisect
+import heapq
+import re
+from app.config import settings
+from typing import List, Dict, Any, Tuple
+
+_WORD_START = re.compile(r"\w+")
+_SEPARATOR = "\x00"
+_MAX_CHAR = "\U0010ffff"
+
+
+def _word_start_keys(name: str) -> List[str]:
+    """Every suffix of the lowercased name that starts at a word boundary."""
+    lowered = name.lower()
+    return list(dict.fromkeys(lowered[m.start():] for m in _WORD_START.finditer(lowered)))
+
+
+class AutocompleteIndex:
+    """
+    Word-start prefix index over item names.
+
+    Keys are kept in one sorted list of "<suffix>\\0<item_id>" strings, so a prefix
+    lookup is two bisects. Ranges larger than AUTOCOMPLETE_SCAN_LIMIT are served from
+    a per-prefix top-k list that is patched in place on every upsert/remove.
+
+    `suggest` tolerates an item removed while it runs: ids whose name or rank is
+    already gone are skipped rather than looked up.
+    """
+
+    def __init__(self, items: List[Dict[str, Any]] = None,
+                 scan_limit: int = settings.AUTOCOMPLETE_SCAN_LIMIT,
+                 cache_depth: int = settings.AUTOCOMPLETE_CACHE_DEPTH):
+        self.scan_limit = scan_limit
+        self.cache_depth = cache_depth
+        self._names: Dict[str, str] = {}
+        self._ranks: Dict[str, Tuple] = {}
+        self._top: Dict[str, List[str]] = {}
+        entries = []
+        for item in items or []:
+            if self._register(item):
+                entries.extend(self._entries(item['_id']))
+        entries.sort()
+        self._entries_sorted = entries
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    @staticmethod
+    def _rank_of(item: Dict[str, Any]) -> Tuple:
+        # Categories first, then by popularity, then alphabetically.
+        return (0 if item.get("isCategory") else 1,
+                -float(item.get("avgRating") or 0.0),
+                item.get("name", "").lower())
+
+    def _register(self, item: Dict[str, Any]) -> bool:
+        name = item.get("name")
+        if not name:
+            return False
+        self._names[item['_id']] = name
+        self._ranks[item['_id']] = self._rank_of(item)
+        return True
+
+    def _entries(self, item_id: str) -> List[str]:
+        return [f"{key}{_SEPARATOR}{item_id}" for key in _word_start_keys(self._names[item_id])]
+
+    def _range(self, prefix: str) -> Tuple[int, int]:
+        lo = bisect.bisect_left(self._entries_sorted, prefix)
+        hi = bisect.bisect_left(self._entries_sorted, prefix + _MAX_CHAR, lo)
+        return lo, hi
+
+    def _scan(self, lo: int, hi: int, depth: int) -> List[str]:
+        ranks = self._ranks
+        ranked = [(rank, item_id) for item_id in {entry.rsplit(_SEPARATOR, 1)[1]
+                                                  for entry in self._entries_sorted[lo:hi]}
+                  if (rank := ranks.get(item_id)) is not None]
+        return [item_id for _, item_id in heapq.nsmallest(depth, ranked)]
+
+    def _cached_prefixes(self, item_id: str) -> List[str]:
+        if not self._top:
+            return []
+        prefixes = set()
+        for key in _word_start_keys(self._names[item_id]):
+            prefixes.update(p for p in (key[:i] for i in range(len(key) + 1)) if p in self._top)
+        return list(prefixes)
+
+    def _patch_insert(self, prefix: str, item_id: str):
+        # Cached lists are truncated, so anything ranked below the tail is unknown territory.
+        ranked = self._top[prefix]
+        if ranked and self._ranks[item_id] > self._ranks[ranked[-1]]:
+            return
+        bisect.insort(ranked, item_id, key=self._ranks.__getitem__)
+        if len(ranked) > self.cache_depth:
+            ranked.pop()
+
+    def _patch_remove(self, prefix: str, item_id: str):
+        ranked = self._top[prefix]
+        if item_id in ranked:
+            ranked.remove(item_id)
+            if len(ranked) < self.cache_depth // 2:
+                del self._top[prefix]
+
+    def upsert(self, item: Dict[str, Any]):
+        item_id = item['_id']
+        if item_id in self._names:
+            if item.get("name") == self._names[item_id]:
+                prefixes = self._cached_prefixes(item_id)
+                for prefix in prefixes:
+                    self._patch_remove(prefix, item_id)
+                self._ranks[item_id] = self._rank_of(item)
+                for prefix in prefixes:
+                    if prefix in self._top:
+                        self._patch_insert(prefix, item_id)
+                return
+            self.remove(item_id)
+        if not self._register(item):
+            return
+        for entry in self._entries(item_id):
+            bisect.insort(self._entries_sorted, entry)
+        for prefix in self._cached_prefixes(item_id):
+            self._patch_insert(prefix, item_id)
+
+    def remove(self, item_id: str):
+        if item_id not in self._names:
+            return
+        for prefix in self._cached_prefixes(item_id):
+            self._patch_remove(prefix, item_id)
+        for entry in self._entries(item_id):
+            pos = bisect.bisect_left(self._entries_sorted, entry)
+            if pos < len(self._entries_sorted) and self._entries_sorted[pos] == entry:
+                del self._entries_sorted[pos]
+        del self._names[item_id]
+        del self._ranks[item_id]
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[str]:
+        prefix = prefix.lower().lstrip()
+        lo, hi = self._range(prefix)
+        if hi - lo <= self.scan_limit or limit > self.cache_depth:
+            ranked = self._scan(lo, hi, hi - lo)
+        else:
+            if prefix not in self._top:
+                self._top[prefix] = self._scan(lo, hi, self.cache_depth)
+            ranked = self._top[prefix]
+
+        suggestions = []
+        for item_id in list(ranked):
+            name = self._names.get(item_id)
+            if name is not None and name not in suggestions:
+                suggestions.append(name)
+                if len(suggestions) >= limit:
+                    break
+        return suggestions
@@ -3,7 +3,8 @@ from app.config import settings
 from app.utils.database import get_database
 import logging
 from bson import ObjectId
-from typing import Dict, Any, List
+from datetime import datetime
+from typing import Dict, Any, List, Set
 
 logger = logging.getLogger(__name__)
 
@@ -17,13 +18,9 @@ def serialize_mongo_doc(doc):
     return doc
 
 
-async def fetch_services_from_db() -> list:
-    database = get_database()
-    if database is None:
-        return []
-
-    services_collection = database[settings.COLLECTION_NAME]
-    pipeline = [
+def _services_pipeline(match: Dict[str, Any] | None = None) -> List[Dict[str, Any]]:
+    pipeline = [{"$match": match}] if match else []
+    pipeline += [
         {"$lookup": {
             "from": "categories", "localField": "categories",
             "foreignField": "_id", "as": "category_info"
@@ -34,7 +31,16 @@ async def fetch_services_from_db() -> list:
             "category": "$category_info", "updatedAt": 1
         }}
     ]
-    cursor = services_collection.aggregate(pipeline)
+    return pipeline
+
+
+async def fetch_services_from_db() -> list:
+    database = get_database()
+    if database is None:
+        return []
+
+    services_collection = database[settings.COLLECTION_NAME]
+    cursor = services_collection.aggregate(_services_pipeline())
     return [serialize_mongo_doc(doc) async for doc in cursor]
 
 
@@ -58,17 +64,36 @@ async def fetch_and_extract_items() -> list:
         return []
 
 
-async def fetch_one_service(service_id: str) -> Dict[str, Any] | None:
+async def fetch_many_services(service_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Fetches the given services in one aggregation, keyed by their string `_id`."""
+    db = get_database()
+    if db is None or not service_ids:
+        return {}
+    match = {"_id": {"$in": [ObjectId(service_id) for service_id in service_ids]}}
+    cursor = db[settings.COLLECTION_NAME].aggregate(_services_pipeline(match))
+    services = {}
+    async for doc in cursor:
+        doc = serialize_mongo_doc(doc)
+        # $unwind yields one row per category; keep the first, as fetch_one_service did.
+        services.setdefault(doc["_id"], doc)
+    return services
+
+
+async def fetch_service_ids_updated_since(since: datetime) -> List[str]:
     db = get_database()
     if db is None:
-        return None
-    pipeline = [
-        {"$match": {"_id": ObjectId(service_id)}},
-        {"$lookup": {"from": "categories", "localField": "categories",
-                     "foreignField": "_id", "as": "category_info"}},
-        {"$unwind": {"path": "$category_info", "preserveNullAndEmptyArrays": True}},
-        {"$project": {"_id": 1, "name": 1, "description": 1, "priceInfo": 1,
-                      "avgRating": 1, "category": "$category_info", "updatedAt": 1}}
-    ]
-    result = await db[settings.COLLECTION_NAME].aggregate(pipeline).to_list(1)
-    return serialize_mongo_doc(result[0]) if result else None
+        return []
+    cursor = db[settings.COLLECTION_NAME].find({"updatedAt": {"$gt": since}}, {"_id": 1})
+    return [str(doc["_id"]) async for doc in cursor]
+
+
+async def fetch_all_service_ids() -> Set[str]:
+    db = get_database()
+    if db is None:
+        return set()
+    cursor = db[settings.COLLECTION_NAME].find({}, {"_id": 1})
+    return {str(doc["_id"]) async for doc in cursor}
+
+
+async def fetch_one_service(service_id: str) -> Dict[str, Any] | None:
+    return (await fetch_many_services([service_id])).get(service_id)
@@ -1,19 +1,36 @@
 # FILE: app/services/encoder.py
-from sentence_transformers import SentenceTransformer
 import numpy as np
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
 import logging
 from app.config import settings
-from typing import List, Dict, Any
+from app.services.encoder_backends import encoder_id, load_backend_model, resolve_backend
+from app.utils.persistence import save_query_cache, load_query_cache
+from typing import TYPE_CHECKING, List, Dict, Any, Tuple
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
 
 logger = logging.getLogger(__name__)
 
+_model_loaded = threading.Event()
+
 
 @lru_cache(maxsize=1)
-def get_model(name: str = None) -> SentenceTransformer:
+def get_model(name: str = None) -> "SentenceTransformer":
     model_name = name or settings.MODEL_NAME
-    logger.info(f"Loading SentenceTransformer model: {model_name}")
-    return SentenceTransformer(model_name)
+    backend = resolve_backend(model_name)
+    logger.info(f"Loading SentenceTransformer model: {model_name} ({backend} backend)")
+    model = load_backend_model(backend, model_name)
+    _model_loaded.set()
+    return model
+
+
+def model_loaded() -> bool:
+    return _model_loaded.is_set()
 
 
 def normalize_embeddings(vectors: np.ndarray) -> np.ndarray:
@@ -21,10 +38,211 @@ def normalize_embeddings(vectors: np.ndarray) -> np.ndarray:
     return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms != 0)
 
 
-def encode_query(text: str) -> np.ndarray:
+def normalize_query(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+class QueryEmbeddingCache:
+    """
+    Bounded LRU of normalized query -> float32 embedding. Embeddings do not depend
+    on the catalog, so entries survive index changes and are snapshotted to disk.
+    """
+
+    def __init__(self, maxsize: int = settings.QUERY_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> np.ndarray | None:
+        with self._lock:
+            vector = self._data.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def put(self, key: str, vector: np.ndarray):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = vector
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits,
+                "misses": self.misses, "hit_ratio": self.hits / total if total else 0.0}
+
+    def save(self, path: str = settings.QUERY_CACHE_PATH, model_name: str = None):
+        with self._lock:
+            keys = list(self._data.keys())
+            vectors = np.stack(list(self._data.values())) if keys else np.empty((0, 0), dtype="float32")
+        save_query_cache(keys, vectors, model_name or encoder_id(), path)
+        logger.info(f"Saved {len(keys)} cached query embeddings to {path}.")
+
+    def load(self, path: str = settings.QUERY_CACHE_PATH, model_name: str = None) -> bool:
+        snapshot = load_query_cache(path)
+        if snapshot is None:
+            return False
+        keys, vectors, saved_model = snapshot
+        if saved_model != (model_name or encoder_id()):
+            logger.warning(
+                f"Ignoring query embedding cache built with model '{saved_model}'.")
+            return False
+        with self._lock:
+            # Keys are stored oldest-first, so replaying them restores LRU order.
+            for key, vector in zip(keys[-self.maxsize:], vectors[-self.maxsize:]):
+                self._data[key] = vector
+        logger.info(f"Loaded {len(keys)} cached query embeddings from {path}.")
+        return True
+
+
+query_embedding_cache = QueryEmbeddingCache()
+
+
+def _encode_texts(texts: List[str]) -> np.ndarray:
     model = get_model()
-    embedding = model.encode([text], convert_to_numpy=True)
-    return normalize_embeddings(embedding).astype("float32")
+    embeddings = model.encode(texts, convert_to_numpy=True)
+    return normalize_embeddings(embeddings).astype("float32")
+
+
+def _encode_and_cache(keys: List[str]) -> Dict[str, np.ndarray]:
+    unique_keys = list(dict.fromkeys(keys))
+    embeddings = _encode_texts(unique_keys)
+    encoded = {}
+    for i, key in enumerate(unique_keys):
+        encoded[key] = embeddings[i]
+        query_embedding_cache.put(key, embeddings[i])
+    return encoded
+
+
+def encode_queries(texts: List[str]) -> np.ndarray:
+    keys = [normalize_query(text) for text in texts]
+    vectors = [query_embedding_cache.get(key) for key in keys]
+    missing = [key for key, vector in zip(keys, vectors) if vector is None]
+    if missing:
+        encoded = _encode_and_cache(missing)
+        vectors = [encoded[key] if vector is None else vector
+                   for key, vector in zip(keys, vectors)]
+    return np.stack(vectors)
+
+
+def encode_query(text: str) -> np.ndarray:
+    return encode_queries([text])
+
+
+class BatchQueryEncoder:
+    """
+    Collects concurrent query encodes into time-bounded micro-batches and runs
+    one model.encode call per batch on a dedicated worker thread, keeping
+    inference off the event loop.
+    """
+
+    def __init__(self, max_batch_size: int = settings.QUERY_BATCH_MAX_SIZE,
+                 max_wait_ms: float = settings.QUERY_BATCH_MAX_WAIT_MS):
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="query-encoder")
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+
+    def start(self):
+        loop = asyncio.get_running_loop()
+        if self._worker is not None and not self._worker.done() and self._worker.get_loop() is loop:
+            return
+        self._queue = asyncio.Queue()
+        self._worker = loop.create_task(self._run())
+        logger.info(
+            f"Query encoder started (batch size {self.max_batch_size}, max wait {self.max_wait * 1000:.1f} ms).")
+
+    async def stop(self):
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+        self._queue = None
+
+    async def encode(self, text: str) -> np.ndarray:
+        key = normalize_query(text)
+        cached = query_embedding_cache.get(key)
+        if cached is not None:
+            return cached[np.newaxis, :]
+
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done():
+            self.start()
+        elif self._worker.get_loop() is not loop:
+            # Called from a foreign event loop (e.g. asyncio.run in a sync route):
+            # encode on the worker thread without joining the batch queue.
+            encoded = await loop.run_in_executor(self._executor, _encode_and_cache, [key])
+            return encoded[key][np.newaxis, :]
+        future = loop.create_future()
+        await self._queue.put((key, future))
+        return await future
+
+    async def warm_up(self):
+        """Loads the model and runs one encode on the worker thread, off the request path."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, _encode_texts, ["warm up"])
+
+    async def encode_many(self, texts: List[str]) -> np.ndarray:
+        """Encodes an explicit batch of queries with one model.encode call for the cache misses."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, encode_queries, texts)
+
+    async def _collect_batch(self) -> List[Tuple[str, asyncio.Future]]:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect_batch()
+            pending = [(key, fut) for key, fut in batch if not fut.cancelled()]
+            if not pending:
+                continue
+            keys = [key for key, _ in pending]
+            try:
+                encoded = await loop.run_in_executor(self._executor, _encode_and_cache, keys)
+            except Exception as e:
+                logger.error(f"Batch query encoding failed: {e}")
+                for _, fut in pending:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+            for key, fut in pending:
+                if not fut.done():
+                    fut.set_result(encoded[key][np.newaxis, :])
+
+
+query_encoder = BatchQueryEncoder()
 
 
 def create_blended_embeddings(items: List[Dict[str, Any]]) -> np.ndarray:
@@ -0,0 +1,172 @@
+# FILE: app/services/encoder_backends.py
+import argparse
+import json
+import os
+import re
+import numpy as np
+import logging
+from functools import lru_cache
+from app.config import settings
+from app.utils.item_columns import load_item_columns
+from app.utils.persistence import _ensure_dir, load_items
+from typing import TYPE_CHECKING, List, Dict, Any
+
+# sentence_transformers pulls in torch and transformers; it is imported only when a
+# model is actually loaded, so processes that never encode start fast.
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+logger = logging.getLogger(__name__)
+
+# "torch" is the full-precision PyTorch model; the ONNX backends are exported from it.
+BACKENDS = ("torch", "onnx", "onnx-int8")
+_ONNX_FILES = {"onnx": "onnx/model.onnx", "onnx-int8": "onnx/model_qint8.onnx"}
+
+
+def _export_path(model_name: str) -> str:
+    return os.path.join(settings.ENCODER_EXPORT_DIR, re.sub(r"[^\w.-]+", "--", model_name))
+
+
+def _report_path(backend: str, model_name: str) -> str:
+    return os.path.join(_export_path(model_name), f"parity-{backend}.json")
+
+
+def load_parity_report(backend: str, model_name: str) -> Dict[str, Any] | None:
+    path = _report_path(backend, model_name)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logger.error(f"Failed to read encoder parity report {path}: {e}")
+        return None
+
+
+@lru_cache(maxsize=8)
+def resolve_backend(model_name: str = None) -> str:
+    """
+    The configured ENCODER_BACKEND, or "torch" when it is unknown or (with
+    ENCODER_REQUIRE_PARITY) has no passing parity report for this model.
+    """
+    model_name = model_name or settings.MODEL_NAME
+    backend = settings.ENCODER_BACKEND
+    if backend == "torch":
+        return backend
+    if backend not in BACKENDS:
+        logger.warning(f"Unknown encoder backend '{backend}'; using torch.")
+        return "torch"
+    if settings.ENCODER_REQUIRE_PARITY:
+        report = load_parity_report(backend, model_name)
+        if not report or not report.get("passed"):
+            logger.warning(
+                f"Encoder backend '{backend}' has no passing parity report for {model_name}; using torch. "
+                f"Run `python -m app.services.encoder_backends {backend}` to check it.")
+            return "torch"
+    return backend
+
+
+def encoder_id(model_name: str = None) -> str:
+    """Identifies the vectors an encoder produces; caches of embeddings are keyed by it."""
+    model_name = model_name or settings.MODEL_NAME
+    backend = resolve_backend(model_name)
+    return model_name if backend == "torch" else f"{model_name}@{backend}"
+
+
+def export_backend(backend: str, model_name: str) -> str:
+    """Exports the locally cached model to ONNX (and its int8 dynamic quantization) once."""
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.backend import export_dynamic_quantized_onnx_model
+    path = _export_path(model_name)
+    if not os.path.exists(os.path.join(path, _ONNX_FILES["onnx"])):
+        logger.info(f"Exporting {model_name} to ONNX at {path}...")
+        model = SentenceTransformer(model_name, backend="onnx", model_kwargs={"export": True})
+        model.save_pretrained(path)
+    if backend == "onnx-int8" and not os.path.exists(os.path.join(path, _ONNX_FILES["onnx-int8"])):
+        logger.info(f"Quantizing the ONNX export of {model_name} to int8 ({settings.ENCODER_QUANTIZATION})...")
+        model = SentenceTransformer(path, backend="onnx", model_kwargs={"file_name": _ONNX_FILES["onnx"]})
+        export_dynamic_quantized_onnx_model(model, settings.ENCODER_QUANTIZATION, path, file_suffix="qint8")
+    return path
+
+
+def load_backend_model(backend: str, model_name: str) -> "SentenceTransformer":
+    from sentence_transformers import SentenceTransformer
+    if backend == "torch":
+        return SentenceTransformer(model_name)
+    path = export_backend(backend, model_name)
+    return SentenceTransformer(path, backend="onnx", model_kwargs={
+        "file_name": _ONNX_FILES[backend], "provider": "CPUExecutionProvider"})
+
+
+def _normalized(model: "SentenceTransformer", texts: List[str]) -> np.ndarray:
+    vectors = model.encode(texts, convert_to_numpy=True, show_progress_bar=False).astype("float32")
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms != 0)
+
+
+def _top_k(vectors: np.ndarray, k: int) -> np.ndarray:
+    similarities = vectors @ vectors.T
+    np.fill_diagonal(similarities, -np.inf)
+    return np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+
+
+def parity_check(candidate: "SentenceTransformer", reference: "SentenceTransformer",
+                 texts: List[str], k: int = settings.ENCODER_PARITY_K) -> Dict[str, Any]:
+    """
+    Compares a candidate encoder against the float reference on `texts`: cosine
+    agreement of each text's two embeddings, and recall@k of each text's nearest
+    neighbours among the others.
+    """
+    reference_vectors = _normalized(reference, texts)
+    candidate_vectors = _normalized(candidate, texts)
+    cosines = np.sum(reference_vectors * candidate_vectors, axis=1)
+
+    k = max(1, min(k, len(texts) - 1))
+    recall = 1.0
+    if len(texts) > 1:
+        expected, found = _top_k(reference_vectors, k), _top_k(candidate_vectors, k)
+        recall = float(np.mean([len(np.intersect1d(e, f)) / k for e, f in zip(expected, found)]))
+
+    report = {
+        "n_texts": len(texts), "k": k,
+        "mean_cosine": round(float(cosines.mean()), 6),
+        "min_cosine": round(float(cosines.min()), 6),
+        "recall_at_k": round(recall, 6),
+    }
+    report["passed"] = (report["mean_cosine"] >= settings.ENCODER_PARITY_MIN_COSINE
+                        and report["recall_at_k"] >= settings.ENCODER_PARITY_MIN_RECALL)
+    return report
+
+
+def _parity_texts(limit: int) -> List[str]:
+    columns = load_item_columns()
+    texts = []
+    for item in (columns.light_items() if columns is not None else load_items()):
+        texts.extend(t for t in (item.get("name"), item.get("description")) if isinstance(t, str) and t)
+        if len(texts) >= limit:
+            break
+    return texts[:limit] or list(settings.PREDEFINED_CATEGORIES)
+
+
+def run_parity_check(backend: str, model_name: str = None, texts: List[str] = None) -> Dict[str, Any]:
+    """Exports `backend`, checks it against the torch model and saves the report that enables it."""
+    model_name = model_name or settings.MODEL_NAME
+    texts = texts or _parity_texts(settings.ENCODER_PARITY_SAMPLE)
+    report = parity_check(load_backend_model(backend, model_name), load_backend_model("torch", model_name), texts)
+    report.update({"backend": backend, "model_name": model_name})
+
+    path = _report_path(backend, model_name)
+    _ensure_dir(path)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Encoder parity for {backend}: {report}")
+    return report
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Export an encoder backend and check it against the float model.")
+    parser.add_argument("backend", choices=[b for b in BACKENDS if b != "torch"])
+    parser.add_argument("--model", default=settings.MODEL_NAME)
+    args = parser.parse_args()
+    print(json.dumps(run_parity_check(args.backend, args.model), indent=2))
@@ -1,78 +1,289 @@
 # FILE: app/services/hybrid_search.py
 from app.config import settings
-from app.models.faiss_manager import FaissManager
-from app.services.encoder import encode_query
-from typing import List, Dict, Any
+from app.models.faiss_manager import FaissManager, id_to_int
+from app.models.filter_index import FilterIndex, SearchFilters
+from app.models.item_store import ItemStore
+from app.utils.item_columns import ItemColumns
+from app.utils.memory import deep_sizeof
+from app.utils.metrics import SEARCH_STAGE_SECONDS
+from app.utils.payloads import render_search_results, with_query
+from app.services.encoder import query_encoder
+from app.services.autocomplete import AutocompleteIndex
+from app.services.lexical import LexicalIndex
+from typing import List, Dict, Any, Tuple
+import asyncio
+import numpy as np
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Categories are returned on the first page of results only.
+MAX_CATEGORIES = 5
+_NO_LABELS = np.empty(0, dtype=np.int64)
+_NO_SCORES = np.empty(0, dtype=np.float32)
+
+
+def _no_hits(rows: int) -> Tuple[np.ndarray, np.ndarray]:
+    return np.empty((rows, 0), dtype=np.float32), np.empty((rows, 0), dtype=np.int64)
+
 
 class HybridSearchEngine:
-    def __init__(self, faiss_manager: FaissManager, items: List[Dict[str, Any]]):
+    def __init__(self, faiss_manager: FaissManager, items: List[Dict[str, Any]] | ItemColumns):
         self.fm = faiss_manager
-        self.items = items
-        self.item_map = {item['_id']: item for item in items}
+        if not isinstance(items, ItemColumns):
+            # Keep items as columns, not as the fetched dicts with a category copy in each.
+            items = ItemColumns.from_items(list({item['_id']: item for item in items}.values()))
+        self.store = ItemStore(items)
+        self.autocomplete = AutocompleteIndex(items.light_items())
+        self.lexical = LexicalIndex(items.light_items())
+        self.filters = FilterIndex(items)
+
+    @property
+    def items(self) -> List[Dict[str, Any]]:
+        return list(self.store)
 
     def update_item_in_map(self, item: Dict[str, Any]):
-        self.item_map[item['_id']] = item
-        self.items = list(self.item_map.values())
+        self.store.upsert(item)
+        self.autocomplete.upsert(item)
+        self.lexical.upsert(item)
+        self.filters.upsert(item)
 
     def remove_item_from_map(self, item_id: str):
-        if item_id in self.item_map:
-            del self.item_map[item_id]
-            self.items = list(self.item_map.values())
+        if self.store.remove(item_id):
+            self.autocomplete.remove(item_id)
+            self.lexical.remove(item_id)
+            self.filters.remove(item_id)
+
+    def memory_report(self) -> Dict[str, Any]:
+        """Approximate bytes held by each structure of the engine, in total and per item."""
+        structures = {f"item_store.{name}": size for name, size in self.store.memory_usage().items()}
+        structures.update({f"vectors.{name}": size for name, size in self.fm.memory_usage().items()})
+        structures.update({"lexical": deep_sizeof(self.lexical), "autocomplete": deep_sizeof(self.autocomplete),
+                           "filters": deep_sizeof(self.filters)})
+        n_items = len(self.store)
+        # Mapped files are page cache the kernel can reclaim, so they are reported apart.
+        resident = {name: size for name, size in structures.items() if not name.endswith("_mapped")}
+        total = sum(resident.values())
+        return {
+            "items": n_items, "total_bytes": total,
+            "bytes_per_item": round(total / n_items, 1) if n_items else None,
+            "mapped_bytes": sum(structures.values()) - total,
+            "structures": {name: {"bytes": size, "bytes_per_item": round(size / n_items, 1) if n_items else None}
+                           for name, size in structures.items()},
+        }
 
     def get_autocomplete_suggestions(self, prefix: str, limit: int = 10) -> List[str]:
-        prefix_lower = prefix.lower()
-        suggestions = {item.get("name") for item in self.items if item.get(
-            "name", "").lower().startswith(prefix_lower)}
-        return sorted(list(suggestions))[:limit]
+        return self.autocomplete.suggest(prefix, limit)
 
-    async def search(self, query: str) -> Dict[str, Any]:
-        if not self.items:
-            return {"categories": [], "services": []}
+    def render_results(self, results: Dict[str, Any],
+                       limit: int | None = None, category_limit: int | None = None) -> bytes:
+        """
+        Serializes search results from the store's pre-rendered item fragments, up to
+        but excluding the query; `with_query` completes the body. Queries that
+        normalize alike share these bytes.
+        """
+        with SEARCH_STAGE_SECONDS.time(stage="serialization"):
+            return render_search_results(results["categories"][:category_limit],
+                                         results["services"][:limit], self.store.fragment)
+
+    def render(self, query: str, results: Dict[str, Any],
+               limit: int | None = None, category_limit: int | None = None) -> bytes:
+        """Serializes search results to response bytes."""
+        return with_query(query, self.render_results(results, limit, category_limit))
+
+    def _lexical_ids(self, query: str) -> List[str]:
+        if not (settings.LEXICAL_FUSION or settings.LEXICAL_FAST_PATH):
+            return []
+        return [item_id for item_id, _ in self.lexical.search(query, settings.LEXICAL_CANDIDATES)]
+
+    def _exact_ids(self, query: str) -> List[str]:
+        return self.lexical.exact_matches(query) if settings.LEXICAL_FAST_PATH else []
+
+    @staticmethod
+    def _as_labels(item_ids: List[str]) -> np.ndarray:
+        return np.fromiter((id_to_int(item_id) for item_id in item_ids), dtype=np.int64, count=len(item_ids))
 
-        query_embedding = encode_query(query)
+    def _lexical_candidates(self, query: str, allowed: np.ndarray | None) -> Tuple[np.ndarray, np.ndarray]:
+        """Labels of exact name matches and of BM25 hits, in rank order, restricted to `allowed`."""
+        exact = self._as_labels(self._exact_ids(query))
+        lexical = self._as_labels(self._lexical_ids(query))
+        if allowed is not None:
+            exact, lexical = exact[np.isin(exact, allowed)], lexical[np.isin(lexical, allowed)]
+        return exact, lexical
 
-        num_candidates = min(len(self.items), 200)
-        distances, indices = self.fm.search(query_embedding, k=num_candidates)
+    def _split_categories(self, labels: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        is_category = np.isin(labels, self.fm.category_labels())
+        return labels[is_category], labels[~is_category]
 
-        ranked_results = self._compute_scores(
-            indices[0].tolist(), distances[0].tolist())
-        top_categories, top_services = self._separate_results(ranked_results)
+    async def search(self, query: str, filters: SearchFilters | None = None,
+                     offset: int = 0, limit: int = 50) -> Dict[str, Any]:
+        if len(self.store) == 0:
+            return {"categories": [], "services": []}
+        allowed = self.filters.allowed(filters)
+        if allowed is not None and len(allowed) == 0:
+            return {"categories": [], "services": []}
 
-        return {"categories": top_categories, "services": top_services}
+        # BM25 scoring is NumPy work that releases the GIL; keep it off the event loop.
+        exact, lexical = await asyncio.to_thread(self._lexical_candidates, query, allowed)
+        if len(exact):
+            # Navigational query: the lexical ranking is decisive, skip the model entirely.
+            return self._results(_no_hits(1), _no_hits(1), [np.concatenate([exact, lexical])], offset, limit)[0]
 
-    def _separate_results(self, final_ranked_list):
-        top_categories, top_services, seen_ids = [], [], set()
-        for result in final_ranked_list:
-            if len(top_categories) >= 5 and len(top_services) >= 50:
-                break
-            item = result['item']
-            item_id = item.get('_id')
-            if item_id in seen_ids:
-                continue
-            seen_ids.add(item_id)
-            if item.get('isCategory') and len(top_categories) < 5:
-                top_categories.append(result)
-            elif not item.get('isCategory') and len(top_services) < 50:
-                top_services.append(result)
-        return top_categories, top_services
+        with SEARCH_STAGE_SECONDS.time(stage="encode"):
+            query_embedding = await query_encoder.encode(query)
 
-    def _compute_scores(self, indices: List[int], distances: List[float]) -> List[Dict[str, Any]]:
-        results = []
-        for score, idx in zip(distances, indices):
-            if idx == -1 or idx >= len(self.items):
-                continue
+        # Filters are applied inside the index search, so the depth only has to cover
+        # the requested page, never more than the allowed set.
+        pool = len(self.store) if allowed is None else len(allowed)
+        num_candidates = min(pool, max(200, offset + limit + 5))
+        with SEARCH_STAGE_SECONDS.time(stage="faiss"):
+            distances, labels = self.fm.search(query_embedding, k=num_candidates, allowed=allowed)
+            category_hits = _no_hits(1)
+            if offset == 0:
+                category_hits = self.fm.search_categories(query_embedding, MAX_CATEGORIES, allowed)
 
-            item_object = self.items[idx]
-            final_score = float(score)
+        return self._results((distances, labels), category_hits,
+                             [lexical if settings.LEXICAL_FUSION else _NO_LABELS], offset, limit)[0]
 
-            if item_object.get("isCategory"):
-                final_score += settings.CATEGORY_BOOST
+    async def search_batch(self, queries: List[str]) -> List[Dict[str, Any]]:
+        """
+        Searches many queries with one encode call and one FAISS search over the
+        stacked query matrix; the dense hits of the whole batch are ranked as a matrix.
+        """
+        if len(self.store) == 0:
+            return [{"categories": [], "services": []} for _ in queries]
 
-            results.append({"item": item_object, "score": final_score})
+        results: List[Dict[str, Any] | None] = [None] * len(queries)
+        exact_positions, exact_lexical, dense_positions, dense_lexical = [], [], [], []
+        candidates = await asyncio.to_thread(lambda: [self._lexical_candidates(query, None) for query in queries])
+        for pos, (exact, lexical) in enumerate(candidates):
+            if len(exact):
+                exact_positions.append(pos)
+                exact_lexical.append(np.concatenate([exact, lexical]))
+            else:
+                dense_positions.append(pos)
+                dense_lexical.append(lexical if settings.LEXICAL_FUSION else _NO_LABELS)
 
-        results.sort(key=lambda x: x['score'], reverse=True)
+        if exact_positions:
+            no_hits = _no_hits(len(exact_positions))
+            for pos, result in zip(exact_positions, self._results(no_hits, no_hits, exact_lexical)):
+                results[pos] = result
+        if dense_positions:
+            query_embeddings = await query_encoder.encode_many([queries[pos] for pos in dense_positions])
+            num_candidates = min(len(self.store), 200)
+            service_hits = self.fm.search(query_embeddings, k=num_candidates)
+            category_hits = self.fm.search_categories(query_embeddings, MAX_CATEGORIES)
+            for pos, result in zip(dense_positions, self._results(service_hits, category_hits, dense_lexical)):
+                results[pos] = result
         return results
+
+    def _results(self, service_hits: Tuple[np.ndarray, np.ndarray], category_hits: Tuple[np.ndarray, np.ndarray],
+                 lexical: List[np.ndarray], offset: int = 0, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Ranks the service and category hits (FAISS score and label matrices, one row
+        per query), each row fused with its lexical labels when there are any. Only
+        the returned pages are turned into result dicts.
+        """
+        # Categories are only shown on the first page.
+        n_categories = MAX_CATEGORIES if offset == 0 else 0
+        with SEARCH_STAGE_SECONDS.time(stage="scoring"):
+            lexical_categories, lexical_services = zip(*map(self._split_categories, lexical))
+            category_scores, category_labels = category_hits
+            categories = self._rank_rows(category_labels, category_scores + settings.CATEGORY_BOOST,
+                                         lexical_categories, n_categories)
+            services = self._rank_rows(service_hits[1], service_hits[0], lexical_services, offset + limit)
+        with SEARCH_STAGE_SECONDS.time(stage="separation"):
+            return [{"categories": self._materialize(*row_categories),
+                     "services": self._materialize(row_services[0][offset:], row_services[1][offset:])}
+                    for row_categories, row_services in zip(categories, services)]
+
+    @staticmethod
+    def _top(scores: np.ndarray, count: int) -> np.ndarray:
+        """Positions of the `count` highest scores in each row, best first; ties keep position order."""
+        width = scores.shape[-1]
+        if count < width:
+            candidates = np.argpartition(-scores, count - 1, axis=-1)[..., :count]
+        else:
+            candidates = np.broadcast_to(np.arange(width), scores.shape)
+        order = np.lexsort((candidates, -np.take_along_axis(scores, candidates, axis=-1)), axis=-1)
+        return np.take_along_axis(candidates, order, axis=-1)
+
+    def _rank(self, labels: np.ndarray, scores: np.ndarray, lexical: np.ndarray,
+              count: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Top `count` store slots and scores for one FAISS row."""
+        return self._rank_rows(labels[None], np.asarray(scores)[None], [lexical], count)[0]
+
+    def _rank_rows(self, labels: np.ndarray, scores: np.ndarray, lexical: List[np.ndarray],
+                   count: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Top `count` store slots and scores for each row of FAISS hits. Unknown labels
+        drop out and duplicates keep their best hit. Rows without lexical labels are
+        cut with one row-wise partition; the others score each slot by the sum of its
+        reciprocal ranks (RRF) in the dense and lexical rankings.
+        """
+        if count <= 0:
+            return [(_NO_LABELS, _NO_SCORES)] * len(lexical)
+        slots, scores = self._best_per_row(labels, scores)
+        top = self._top(scores, count)
+        ranked = []
+        for row, row_lexical in enumerate(lexical):
+            if len(row_lexical):
+                keep = slots[row] >= 0
+                ranked.append(self._fuse(slots[row][keep], scores[row][keep], row_lexical, count))
+            else:
+                row_top = top[row][np.isfinite(scores[row, top[row]])]
+                ranked.append((slots[row, row_top], scores[row, row_top]))
+        return ranked
+
+    def _best_per_row(self, labels: np.ndarray, scores: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Store slots and scores for a matrix of FAISS hits, resolved in one pass. Unknown
+        labels and non-finite scores become slot -1 with score -inf; a slot repeated
+        within a row keeps its best score at its first position and is -1 elsewhere.
+        """
+        shape = labels.shape
+        slots = self.store.resolve(labels.ravel())
+        scores = np.asarray(scores, dtype=np.float32).ravel()
+        valid = np.flatnonzero((slots >= 0) & np.isfinite(scores))
+        best_slots = np.full(len(slots), -1, dtype=np.int64)
+        best_scores = np.full(len(slots), -np.inf, dtype=np.float32)
+        if len(valid):
+            # One key per (row, slot), so duplicates only collapse within a row.
+            keys = valid // shape[1] * (int(slots[valid].max()) + 1) + slots[valid]
+            _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+            best = np.full(len(first), -np.inf, dtype=np.float32)
+            np.maximum.at(best, inverse, scores[valid])
+            best_slots[valid[first]] = slots[valid[first]]
+            best_scores[valid[first]] = best
+        return best_slots.reshape(shape), best_scores.reshape(shape)
+
+    def _fuse(self, slots: np.ndarray, scores: np.ndarray, lexical: np.ndarray,
+              count: int) -> Tuple[np.ndarray, np.ndarray]:
+        """RRF of one row's dense hits, in position order, with its lexical labels."""
+        # RRF needs every dense slot's rank, not only the top `count`.
+        order = self._top(scores, len(scores))
+        slots = slots[order]
+        lexical_slots = self.store.resolve(lexical)
+        lexical_slots, _ = self._first_occurrences(lexical_slots[lexical_slots >= 0])
+        ranked = np.concatenate([slots, lexical_slots])
+        reciprocal = np.concatenate([1.0 / (settings.RRF_K + np.arange(1, len(slots) + 1)),
+                                     1.0 / (settings.RRF_K + np.arange(1, len(lexical_slots) + 1))])
+        # Slots are keyed by their first appearance, so ties keep dense-then-lexical order.
+        unique_slots, first, inverse = np.unique(ranked, return_index=True, return_inverse=True)
+        by_appearance = np.argsort(first, kind="stable")
+        position = np.empty_like(by_appearance)
+        position[by_appearance] = np.arange(len(by_appearance))
+        slots = unique_slots[by_appearance]
+        scores = np.bincount(position[inverse], weights=reciprocal, minlength=len(slots))
+        top = self._top(scores, count)
+        return slots[top], scores[top]
+
+    @staticmethod
+    def _first_occurrences(slots: np.ndarray, scores: np.ndarray | None = None) -> Tuple[np.ndarray, np.ndarray]:
+        _, first = np.unique(slots, return_index=True)
+        first.sort()
+        return slots[first], (None if scores is None else scores[first])
+
+    def _materialize(self, slots: np.ndarray, scores: np.ndarray) -> List[Dict[str, Any]]:
+        return [{"item": item, "score": float(score)}
+                for item, score in zip(self.store.at(slots), scores.tolist())]
@@ -0,0 +1,128 @@
+# FILE: app/services/ingestion.py
+import asyncio
+import logging
+import time
+from app.config import settings
+from app.utils.metrics import INGESTION_LAG_SECONDS
+from typing import Any, Awaitable, Callable, Dict, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ChangeIngestor:
+    """
+    Buffers change-stream events for up to `window_ms` or `max_batch` distinct ids
+    and hands each deduplicated batch to `apply_batch` as {id: operationType}. Only
+    the last event per id is kept, since the batch re-fetches current document state.
+
+    Pending ids stay ordered by their latest event, so the resume token of the newest
+    event in a batch is safe to persist once that batch is applied: any earlier event
+    for an id still pending reappears later in the stream.
+
+    A batch that fails to apply goes back to the front of the pending ids without
+    its tokens and is retried with exponential backoff. Until it has been applied,
+    no batch passes on a resume token, so a restart resumes from before the failure.
+
+    Each pending id also keeps when its oldest unapplied event arrived; a batch's
+    ingestion lag is measured from the oldest of those.
+    """
+
+    def __init__(self, apply_batch: Callable[[Dict[str, str], Any], Awaitable[None]],
+                 window_ms: float = settings.INGEST_BATCH_WINDOW_MS,
+                 max_batch: int = settings.INGEST_BATCH_MAX_SIZE,
+                 retry_base_ms: float = settings.INGEST_RETRY_BASE_MS,
+                 retry_max_seconds: float = settings.INGEST_RETRY_MAX_SECONDS):
+        self.apply_batch = apply_batch
+        self.window = max(0.0, window_ms) / 1000.0
+        self.max_batch = max(1, max_batch)
+        self.retry_base = max(0.0, retry_base_ms) / 1000.0
+        self.retry_max = max(0.0, retry_max_seconds)
+        self._pending: Dict[str, Tuple[str, Any, float]] = {}
+        # Ids whose failed batch hasn't been applied yet, and consecutive failures.
+        self._unapplied: Set[str] = set()
+        self._failures = 0
+        self._has_pending = asyncio.Event()
+        self._full = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        self._has_pending = asyncio.Event()
+        self._full = asyncio.Event()
+        if self._pending:
+            self._has_pending.set()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, flush: bool = True):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Drains what it can; ids of a failed batch stay pending and their tokens unpersisted.
+        while flush and self._pending and await self._flush():
+            pass
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def submit(self, doc_id: str, operation_type: str, resume_token: Any = None):
+        previous = self._pending.pop(doc_id, None)
+        received_at = previous[2] if previous else time.monotonic()
+        self._pending[doc_id] = (operation_type, resume_token, received_at)
+        self._has_pending.set()
+        if len(self._pending) >= self.max_batch:
+            self._full.set()
+
+    async def _flush(self) -> bool:
+        batch_ids = list(self._pending)[:self.max_batch]
+        events = [self._pending.pop(doc_id) for doc_id in batch_ids]
+        changes = {doc_id: op for doc_id, (op, _, _) in zip(batch_ids, events)}
+        resume_token = next((token for _, token, _ in reversed(events) if token is not None), None)
+        if self._unapplied - set(batch_ids):
+            # An earlier failed batch is still pending; a newer token would skip past it.
+            resume_token = None
+        oldest = min((received_at for _, _, received_at in events), default=time.monotonic())
+        if len(self._pending) < self.max_batch:
+            self._full.clear()
+        if not self._pending:
+            self._has_pending.clear()
+        try:
+            await self.apply_batch(changes, resume_token)
+        except Exception:
+            self._failures += 1
+            logger.exception(
+                f"Failed to apply change batch of {len(changes)} ids (attempt {self._failures}); will retry.")
+            self._requeue(batch_ids, events)
+            return False
+        self._failures = 0
+        self._unapplied.difference_update(batch_ids)
+        INGESTION_LAG_SECONDS.observe(time.monotonic() - oldest)
+        return True
+
+    def _requeue(self, batch_ids, events):
+        restored = {}
+        for doc_id, (op, _, received_at) in zip(batch_ids, events):
+            # An event that arrived while the batch was applying supersedes the failed one.
+            newer = self._pending.pop(doc_id, None)
+            restored[doc_id] = (newer[0], newer[1], received_at) if newer else (op, None, received_at)
+        self._pending = {**restored, **self._pending}
+        self._unapplied.update(batch_ids)
+        self._has_pending.set()
+        if len(self._pending) >= self.max_batch:
+            self._full.set()
+
+    def _backoff(self) -> float:
+        return min(self.retry_max, self.retry_base * 2 ** (self._failures - 1))
+
+    async def _run(self):
+        while True:
+            await self._has_pending.wait()
+            try:
+                await asyncio.wait_for(self._full.wait(), timeout=self.window)
+            except asyncio.TimeoutError:
+                pass
+            if not await self._flush():
+                await asyncio.sleep(self._backoff())
@@ -0,0 +1,194 @@
+# FILE: app/services/lexical.py
+import math
+import re
+import numpy as np
+from collections import Counter
+from app.config import settings
+from typing import List, Dict, Any, Set, Tuple
+
+_TOKEN = re.compile(r"\w+")
+
+# Per-field term-frequency weights (a simple BM25F): a hit in the name counts most.
+_FIELD_WEIGHTS = (("name", 3.0), ("category", 2.0), ("description", 1.0))
+
+
+def tokenize(text: str | None) -> List[str]:
+    return _TOKEN.findall(text.lower()) if text else []
+
+
+def _fields(item: Dict[str, Any]) -> Dict[str, str | None]:
+    category = None if item.get("isCategory") else (item.get("category") or {}).get("name")
+    return {"name": item.get("name"), "category": category, "description": item.get("description")}
+
+
+def _grow(array: np.ndarray, size: int) -> np.ndarray:
+    if size <= len(array):
+        return array
+    grown = np.zeros(max(size, 2 * len(array), 16), dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class _Posting:
+    """The (slot, weighted tf) pairs of one term, in parallel arrays with spare capacity."""
+
+    __slots__ = ("slots", "tfs", "size")
+
+    def __init__(self):
+        self.slots = np.empty(4, dtype=np.int32)
+        self.tfs = np.empty(4, dtype=np.float32)
+        self.size = 0
+
+    def add(self, slot: int, tf: float):
+        if self.size == len(self.slots):
+            self.slots = _grow(self.slots, self.size + 1)
+            self.tfs = _grow(self.tfs, self.size + 1)
+        self.slots[self.size] = slot
+        self.tfs[self.size] = tf
+        self.size += 1
+
+    def discard(self, slot: int):
+        positions = np.flatnonzero(self.slots[:self.size] == slot)
+        if not len(positions):
+            return
+        last = self.size - 1
+        self.slots[positions[0]] = self.slots[last]
+        self.tfs[positions[0]] = self.tfs[last]
+        self.size = last
+
+
+class LexicalIndex:
+    """
+    In-memory BM25 inverted index over item name, category name and description.
+
+    Items are numbered with integer slots, and postings map term -> (slot, weighted tf)
+    arrays, so a query is scored with a few vectorized passes over its terms' postings.
+    Each item's own terms are kept so an upsert or remove only touches the postings
+    of the terms it contains. Terms in more than `max_df` of the items only add to
+    the scores of items a rarer query term already matched, so stopword-like terms
+    never pull their whole posting into the candidates. Normalized names are indexed
+    separately for exact navigational hits.
+    """
+
+    def __init__(self, items: List[Dict[str, Any]] = None,
+                 k1: float = settings.BM25_K1, b: float = settings.BM25_B,
+                 max_df: float = settings.LEXICAL_MAX_DF):
+        self.k1 = k1
+        self.b = b
+        self.max_df = max_df
+        self._postings: Dict[str, _Posting] = {}
+        self._terms: Dict[str, Tuple[str, ...]] = {}
+        self._slots: Dict[str, int] = {}
+        self._ids: List[str | None] = []
+        self._free: List[int] = []
+        self._lengths = np.zeros(0, dtype=np.float32)
+        self._total_length = 0.0
+        self._names: Dict[str, Set[str]] = {}
+        self._name_keys: Dict[str, str] = {}
+        for item in items or []:
+            self.upsert(item)
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def _allocate(self, item_id: str) -> int:
+        if self._free:
+            slot = self._free.pop()
+            self._ids[slot] = item_id
+        else:
+            slot = len(self._ids)
+            self._ids.append(item_id)
+            self._lengths = _grow(self._lengths, slot + 1)
+        self._slots[item_id] = slot
+        return slot
+
+    def upsert(self, item: Dict[str, Any]):
+        item_id = item['_id']
+        self.remove(item_id)
+
+        terms: Counter = Counter()
+        for field, weight in _FIELD_WEIGHTS:
+            for token in tokenize(_fields(item)[field]):
+                terms[token] += weight
+        if not terms:
+            return
+        # The slot's length is set before it appears in any posting, so a concurrent
+        # search that sees the posting also sees a length array covering it.
+        slot = self._allocate(item_id)
+        length = sum(terms.values())
+        self._lengths[slot] = length
+        self._total_length += length
+        self._terms[item_id] = tuple(terms)
+        for term, tf in terms.items():
+            posting = self._postings.get(term)
+            if posting is None:
+                posting = self._postings[term] = _Posting()
+            posting.add(slot, tf)
+
+        name_key = " ".join(tokenize(item.get("name")))
+        if name_key:
+            self._names.setdefault(name_key, set()).add(item_id)
+            self._name_keys[item_id] = name_key
+
+    def remove(self, item_id: str):
+        terms = self._terms.pop(item_id, None)
+        if terms is None:
+            return
+        slot = self._slots.pop(item_id)
+        for term in terms:
+            posting = self._postings[term]
+            posting.discard(slot)
+            if not posting.size:
+                del self._postings[term]
+        self._total_length -= float(self._lengths[slot])
+        self._lengths[slot] = 0.0
+        self._ids[slot] = None
+        self._free.append(slot)
+        name_key = self._name_keys.pop(item_id, None)
+        if name_key is not None:
+            self._names[name_key].discard(item_id)
+            if not self._names[name_key]:
+                del self._names[name_key]
+
+    def exact_matches(self, query: str) -> List[str]:
+        """Ids of items whose whole name equals the query, ignoring case and punctuation."""
+        return sorted(self._names.get(" ".join(tokenize(query)), ()))
+
+    def _query_postings(self, query: str) -> List[Tuple[np.ndarray, np.ndarray]]:
+        postings = []
+        for term in set(tokenize(query)):
+            posting = self._postings.get(term)
+            if posting is not None:
+                size = posting.size
+                postings.append((posting.slots[:size], posting.tfs[:size]))
+        # Rarest first, so common terms see which items the rare ones matched.
+        return sorted(postings, key=lambda posting: len(posting[0]))
+
+    def search(self, query: str, limit: int = 200) -> List[Tuple[str, float]]:
+        n = len(self._terms)
+        if not n:
+            return []
+        postings = self._query_postings(query)
+        if not postings:
+            return []
+        lengths = self._lengths
+        avg_length = max(self._total_length / n, 1e-9)
+        scores = np.zeros(len(lengths), dtype=np.float32)
+        restrict = len(postings[0][0]) <= self.max_df * n
+        for slots, tfs in postings:
+            df = len(slots)
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            if restrict and df > self.max_df * n:
+                matched = scores[slots] > 0
+                slots, tfs = slots[matched], tfs[matched]
+            norm = self.k1 * (1 - self.b + self.b * lengths[slots] / avg_length)
+            # Slots are unique within a posting, so a fancy-indexed add is exact.
+            scores[slots] += idf * tfs * (self.k1 + 1) / (tfs + norm)
+
+        hits = np.flatnonzero(scores)
+        if len(hits) > limit:
+            hits = hits[np.argpartition(-scores[hits], limit - 1)[:limit]]
+        hits = hits[np.lexsort((hits, -scores[hits]))]
+        ids = self._ids
+        return [(ids[slot], float(scores[slot])) for slot in hits.tolist()
+                if slot < len(ids) and ids[slot] is not None]
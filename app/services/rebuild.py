@@ -0,0 +1,89 @@
+# FILE: app/services/rebuild.py
+import time
+import uuid
+import numpy as np
+import logging
+from app.config import settings
+from app.models.embedding_store import EmbeddingStore
+from app.models.sharded_index import create_faiss_manager
+from app.services.encoder import create_blended_embeddings
+from app.services.encoder_backends import encoder_id
+from app.services.hybrid_search import HybridSearchEngine
+from typing import List, Dict, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class RebuildJob:
+    """Progress record for one full rebuild, exposed through /refresh."""
+
+    def __init__(self):
+        self.job_id = uuid.uuid4().hex
+        self.status = "queued"
+        self.stage = "queued"
+        self.progress = 0.0
+        self.n_items = 0
+        self.n_reused_embeddings = 0
+        self.n_computed_embeddings = 0
+        self.error: str | None = None
+        self.started_at = time.time()
+        self.finished_at: float | None = None
+
+    def advance(self, stage: str, progress: float):
+        self.status = "running"
+        self.stage = stage
+        self.progress = round(min(1.0, max(self.progress, progress)), 4)
+
+    def finish(self, error: str | None = None):
+        self.status = "failed" if error else "succeeded"
+        self.stage = "failed" if error else "done"
+        self.error = error
+        if not error:
+            self.progress = 1.0
+        self.finished_at = time.time()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id, "status": self.status, "stage": self.stage,
+            "progress": self.progress, "n_items": self.n_items,
+            "n_reused_embeddings": self.n_reused_embeddings,
+            "n_computed_embeddings": self.n_computed_embeddings,
+            "error": self.error, "started_at": self.started_at, "finished_at": self.finished_at,
+        }
+
+
+def build_engine(items: List[Dict[str, Any]], dim: int, embedding_store: EmbeddingStore,
+                 job: RebuildJob) -> Tuple[HybridSearchEngine, Dict[str, int]]:
+    """
+    Builds a complete, independent engine (index, item store, autocomplete) for
+    `items`. Blocking; meant to run on a worker thread while the live engine keeps
+    serving, after which the caller swaps the reference.
+    """
+    job.n_items = len(items)
+    faiss_manager = create_faiss_manager(dim, model_name=encoder_id())
+    if not items:
+        faiss_manager.build_index([], None)
+        return HybridSearchEngine(faiss_manager, []), {"reused": 0, "computed": 0}
+
+    def encode_in_chunks(to_encode: List[Dict[str, Any]]) -> np.ndarray:
+        chunk = max(1, settings.REBUILD_ENCODE_CHUNK)
+        parts = []
+        for start in range(0, len(to_encode), chunk):
+            parts.append(create_blended_embeddings(to_encode[start:start + chunk]))
+            job.advance("embedding", 0.1 + 0.6 * min(1.0, (start + chunk) / len(to_encode)))
+        return np.vstack(parts)
+
+    job.advance("embedding", 0.1)
+    embeddings, stats = embedding_store.embed(items, encode_in_chunks)
+    job.n_reused_embeddings = stats["reused"]
+    job.n_computed_embeddings = stats["computed"]
+
+    job.advance("indexing", 0.75)
+    faiss_manager.build_index(items, embeddings)
+    job.advance("indexing", 0.85)
+    engine = HybridSearchEngine(faiss_manager, items)
+    return engine, stats
@@ -0,0 +1,191 @@
+# FILE: app/utils/delta_log.py
+import asyncio
+import base64
+import json
+import os
+import time
+import numpy as np
+import logging
+from app.config import settings
+from app.utils.persistence import CustomJSONEncoder, _ensure_dir
+from typing import Dict, Any, Awaitable, Callable, Iterator, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class DeltaLog:
+    """
+    Append-only JSON-lines log of real-time upserts and deletes applied since the
+    last full snapshot. Each upsert carries the item and its embedding, so replay
+    never needs the model. After each applied batch the writer appends a generation
+    marker, read back as ("generation", <generation>, None, None), which tells
+    followers the response cache generation of the state they have replicated.
+    """
+
+    def __init__(self, path: str = settings.DELTA_LOG_PATH):
+        self.path = path
+        self.pending = 0
+        self._file = None
+
+    def _append(self, record: Dict[str, Any]):
+        if self._file is None:
+            _ensure_dir(self.path)
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps(record, ensure_ascii=False, cls=CustomJSONEncoder) + "\n")
+        self._file.flush()
+        if record["op"] != "generation":
+            self.pending += 1
+
+    def append_upsert(self, item: Dict[str, Any], vector: np.ndarray):
+        vector_b64 = base64.b64encode(np.asarray(vector, dtype="float32").tobytes()).decode("ascii")
+        self._append({"op": "upsert", "id": item['_id'], "item": item, "vector": vector_b64})
+
+    def append_delete(self, item_id: str):
+        self._append({"op": "delete", "id": item_id})
+
+    def append_generation(self, generation: int | None):
+        self._append({"op": "generation", "generation": generation})
+
+    @staticmethod
+    def _decode(record: Dict[str, Any]) -> Tuple[str, str, Dict[str, Any] | None, np.ndarray | None]:
+        if record["op"] == "upsert":
+            vector = np.frombuffer(base64.b64decode(record["vector"]), dtype="float32")
+            return "upsert", record["id"], record["item"], vector
+        if record["op"] == "generation":
+            return "generation", record["generation"], None, None
+        return "delete", record["id"], None, None
+
+    def replay(self) -> Iterator[Tuple[str, str, Dict[str, Any] | None, np.ndarray | None]]:
+        """
+        Yields (op, id, item, vector) in log order, stopping at a torn or corrupt record.
+        That record and anything after it are cut off the file once replay reaches it,
+        so the next append starts on a clean line instead of extending the torn one.
+        """
+        if not os.path.exists(self.path):
+            return
+        good_end = 0
+        with open(self.path, "rb") as f:
+            for line_no, line in enumerate(f, start=1):
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("record has no line terminator")
+                    record = json.loads(line)
+                except ValueError as e:
+                    logger.warning(
+                        f"Stopping delta log replay at corrupt record on line {line_no}: {e}")
+                    break
+                good_end += len(line)
+                self.pending += record["op"] != "generation"
+                yield self._decode(record)
+        if good_end < os.path.getsize(self.path):
+            self.close()
+            logger.warning(
+                f"Truncating delta log {self.path} to its last complete record ({good_end} bytes).")
+            os.truncate(self.path, good_end)
+
+    def read_from(self, position: Tuple[int, int] | None) -> Tuple[List[Tuple], Tuple[int, int] | None]:
+        """
+        Tails the log for read-only followers. `position` is the (inode, offset) returned
+        by the previous call; a replaced or truncated file is read from the start.
+        Only complete lines are consumed. A complete line that doesn't decode (a torn
+        write the writer appended past) is skipped and read back as
+        ("corrupt", None, None, None), so the position still moves beyond it.
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return [], None
+        inode, offset = position or (stat.st_ino, 0)
+        if inode != stat.st_ino or stat.st_size < offset:
+            inode, offset = stat.st_ino, 0
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        records = []
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                records.append(self._decode(json.loads(line)))
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning(f"Skipping corrupt delta log record while tailing {self.path}: {e}")
+                records.append(("corrupt", None, None, None))
+        return records, (inode, offset + end)
+
+    def truncate(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        try:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+        except OSError as e:
+            logger.error(f"Failed to truncate delta log {self.path}: {e}")
+        self.pending = 0
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class Snapshotter:
+    """
+    Background task that compacts the delta log into a full snapshot once it holds
+    `max_deltas` records or its oldest record is `interval` seconds old.
+    """
+
+    def __init__(self, delta_log: DeltaLog, snapshot: Callable[[], Awaitable[None]],
+                 interval: float = settings.SNAPSHOT_INTERVAL_SECONDS,
+                 max_deltas: int = settings.SNAPSHOT_MAX_DELTAS):
+        self.delta_log = delta_log
+        self.snapshot = snapshot
+        self.interval = interval
+        self.max_deltas = max_deltas
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._first_pending_at: float | None = None
+
+    def start(self):
+        self._wakeup = asyncio.Event()
+        if self.delta_log.pending and self._first_pending_at is None:
+            self._first_pending_at = time.monotonic()
+        self._task = asyncio.create_task(self._run())
+
+    def notify(self):
+        if self._first_pending_at is None:
+            self._first_pending_at = time.monotonic()
+        if self.delta_log.pending >= self.max_deltas:
+            self._wakeup.set()
+
+    async def stop(self, flush: bool = True):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if flush and self.delta_log.pending:
+            await self._snapshot()
+
+    async def _snapshot(self):
+        try:
+            await self.snapshot()
+            self._first_pending_at = None
+        except Exception:
+            logger.exception("Background snapshot failed; keeping the delta log.")
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if not self.delta_log.pending:
+                continue
+            age = time.monotonic() - (self._first_pending_at or time.monotonic())
+            if self.delta_log.pending >= self.max_deltas or age >= self.interval:
+                await self._snapshot()
@@ -0,0 +1,324 @@
+# FILE: app/utils/item_columns.py
+import io
+import json
+import mmap
+import os
+import sys
+import numpy as np
+import logging
+from app.config import settings
+from app.models.faiss_manager import id_to_int
+from app.utils.persistence import CustomJSONEncoder, _ensure_dir
+from typing import BinaryIO, Iterable, List, Dict, Any, Iterator, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"SSITEMS1"
+_ALIGN = 8
+
+IS_CATEGORY = 1
+HAS_NAME = 2
+HAS_DESCRIPTION = 4
+HAS_RATING = 8
+HAS_PRICE = 16
+
+# Fields that get their own column; everything else goes to the per-item "extra" JSON blob.
+_COLUMN_FIELDS = {"_id", "name", "description", "avgRating", "category", "isCategory"}
+
+# One item as the columns store it: (id, name, description, flags, rating, price,
+# category, extras JSON), with "" for a missing string.
+Row = Tuple[str, str, str, int, float, float, Dict[str, Any] | None, str]
+
+
+def item_price(item: Dict[str, Any]) -> float | None:
+    """The filterable price of an item: `priceInfo` itself if numeric, else its lowest numeric field."""
+    price = item.get("priceInfo")
+    if isinstance(price, dict):
+        values = [v for v in price.values() if isinstance(v, (int, float)) and not isinstance(v, bool)]
+        return float(min(values)) if values else None
+    if isinstance(price, (int, float)) and not isinstance(price, bool):
+        return float(price)
+    return None
+
+
+def _string_table(values: List[str]):
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.uint64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+
+def _split_item(item: Dict[str, Any]) -> Tuple[int, float, float, Dict[str, Any] | None, Dict[str, Any]]:
+    """(flags, rating, price, category, extra fields) of an item, as the column layout stores them."""
+    flag = IS_CATEGORY if item.get("isCategory") else 0
+    if isinstance(item.get("name"), str):
+        flag |= HAS_NAME
+    if isinstance(item.get("description"), str):
+        flag |= HAS_DESCRIPTION
+    rating = item.get("avgRating")
+    if isinstance(rating, (int, float)) and not isinstance(rating, bool):
+        flag |= HAS_RATING
+    price = item_price(item)
+    if price is not None:
+        # Derived for filtering; priceInfo itself stays in the extras.
+        flag |= HAS_PRICE
+    category = item.get("category")
+    extra = {k: v for k, v in item.items() if k not in _COLUMN_FIELDS}
+    if "avgRating" in item and not flag & HAS_RATING:
+        extra["avgRating"] = rating
+    if "category" in item and not isinstance(category, dict):
+        extra["category"] = category
+    return (flag, float(rating) if flag & HAS_RATING else 0.0, price or 0.0,
+            category if isinstance(category, dict) else None, extra)
+
+
+def _category_key(category: Dict[str, Any]) -> str:
+    return json.dumps(category, sort_keys=True, cls=CustomJSONEncoder)
+
+
+def _item_row(item: Dict[str, Any]) -> Row:
+    flag, rating, price, category, extra = _split_item(item)
+    return (item['_id'], item["name"] if flag & HAS_NAME else "",
+            item["description"] if flag & HAS_DESCRIPTION else "", flag, rating, price, category,
+            json.dumps(extra, ensure_ascii=False, cls=CustomJSONEncoder) if extra else "")
+
+
+def _write_columns(items: Iterable[Dict[str, Any]], f: BinaryIO):
+    _write_rows(map(_item_row, items), f)
+
+
+def _write_rows(rows: Iterable[Row], f: BinaryIO):
+    ids, names, descriptions, extras = [], [], [], []
+    flags, ratings, prices, category_ids = [], [], [], []
+    categories: List[Dict[str, Any]] = []
+    category_index: Dict[str, int] = {}
+    # Rows of one store share their category dicts, so each is serialized once.
+    by_object: Dict[int, int] = {}
+
+    for item_id, name, description, flag, rating, price, category, extra in rows:
+        category_id = -1
+        if category is not None:
+            category_id = by_object.get(id(category), -1)
+            if category_id < 0:
+                key = _category_key(category)
+                if key not in category_index:
+                    category_index[key] = len(categories)
+                    categories.append(json.loads(key))
+                category_id = by_object[id(category)] = category_index[key]
+        ids.append(item_id)
+        names.append(name)
+        descriptions.append(description)
+        extras.append(extra)
+        flags.append(flag)
+        ratings.append(rating)
+        prices.append(price)
+        category_ids.append(category_id)
+
+    n = len(ids)
+    sections = {"labels": np.fromiter((id_to_int(item_id) for item_id in ids), dtype=np.int64, count=n),
+                "ratings": np.array(ratings, dtype=np.float64).reshape(n),
+                "prices": np.array(prices, dtype=np.float64).reshape(n),
+                "category_ids": np.array(category_ids, dtype=np.int32).reshape(n),
+                "flags": np.array(flags, dtype=np.uint8).reshape(n)}
+    for name, values in (("ids", ids), ("names", names), ("descriptions", descriptions), ("extras", extras)):
+        sections[f"{name}_offsets"], sections[f"{name}_blob"] = _string_table(values)
+
+    layout, offset = {}, 0
+    for name, array in sections.items():
+        layout[name] = [offset, array.dtype.str, int(array.size)]
+        offset += -(-array.nbytes // _ALIGN) * _ALIGN
+    header = json.dumps({"count": n, "categories": categories, "sections": layout}).encode("utf-8")
+    data_start = -(-(len(MAGIC) + 8 + len(header)) // _ALIGN) * _ALIGN
+
+    f.write(MAGIC)
+    f.write(np.uint64(len(header)).tobytes())
+    f.write(header)
+    for name, array in sections.items():
+        f.seek(data_start + layout[name][0])
+        f.write(array.tobytes())
+    f.truncate(data_start + offset)
+
+
+def write_item_columns(items: Iterable[Dict[str, Any]], path: str):
+    """
+    Writes items in a columnar layout: fixed-width arrays for labels, ratings,
+    category ids and flags, plus offset/blob tables for the variable-width strings.
+    """
+    write_item_rows(map(_item_row, items), path)
+
+
+def write_item_rows(rows: Iterable[Row], path: str):
+    """Writes rows as `ItemColumns.row` and `ItemRecord.row` return them, without building item dicts."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        _write_rows(rows, f)
+    os.replace(tmp_path, path)
+
+
+class ItemRecord:
+    """
+    One item kept outside a columns buffer (a live upsert), in the same compact
+    shape as a column row: slotted fields, the category as a shared interned dict,
+    and everything else as one JSON string.
+    """
+    __slots__ = ("item_id", "name", "description", "rating", "price", "category", "flags", "extra")
+
+    def __init__(self, item: Dict[str, Any], categories: Dict[str, Dict[str, Any]]):
+        self.flags, self.rating, self.price, category, extra = _split_item(item)
+        self.item_id = sys.intern(item['_id'])
+        self.name = item["name"] if self.flags & HAS_NAME else None
+        self.description = item["description"] if self.flags & HAS_DESCRIPTION else None
+        self.category = None
+        if category is not None:
+            key = _category_key(category)
+            self.category = categories.setdefault(key, json.loads(key))
+        self.extra = json.dumps(extra, ensure_ascii=False, cls=CustomJSONEncoder) if extra else None
+
+    def item(self) -> Dict[str, Any]:
+        item: Dict[str, Any] = {"_id": self.item_id}
+        if self.name is not None:
+            item["name"] = self.name
+        if self.description is not None:
+            item["description"] = self.description
+        if self.extra:
+            item.update(json.loads(self.extra))
+        if self.flags & HAS_RATING:
+            item["avgRating"] = self.rating
+        if self.category is not None:
+            item["category"] = dict(self.category)
+        if self.flags & IS_CATEGORY:
+            item["isCategory"] = True
+        return item
+
+    def row(self) -> Row:
+        return (self.item_id, self.name or "", self.description or "", self.flags, self.rating,
+                self.price, self.category, self.extra or "")
+
+
+class ItemColumns:
+    """
+    Read-only view of the layout written by `write_item_columns`: memory-mapped
+    from a file, or held in one in-memory buffer by `from_items`. Only the
+    fixed-width columns are touched at open; full item dicts are hydrated on
+    demand by `item(row)`.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._attach(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), path)
+
+    @classmethod
+    def from_items(cls, items: List[Dict[str, Any]]) -> "ItemColumns":
+        """Lays `items` out in memory exactly as in the file, so the dicts can be dropped."""
+        stream = io.BytesIO()
+        _write_columns(items, stream)
+        columns = cls.__new__(cls)
+        columns.path = None
+        columns._attach(stream.getbuffer(), "<memory>")
+        return columns
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._mmap)
+
+    def _attach(self, buffer, source: str):
+        self._mmap = buffer
+        if bytes(buffer[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{source} is not an item columns file")
+        header_len = int(np.frombuffer(buffer, dtype=np.uint64, count=1, offset=len(MAGIC))[0])
+        header_end = len(MAGIC) + 8 + header_len
+        header = json.loads(bytes(buffer[len(MAGIC) + 8:header_end]).decode("utf-8"))
+        data_start = -(-header_end // _ALIGN) * _ALIGN
+
+        self.count: int = header["count"]
+        self.categories: List[Dict[str, Any]] = header["categories"]
+        self._arrays = {name: np.frombuffer(self._mmap, dtype=np.dtype(dtype), count=size,
+                                            offset=data_start + offset)
+                        for name, (offset, dtype, size) in header["sections"].items()}
+        self.labels: np.ndarray = self._arrays["labels"]
+        self.ratings: np.ndarray = self._arrays["ratings"]
+        # Files written before the price column existed have no HAS_PRICE flags either.
+        self.prices: np.ndarray = self._arrays.get("prices", np.zeros(self.count, dtype=np.float64))
+        self.category_ids: np.ndarray = self._arrays["category_ids"]
+        self.flags: np.ndarray = self._arrays["flags"]
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _string(self, table: str, row: int) -> str:
+        offsets = self._arrays[f"{table}_offsets"]
+        start, end = int(offsets[row]), int(offsets[row + 1])
+        return self._arrays[f"{table}_blob"][start:end].tobytes().decode("utf-8")
+
+    def item_id(self, row: int) -> str:
+        return self._string("ids", row)
+
+    def name(self, row: int) -> str | None:
+        return self._string("names", row) if self.flags[row] & HAS_NAME else None
+
+    def item(self, row: int) -> Dict[str, Any]:
+        flag = int(self.flags[row])
+        item: Dict[str, Any] = {"_id": self.item_id(row)}
+        if flag & HAS_NAME:
+            item["name"] = self._string("names", row)
+        if flag & HAS_DESCRIPTION:
+            item["description"] = self._string("descriptions", row)
+        extra = self._string("extras", row)
+        if extra:
+            item.update(json.loads(extra))
+        if flag & HAS_RATING:
+            item["avgRating"] = float(self.ratings[row])
+        if self.category_ids[row] >= 0:
+            item["category"] = dict(self.categories[self.category_ids[row]])
+        if flag & IS_CATEGORY:
+            item["isCategory"] = True
+        return item
+
+    def row(self, row: int) -> Row:
+        """The stored fields of a row, undecoded: extras stay JSON and the category is shared."""
+        category_id = int(self.category_ids[row])
+        return (self.item_id(row), self._string("names", row), self._string("descriptions", row),
+                int(self.flags[row]), float(self.ratings[row]), float(self.prices[row]),
+                self.categories[category_id] if category_id >= 0 else None, self._string("extras", row))
+
+    def light_items(self) -> Iterator[Dict[str, Any]]:
+        """Yields just the fields needed for ranking, autocomplete and the lexical index, skipping extras."""
+        for row in range(self.count):
+            flag = int(self.flags[row])
+            # Interned, so the indexes built from these items all share one copy of each id.
+            item = {"_id": sys.intern(self.item_id(row)), "name": self.name(row)}
+            if flag & HAS_DESCRIPTION:
+                item["description"] = self._string("descriptions", row)
+            if self.category_ids[row] >= 0:
+                # Shared, not copied: consumers only read it.
+                item["category"] = self.categories[self.category_ids[row]]
+            if flag & HAS_RATING:
+                item["avgRating"] = float(self.ratings[row])
+            if flag & IS_CATEGORY:
+                item["isCategory"] = True
+            yield item
+
+
+def save_item_columns(items: Iterable[Dict[str, Any]], path: str = settings.ITEM_COLUMNS_PATH) -> bool:
+    return save_item_rows(map(_item_row, items), path)
+
+
+def save_item_rows(rows: Iterable[Row], path: str = settings.ITEM_COLUMNS_PATH) -> bool:
+    try:
+        _ensure_dir(path)
+        write_item_rows(rows, path)
+        return True
+    except Exception as e:
+        logger.error(f"Failed to save item columns to {path}: {e}")
+        return False
+
+
+def load_item_columns(path: str = settings.ITEM_COLUMNS_PATH) -> ItemColumns | None:
+    if not os.path.exists(path):
+        return None
+    try:
+        return ItemColumns(path)
+    except Exception as e:
+        logger.error(f"Error loading item columns from {path}: {e}")
+        return None
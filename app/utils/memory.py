@@ -0,0 +1,57 @@
+# FILE: app/utils/memory.py
+import sys
+import numpy as np
+from itertools import chain, islice
+from typing import Any, Set
+
+# Containers longer than this are measured on an evenly strided sample and extrapolated.
+# Sampling overcounts objects shared between containers (interned ids in postings), so
+# it is kept high enough that catalogs of ordinary size are measured exactly.
+SAMPLE_SIZE = 100_000
+
+
+def _children(obj: Any):
+    if isinstance(obj, dict):
+        # Keys and values themselves; items() would yield short-lived tuples whose ids get reused.
+        return chain.from_iterable(obj.items()), 2 * len(obj)
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return obj, len(obj)
+    slots = getattr(type(obj), "__slots__", None)
+    if slots is not None:
+        return [getattr(obj, name, None) for name in slots], len(slots)
+    if hasattr(obj, "__dict__"):
+        return [vars(obj)], 1
+    return (), 0
+
+
+def deep_sizeof(obj: Any, sample: int = SAMPLE_SIZE, _seen: Set[int] = None) -> int:
+    """
+    Approximate bytes reachable from `obj`. Objects reached twice (interned strings,
+    shared category dicts) count once, NumPy arrays count the buffer they own, and
+    containers longer than `sample` are estimated from every n-th entry so a report
+    over millions of items stays cheap.
+    """
+    seen = set() if _seen is None else _seen
+    if id(obj) in seen or obj is None:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, np.ndarray):
+        return sys.getsizeof(obj) if obj.base is not None else obj.nbytes + 112
+    if isinstance(obj, (str, bytes, bytearray, int, float, bool, memoryview)):
+        return sys.getsizeof(obj)
+
+    size = sys.getsizeof(obj)
+    children, length = _children(obj)
+    if not length:
+        return size
+    step = -(-length // sample)
+    if isinstance(obj, dict):
+        # Stride over (key, value) pairs, not over the flattened sequence.
+        children = chain.from_iterable(islice(obj.items(), 0, None, step))
+    else:
+        children = islice(children, 0, None, step)
+    measured, count = 0, 0
+    for child in children:
+        measured += deep_sizeof(child, sample, seen)
+        count += 1
+    return size + (measured if count >= length else int(measured * length / max(1, count)))
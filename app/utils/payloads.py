@@ -0,0 +1,38 @@
+# FILE: app/utils/payloads.py
+import json
+from app.utils.persistence import CustomJSONEncoder
+from typing import List, Dict, Any, Callable
+
+
+def render_item(item: Dict[str, Any]) -> bytes:
+    return json.dumps(item, ensure_ascii=False, separators=(",", ":"),
+                      cls=CustomJSONEncoder).encode("utf-8")
+
+
+def _render_results(results: List[Dict[str, Any]], fragment: Callable[[str], bytes | None]) -> bytes:
+    parts = []
+    for result in results:
+        item = result["item"]
+        body = fragment(item["_id"]) or render_item(item)
+        parts.append(b'{"item":' + body + b',"score":' + repr(float(result["score"])).encode() + b"}")
+    return b"[" + b",".join(parts) + b"]"
+
+
+def render_search_results(categories: List[Dict[str, Any]], services: List[Dict[str, Any]],
+                          fragment: Callable[[str], bytes | None]) -> bytes:
+    """
+    Splices pre-rendered item fragments into the part of a SearchResponse-shaped
+    JSON body that follows the query, so only the scores are encoded per request.
+    """
+    return (b',"categories":' + _render_results(categories, fragment)
+            + b',"services":' + _render_results(services, fragment) + b"}")
+
+
+def with_query(query: str, results: bytes) -> bytes:
+    """Completes a body from `render_search_results` with the query as the caller spelled it."""
+    return b'{"query":' + json.dumps(query, ensure_ascii=False).encode("utf-8") + results
+
+
+def render_search_response(query: str, categories: List[Dict[str, Any]], services: List[Dict[str, Any]],
+                           fragment: Callable[[str], bytes | None]) -> bytes:
+    return with_query(query, render_search_results(categories, services, fragment))
@@ -3,7 +3,7 @@ import json
 import numpy as np
 import os
 import faiss
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 from app.config import settings
 import logging
 from datetime import datetime
@@ -38,14 +38,18 @@ class CustomJSONEncoder(json.JSONEncoder):
         return super().default(obj)
 
 
-def save_items(items: List[Dict[str, Any]], path: str = settings.ITEMS_PATH):
+def save_items(items: List[Dict[str, Any]], path: str = settings.ITEMS_PATH) -> bool:
     """Saves the list of items to a JSON file using the custom encoder."""
     try:
         _ensure_dir(path)
-        with open(path, "w", encoding="utf-8") as f:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
             json.dump(items, f, ensure_ascii=False, cls=CustomJSONEncoder)
+        os.replace(tmp_path, path)
+        return True
     except IOError as e:
         logger.error(f"Failed to save items to {path}: {e}")
+        return False
 
 
 def load_items(path: str = settings.ITEMS_PATH) -> List[Dict[str, Any]]:
@@ -59,19 +63,101 @@ def load_items(path: str = settings.ITEMS_PATH) -> List[Dict[str, Any]]:
         return []
 
 
-def save_faiss_index(index: faiss.Index, path: str = settings.FAISS_INDEX_PATH):
+def save_stream_state(state: Dict[str, Any], path: str = settings.STREAM_STATE_PATH) -> bool:
+    """Atomically persists the change-stream resume token and updatedAt high-water mark."""
     try:
         _ensure_dir(path)
-        faiss.write_index(index, path)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, cls=CustomJSONEncoder)
+        os.replace(tmp_path, path)
+        return True
+    except IOError as e:
+        logger.error(f"Failed to save stream state to {path}: {e}")
+        return False
+
+
+def load_stream_state(path: str = settings.STREAM_STATE_PATH) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        logger.error(f"Failed to load stream state from {path}: {e}")
+        return {}
+
+
+def save_faiss_index(index: faiss.Index, path: str = settings.FAISS_INDEX_PATH) -> bool:
+    try:
+        _ensure_dir(path)
+        tmp_path = f"{path}.tmp"
+        faiss.write_index(index, tmp_path)
+        os.replace(tmp_path, path)
+        return True
     except Exception as e:
         logger.error(f"Failed to save FAISS index to {path}: {e}")
+        return False
 
 
-def load_faiss_index(path: str = settings.FAISS_INDEX_PATH) -> faiss.Index | None:
+def load_faiss_index(path: str = settings.FAISS_INDEX_PATH, mmap: bool = False) -> faiss.Index | None:
     if not os.path.exists(path):
         return None
     try:
+        if mmap:
+            return faiss.read_index(path, getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP))
         return faiss.read_index(path)
     except Exception as e:
         logger.error(f"Error loading FAISS index from {path}: {e}")
         return None
+
+
+def save_index_config(config: Dict[str, Any], index_path: str = settings.FAISS_INDEX_PATH) -> bool:
+    """Writes the index metadata and build/search parameters next to the index as `<index>.config.json`."""
+    path = f"{index_path}.config.json"
+    try:
+        _ensure_dir(path)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(config, f)
+        os.replace(tmp_path, path)
+        return True
+    except IOError as e:
+        logger.error(f"Failed to save index config to {path}: {e}")
+        return False
+
+
+def load_index_config(index_path: str = settings.FAISS_INDEX_PATH) -> Dict[str, Any]:
+    path = f"{index_path}.config.json"
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        logger.error(f"Failed to load index config from {path}: {e}")
+        return {}
+
+
+def save_query_cache(keys: List[str], vectors: np.ndarray, model_name: str,
+                     path: str = settings.QUERY_CACHE_PATH):
+    try:
+        _ensure_dir(path)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, keys=np.array(keys, dtype=str),
+                     vectors=vectors.astype("float32"), model_name=np.array(model_name))
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.error(f"Failed to save query embedding cache to {path}: {e}")
+
+
+def load_query_cache(path: str = settings.QUERY_CACHE_PATH) -> Tuple[List[str], np.ndarray, str] | None:
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            return data["keys"].tolist(), data["vectors"], str(data["model_name"])
+    except Exception as e:
+        logger.error(f"Error loading query embedding cache from {path}: {e}")
+        return None
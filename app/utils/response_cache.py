@@ -0,0 +1,247 @@
+# FILE: app/utils/response_cache.py
+import asyncio
+import sqlite3
+import time
+import logging
+from cachetools import TTLCache
+from concurrent.futures import ThreadPoolExecutor
+from app.config import settings
+from app.utils.persistence import _ensure_dir
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Shared-store rows are pruned every this many writes.
+_PRUNE_EVERY = 200
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent computations of the same key within a process: the first
+    caller starts the computation as its own task, and every caller (the first
+    included) awaits that task's result or exception. A caller that goes away
+    cancels neither the task nor the other callers.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    def pending(self, key: Hashable) -> asyncio.Future | None:
+        return self._inflight.get(key)
+
+    async def do(self, key: Hashable, compute: Callable[[], Awaitable[T]]) -> T:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(compute())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Future):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Marks the exception retrieved, so one nobody is left waiting for isn't logged as lost.
+            task.exception()
+
+
+class ResponseCache:
+    """
+    Finished search response bodies keyed on (generation, request key).
+
+    The generation names a state of the engine's data: the writer bumps it on every
+    applied change batch and rebuild, and read-only workers adopt the generation
+    of the snapshot and delta-log marker they have applied. Entries therefore never
+    outlive the data they were computed from, and a `None` generation (a state no
+    generation describes) bypasses the cache.
+
+    Lookups go to an in-process TTLCache first and then, if `path` is given, to an
+    SQLite file shared by every worker on the node. The shared store also hands out
+    generations, so they are unique across workers and restarts. Only the TTLCache
+    is touched on the event loop: shared reads and writes each run on their own
+    thread and connection, and a read that finds the store locked past
+    RESPONSE_CACHE_READ_TIMEOUT_MS is a miss.
+    """
+
+    def __init__(self, maxsize: int = settings.RESPONSE_CACHE_SIZE,
+                 ttl: float = settings.RESPONSE_CACHE_TTL_SECONDS, path: str | None = None,
+                 read_timeout_ms: float = settings.RESPONSE_CACHE_READ_TIMEOUT_MS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = path
+        self.read_timeout = max(0.0, read_timeout_ms) / 1000.0
+        # No state is identified until the writer bumps or a reader adopts a generation.
+        self.generation: int | None = None
+        self._local = TTLCache(maxsize=maxsize, ttl=ttl)
+        # Each connection is only used from its own thread.
+        self._read_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="response-cache-read")
+        self._write_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="response-cache-write")
+        self._reader: sqlite3.Connection | None = None
+        self._writer: sqlite3.Connection | None = None
+        self._writes = 0
+        self._bumps = 0
+
+    def _open(self, timeout: float) -> sqlite3.Connection:
+        _ensure_dir(self.path)
+        db = sqlite3.connect(self.path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        # Entries are disposable, so durability is traded for write latency.
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=OFF")
+        db.execute("CREATE TABLE IF NOT EXISTS responses "
+                   "(key TEXT PRIMARY KEY, generation INTEGER, body BLOB, expires REAL)")
+        db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER)")
+        return db
+
+    def _connect_reader(self) -> sqlite3.Connection | None:
+        if self.path is None or self._reader is not None:
+            return self._reader
+        try:
+            self._reader = self._open(self.read_timeout)
+        except sqlite3.Error as e:
+            # Retried on the next read; only the writer connection decides the store is unusable.
+            logger.warning(f"Shared response cache at {self.path} could not be opened for reading: {e}")
+        return self._reader
+
+    def _connect_writer(self) -> sqlite3.Connection | None:
+        if self.path is None or self._writer is not None:
+            return self._writer
+        try:
+            self._writer = self._open(5.0)
+        except sqlite3.Error as e:
+            logger.error(f"Shared response cache at {self.path} is unavailable ({e}); caching per process.")
+            self.path = None
+        return self._writer
+
+    @staticmethod
+    def _shared_key(generation: int, key: Hashable) -> str:
+        return f"{generation}:{key!r}"
+
+    async def get(self, key: Hashable) -> bytes | None:
+        return (await self.get_many([key]))[0]
+
+    async def get_many(self, keys: List[Hashable]) -> List[bytes | None]:
+        """Bodies for `keys` at the current generation; local misses are looked up in one shared read."""
+        generation = self.generation
+        if generation is None:
+            return [None] * len(keys)
+        bodies = [self._local.get((generation, key)) for key in keys]
+        missing = [pos for pos, body in enumerate(bodies) if body is None]
+        if not missing or self.path is None:
+            return bodies
+        loop = asyncio.get_running_loop()
+        shared = await loop.run_in_executor(
+            self._read_thread, self._read_shared, generation, [keys[pos] for pos in missing])
+        for pos, body in zip(missing, shared):
+            if body is not None:
+                bodies[pos] = body
+                if generation == self.generation:
+                    self._local[(generation, keys[pos])] = body
+        return bodies
+
+    def _read_shared(self, generation: int, keys: List[Hashable]) -> List[bytes | None]:
+        db = self._connect_reader()
+        if db is None:
+            return [None] * len(keys)
+        now = time.time()
+        try:
+            rows = [db.execute("SELECT body FROM responses WHERE key = ? AND expires > ?",
+                               (self._shared_key(generation, key), now)).fetchone() for key in keys]
+        except sqlite3.Error as e:
+            logger.warning(f"Shared response cache read failed: {e}")
+            return [None] * len(keys)
+        return [None if row is None else row[0] for row in rows]
+
+    def set(self, key: Hashable, body: bytes, generation: int | None):
+        """
+        Stores `body` if it was computed at the current generation; results of an older
+        state are dropped. The shared write is queued on the write thread, not awaited.
+        """
+        if generation is None or generation != self.generation:
+            return
+        self._local[(generation, key)] = body
+        if self.path is not None:
+            self._write_thread.submit(self._write_shared, self._shared_key(generation, key), generation, body)
+
+    def _write_shared(self, shared_key: str, generation: int, body: bytes):
+        db = self._connect_writer()
+        if db is None:
+            return
+        try:
+            db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                       (shared_key, generation, body, time.time() + self.ttl))
+            self._writes += 1
+            if self._writes % _PRUNE_EVERY == 0:
+                self._prune(db)
+        except sqlite3.Error as e:
+            logger.warning(f"Shared response cache write failed: {e}")
+
+    def _prune(self, db: sqlite3.Connection):
+        db.execute("DELETE FROM responses WHERE expires <= ?", (time.time(),))
+        db.execute("DELETE FROM responses WHERE rowid IN (SELECT rowid FROM responses ORDER BY expires "
+                   "LIMIT max(0, (SELECT count(*) FROM responses) - ?))", (self.maxsize,))
+
+    async def bump(self) -> int | None:
+        """
+        Starts a new generation for changed data; called by the writer. The cache is
+        bypassed from the call on, so nothing computed on the old state is stored
+        while the shared store allocates the generation.
+        """
+        self._local.clear()
+        self.generation = None
+        self._bumps += 1
+        bump = self._bumps
+        if self.path is None:
+            generation = self._bumps
+        else:
+            loop = asyncio.get_running_loop()
+            generation = await loop.run_in_executor(self._write_thread, self._allocate_generation)
+        # A later bump owns the generation once it has started.
+        if bump == self._bumps:
+            self.generation = generation
+        return generation
+
+    def _allocate_generation(self) -> int | None:
+        db = self._connect_writer()
+        if db is None:
+            return self._bumps
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                db.execute("INSERT OR IGNORE INTO meta VALUES ('generation', 0)")
+                db.execute("UPDATE meta SET value = value + 1 WHERE name = 'generation'")
+                generation = db.execute("SELECT value FROM meta WHERE name = 'generation'").fetchone()[0]
+                # Readers still on older generations refill their entries; the rest are dead.
+                db.execute("DELETE FROM responses WHERE generation < ?", (generation - 1,))
+                db.execute("COMMIT")
+            except sqlite3.Error:
+                db.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            # No generation can be trusted to be unshared now; bypass until the next bump.
+            logger.error(f"Could not allocate a response cache generation: {e}")
+            return None
+        return generation
+
+    def adopt(self, generation: int | None):
+        """Follows the writer's generation for a state this worker has replicated; None disables caching."""
+        if generation != self.generation:
+            self._local.clear()
+        self.generation = generation
+
+    def stats(self) -> Dict[str, Any]:
+        return {"generation": self.generation, "local_entries": len(self._local), "shared": self.path is not None}
+
+    def close(self):
+        # Queued writes land before the connections close.
+        self._write_thread.shutdown(wait=True)
+        self._read_thread.shutdown(wait=True)
+        for db in (self._reader, self._writer):
+            if db is not None:
+                db.close()
+        self._reader = self._writer = None
+        self.path = None
@@ -0,0 +1,111 @@
+# FILE: app/utils/snapshots.py
+import fcntl
+import os
+import shutil
+import logging
+from app.config import settings
+from app.utils.persistence import _ensure_dir
+from typing import Callable, Tuple
+
+logger = logging.getLogger(__name__)
+
+ITEMS_FILE = "items.bin"
+INDEX_FILE = "faiss.index"
+GENERATION_FILE = "generation"
+
+
+class WriterLease:
+    """
+    Non-blocking exclusive flock on WRITER_LOCK_PATH. Exactly one process on the node
+    holds it; the OS releases it if that process dies, so a reader can take over.
+    """
+
+    def __init__(self, path: str = settings.WRITER_LOCK_PATH):
+        self.path = path
+        self._fd: int | None = None
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def try_acquire(self) -> bool:
+        if self._fd is not None:
+            return True
+        _ensure_dir(self.path)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+
+class SnapshotDirectory:
+    """
+    Versioned snapshots under SNAPSHOT_DIR: each version is a `v<N>/` directory holding
+    items.bin, faiss.index and the response cache generation of the published state,
+    and the CURRENT file names the published version.
+    Readers that still have an older version mapped keep working after it is pruned.
+    """
+
+    def __init__(self, root: str = settings.SNAPSHOT_DIR, keep: int = settings.SNAPSHOT_KEEP):
+        self.root = root
+        self.keep = max(1, keep)
+        self.current_path = os.path.join(root, "CURRENT")
+
+    def _version_dir(self, version: int) -> str:
+        return os.path.join(self.root, f"v{version:012d}")
+
+    def paths(self, version: int) -> Tuple[str, str]:
+        directory = self._version_dir(version)
+        return os.path.join(directory, ITEMS_FILE), os.path.join(directory, INDEX_FILE)
+
+    def current_version(self) -> int | None:
+        try:
+            with open(self.current_path, "r", encoding="utf-8") as f:
+                return int(f.read().strip())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def generation(self, version: int) -> int | None:
+        try:
+            with open(os.path.join(self._version_dir(version), GENERATION_FILE), "r", encoding="utf-8") as f:
+                return int(f.read().strip())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def publish(self, write: Callable[[str, str], bool], generation: int | None = None) -> int | None:
+        """Writes the next version with `write(items_path, index_path)` and flips CURRENT to it."""
+        version = (self.current_version() or 0) + 1
+        directory = self._version_dir(version)
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+        if not write(*self.paths(version)):
+            shutil.rmtree(directory, ignore_errors=True)
+            return None
+        if generation is not None:
+            with open(os.path.join(directory, GENERATION_FILE), "w", encoding="utf-8") as f:
+                f.write(str(generation))
+
+        tmp_path = f"{self.current_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(str(version))
+        os.replace(tmp_path, self.current_path)
+        logger.info(f"Published snapshot version {version}.")
+        self._prune(version)
+        return version
+
+    def _prune(self, current: int):
+        for name in os.listdir(self.root):
+            if name.startswith("v") and name[1:].isdigit() and int(name[1:]) <= current - self.keep:
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
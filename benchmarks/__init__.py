@@ -0,0 +1,6 @@
+# FILE: benchmarks/__init__.py
+"""
+Load and scaling benchmarks. `python -m benchmarks --sizes 1000 10000` runs each
+catalog size in its own process against an in-memory Motor stand-in and writes
+one JSON report; see benchmarks/__main__.py for the options.
+"""
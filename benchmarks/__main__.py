@@ -0,0 +1,101 @@
+# FILE: benchmarks/__main__.py
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from benchmarks.catalog import SIZES
+
+# Every on-disk path the app uses, redirected into the run's scratch directory.
+_DATA_SETTINGS = {
+    "ITEMS_PATH": "items.json", "ITEM_COLUMNS_PATH": "items.bin", "FAISS_INDEX_PATH": "faiss.index",
+    "EMBEDDING_STORE_PATH": "embeddings.npy", "QUERY_CACHE_PATH": "query_embeddings.npz",
+    "DELTA_LOG_PATH": "deltas.log", "STREAM_STATE_PATH": "stream_state.json",
+    "SNAPSHOT_DIR": "snapshots", "WRITER_LOCK_PATH": "writer.lock", "ENCODER_EXPORT_DIR": "encoders",
+    "RESPONSE_CACHE_PATH": "response_cache.db",
+}
+
+
+def _parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Search latency, throughput, rebuild and ingestion benchmarks over a synthetic catalog.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES[:2]),
+                        help=f"Service counts to run (the full ladder is {' '.join(map(str, SIZES))}).")
+    parser.add_argument("--encoder", choices=["stub", "model"], default="stub",
+                        help="stub: hermetic hashing encoder; model: the configured SentenceTransformer.")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per latency scenario.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients per scenario.")
+    parser.add_argument("--batch-size", type=int, default=16, help="Queries per /search/batch request.")
+    parser.add_argument("--changes", type=int, default=200, help="Scripted change-stream updates.")
+    parser.add_argument("--change-interval-ms", type=float, default=5.0, help="Delay between scripted updates.")
+    parser.add_argument("--timeout", type=float, default=3600.0, help="Seconds to wait for a rebuild or ingestion.")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout.")
+    parser.add_argument("--single-size", type=int, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def _run_single(args: argparse.Namespace) -> Dict[str, Any]:
+    """Runs one size in this process; settings must be configured before the app is imported."""
+    data_dir = tempfile.mkdtemp(prefix="search-benchmark-")
+    os.environ.setdefault("MONGODB_URL", "mongodb://benchmark.invalid:27017")
+    for name, filename in _DATA_SETTINGS.items():
+        os.environ[name] = os.path.join(data_dir, filename)
+
+    if args.encoder == "stub":
+        from benchmarks.stub_encoder import install_stub_encoder
+        install_stub_encoder()
+    from benchmarks.scenarios import run_size
+    return asyncio.run(run_size(
+        args.single_size, n_requests=args.requests, concurrency=args.concurrency, batch_size=args.batch_size,
+        n_changes=args.changes, change_interval_ms=args.change_interval_ms, timeout=args.timeout))
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: List[str] | None = None):
+    args = _parse_args(argv)
+    if args.single_size is not None:
+        print(json.dumps(_run_single(args)))
+        return
+
+    # Each size runs in a fresh interpreter so peak RSS and the app's globals don't carry over.
+    passthrough = [arg for arg in (argv if argv is not None else sys.argv[1:])]
+    runs = []
+    for size in args.sizes:
+        print(f"Benchmarking {size} services...", file=sys.stderr)
+        command = [sys.executable, "-m", "benchmarks", *passthrough, "--single-size", str(size)]
+        completed = subprocess.run(command, stdout=subprocess.PIPE, text=True)
+        if completed.returncode != 0:
+            runs.append({"n_services": size, "error": f"exited with status {completed.returncode}"})
+            continue
+        runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    report = {
+        "commit": _git_commit(), "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(), "platform": platform.platform(), "cpu_count": os.cpu_count(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "single_size")},
+        "runs": runs,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
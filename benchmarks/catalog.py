@@ -0,0 +1,70 @@
+# FILE: benchmarks/catalog.py
+import random
+from bson import ObjectId
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Tuple
+
+SIZES = (1_000, 10_000, 100_000, 1_000_000)
+
+_ADJECTIVES = ["Royal", "Golden", "Classic", "Modern", "Elegant", "Grand", "Shubh", "Rangeela",
+               "Silver", "Heritage", "Urban", "Blissful", "Vibrant", "Dream", "Regal", "Sapphire"]
+_NOUNS = ["Studio", "Events", "Creations", "Affairs", "Moments", "Celebrations", "House",
+          "Collective", "Works", "Company", "Crew", "Artists", "Services", "Gallery"]
+_CITIES = ["Jaipur", "Mumbai", "Delhi", "Pune", "Udaipur", "Lucknow", "Kolkata", "Chennai",
+           "Hyderabad", "Goa", "Indore", "Bengaluru"]
+_DESCRIPTION_WORDS = ["wedding", "reception", "sangeet", "haldi", "engagement", "birthday",
+                      "corporate", "traditional", "candid", "luxury", "budget", "premium",
+                      "outdoor", "destination", "custom", "live", "vegetarian", "floral",
+                      "lighting", "portraits", "packages", "team", "experienced", "themes"]
+
+
+def _object_id(rng: random.Random) -> ObjectId:
+    return ObjectId(rng.randbytes(12))
+
+
+def generate_catalog(n_services: int, category_names: List[str],
+                     seed: int = 0) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    (categories, services) shaped like the Mongo collections: each service references
+    one category by ObjectId in `categories`, as the $lookup in data_loader expects.
+    """
+    rng = random.Random(seed)
+    categories = [{"_id": _object_id(rng), "name": name} for name in category_names]
+    epoch = datetime(2024, 1, 1)
+    services = []
+    for i in range(n_services):
+        category = rng.choice(categories)
+        words = rng.sample(_DESCRIPTION_WORDS, 6)
+        low = rng.randrange(500, 50_000, 100)
+        services.append({
+            "_id": _object_id(rng),
+            "name": f"{rng.choice(_ADJECTIVES)} {category['name']} {rng.choice(_NOUNS)} {rng.choice(_CITIES)} {i}",
+            "description": f"{category['name']} for {' '.join(words)} in {rng.choice(_CITIES)}.",
+            "priceInfo": {"min": low, "max": low * rng.choice((2, 3, 5))} if rng.random() < 0.8 else low,
+            "avgRating": round(rng.uniform(2.5, 5.0), 1),
+            "categories": [category["_id"]],
+            "updatedAt": epoch + timedelta(seconds=i),
+        })
+    return categories, services
+
+
+def generate_queries(n: int, category_names: List[str], seed: int = 1) -> List[str]:
+    """Distinct free-text queries, so the response cache does not flatter the numbers."""
+    rng = random.Random(seed)
+    queries = set()
+    while len(queries) < n:
+        parts = [rng.choice(_DESCRIPTION_WORDS), rng.choice(category_names).lower()]
+        if rng.random() < 0.5:
+            parts.append(f"in {rng.choice(_CITIES).lower()}")
+        if rng.random() < 0.3:
+            parts.insert(0, rng.choice(_ADJECTIVES).lower())
+        queries.add(" ".join(parts) + (f" {rng.randrange(1000)}" if len(queries) > n // 2 else ""))
+    queries = sorted(queries)
+    rng.shuffle(queries)
+    return queries
+
+
+def generate_prefixes(n: int, category_names: List[str], seed: int = 2) -> List[str]:
+    rng = random.Random(seed)
+    words = _ADJECTIVES + _CITIES + category_names
+    return [rng.choice(words)[:rng.randint(1, 5)].lower() for _ in range(n)]
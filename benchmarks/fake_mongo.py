@@ -0,0 +1,241 @@
+# FILE: benchmarks/fake_mongo.py
+import asyncio
+import copy
+import operator
+from datetime import datetime
+from pymongo.errors import OperationFailure
+from typing import Any, Dict, Iterable, List
+
+
+class FakeCursor:
+    """Async-iterable result set, like the cursors Motor's find/aggregate return."""
+
+    def __init__(self, docs: Iterable[Dict[str, Any]]):
+        self._docs = iter(docs)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Dict[str, Any]:
+        try:
+            return next(self._docs)
+        except StopIteration:
+            raise StopAsyncIteration
+
+    async def to_list(self, length: int | None = None) -> List[Dict[str, Any]]:
+        docs = list(self._docs)
+        return docs[:length] if length else docs
+
+
+_COMPARISONS = {"$gt": operator.gt, "$gte": operator.ge, "$lt": operator.lt, "$lte": operator.le}
+
+
+def _matches(doc: Dict[str, Any], query: Dict[str, Any]) -> bool:
+    for field, condition in query.items():
+        value = doc.get(field)
+        if not isinstance(condition, dict):
+            if value != condition:
+                return False
+            continue
+        for op, operand in condition.items():
+            if op == "$in":
+                ok = value in operand
+            elif op in _COMPARISONS:
+                ok = value is not None and _COMPARISONS[op](value, operand)
+            else:
+                raise NotImplementedError(f"Query operator {op} is not supported by the fake collection.")
+            if not ok:
+                return False
+    return True
+
+
+def _project(doc: Dict[str, Any], projection: Dict[str, Any] | None) -> Dict[str, Any]:
+    if not projection:
+        return copy.deepcopy(doc)
+    projected = {"_id": doc.get("_id")} if projection.get("_id", 1) else {}
+    for field, spec in projection.items():
+        if field == "_id":
+            continue
+        source = spec[1:] if isinstance(spec, str) and spec.startswith("$") else field
+        # Like Mongo, missing fields are left out rather than projected as null.
+        if spec and source in doc:
+            projected[field] = copy.deepcopy(doc[source])
+    return projected
+
+
+class FakeChangeStream:
+    def __init__(self, collection: "FakeCollection", resume_after: Dict[str, Any] | None = None):
+        self._collection = collection
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._error: Exception | None = None
+        if resume_after is not None:
+            seq = collection.resume_position(resume_after)
+            if seq is None:
+                self._error = OperationFailure("Resume token was not found in the fake oplog.", code=286)
+            else:
+                for event in collection.events[seq:]:
+                    self._queue.put_nowait(event)
+        collection.streams.append(self)
+
+    def _check(self):
+        if self._error is not None:
+            raise self._error
+
+    async def try_next(self) -> Dict[str, Any] | None:
+        self._check()
+        return None if self._queue.empty() else self._queue.get_nowait()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Dict[str, Any]:
+        self._check()
+        return await self._queue.get()
+
+    async def close(self):
+        if self in self._collection.streams:
+            self._collection.streams.remove(self)
+
+
+class FakeCollection:
+    """
+    In-memory stand-in for the parts of a Motor collection the app uses: find,
+    aggregate (the $match/$lookup/$unwind/$project stages of data_loader's
+    pipeline), single-document writes, and watch. Writes are appended to an oplog
+    that feeds every open change stream, so scripted updates arrive as real events.
+    """
+
+    def __init__(self, database: "FakeDatabase", name: str):
+        self.database = database
+        self.name = name
+        self.docs: Dict[Any, Dict[str, Any]] = {}
+        self.events: List[Dict[str, Any]] = []
+        self.streams: List[FakeChangeStream] = []
+
+    def load(self, docs: Iterable[Dict[str, Any]]):
+        """Bulk-loads documents without emitting change events."""
+        for doc in docs:
+            self.docs[doc["_id"]] = doc
+
+    def _emit(self, operation_type: str, doc_id: Any):
+        seq = len(self.events) + 1
+        event = {"_id": {"_data": f"{seq:016x}"}, "operationType": operation_type,
+                 "documentKey": {"_id": doc_id}, "wallTime": datetime.utcnow()}
+        self.events.append(event)
+        for stream in self.streams:
+            stream._queue.put_nowait(event)
+
+    def resume_position(self, token: Dict[str, Any]) -> int | None:
+        try:
+            seq = int(token["_data"], 16)
+        except (KeyError, TypeError, ValueError):
+            return None
+        return seq if 0 < seq <= len(self.events) else None
+
+    async def insert_one(self, doc: Dict[str, Any]):
+        self.docs[doc["_id"]] = doc
+        self._emit("insert", doc["_id"])
+
+    async def update_one(self, query: Dict[str, Any], update: Dict[str, Any]):
+        doc = self.docs.get(query["_id"])
+        if doc is None:
+            return
+        doc.update(update.get("$set", {}))
+        self._emit("update", doc["_id"])
+
+    async def delete_one(self, query: Dict[str, Any]):
+        if self.docs.pop(query["_id"], None) is not None:
+            self._emit("delete", query["_id"])
+
+    def _candidates(self, query: Dict[str, Any] | None) -> Iterable[Dict[str, Any]]:
+        if not query:
+            return self.docs.values()
+        id_condition = query.get("_id")
+        if isinstance(id_condition, dict) and set(id_condition) == {"$in"}:
+            # Primary-key lookups skip the scan, as the real _id index would.
+            docs = (self.docs.get(doc_id) for doc_id in id_condition["$in"])
+            rest = {field: cond for field, cond in query.items() if field != "_id"}
+            return [doc for doc in docs if doc is not None and _matches(doc, rest)]
+        return (doc for doc in self.docs.values() if _matches(doc, query))
+
+    def find(self, query: Dict[str, Any] | None = None, projection: Dict[str, Any] | None = None) -> FakeCursor:
+        return FakeCursor(_project(doc, projection) for doc in self._candidates(query))
+
+    def aggregate(self, pipeline: List[Dict[str, Any]]) -> FakeCursor:
+        stages = list(pipeline)
+        docs: Iterable[Dict[str, Any]] = self.docs.values()
+        if stages and "$match" in stages[0]:
+            docs = self._candidates(stages.pop(0)["$match"])
+        for stage in stages:
+            docs = self._apply_stage(docs, stage)
+        return FakeCursor(docs)
+
+    def _apply_stage(self, docs: Iterable[Dict[str, Any]], stage: Dict[str, Any]) -> Iterable[Dict[str, Any]]:
+        (op, spec), = stage.items()
+        if op == "$match":
+            return (doc for doc in docs if _matches(doc, spec))
+        if op == "$lookup":
+            foreign = self.database[spec["from"]].docs
+            local, alias = spec["localField"], spec["as"]
+
+            def lookup(doc):
+                keys = doc.get(local)
+                keys = keys if isinstance(keys, list) else [keys]
+                return {**doc, alias: [copy.deepcopy(foreign[key]) for key in keys if key in foreign]}
+            return (lookup(doc) for doc in docs)
+        if op == "$unwind":
+            path = spec["path"] if isinstance(spec, dict) else spec
+            keep_empty = isinstance(spec, dict) and spec.get("preserveNullAndEmptyArrays", False)
+            field = path.lstrip("$")
+
+            def unwind(doc):
+                values = doc.get(field)
+                if not values:
+                    if keep_empty:
+                        yield {key: value for key, value in doc.items() if key != field}
+                    return
+                for value in values:
+                    yield {**doc, field: value}
+            return (row for doc in docs for row in unwind(doc))
+        if op == "$project":
+            return (_project(doc, spec) for doc in docs)
+        raise NotImplementedError(f"Aggregation stage {op} is not supported by the fake collection.")
+
+    def watch(self, pipeline: List[Dict[str, Any]] | None = None,
+              resume_after: Dict[str, Any] | None = None, **kwargs) -> FakeChangeStream:
+        return FakeChangeStream(self, resume_after)
+
+
+class FakeDatabase:
+    def __init__(self, name: str):
+        self.name = name
+        self._collections: Dict[str, FakeCollection] = {}
+
+    def __getitem__(self, name: str) -> FakeCollection:
+        if name not in self._collections:
+            self._collections[name] = FakeCollection(self, name)
+        return self._collections[name]
+
+    async def command(self, command: str, *args, **kwargs) -> Dict[str, Any]:
+        if command != "ping":
+            raise NotImplementedError(f"Command {command} is not supported by the fake database.")
+        return {"ok": 1.0}
+
+
+class FakeMotorClient:
+    """Drop-in for AsyncIOMotorClient(url, **kwargs) backed by FakeDatabases."""
+
+    def __init__(self, *args, **kwargs):
+        self._databases: Dict[str, FakeDatabase] = {}
+
+    def __getitem__(self, name: str) -> FakeDatabase:
+        if name not in self._databases:
+            self._databases[name] = FakeDatabase(name)
+        return self._databases[name]
+
+    @property
+    def admin(self) -> FakeDatabase:
+        return self["admin"]
+
+    def close(self):
+        pass
@@ -0,0 +1,166 @@
+# FILE: benchmarks/scenarios.py
+import asyncio
+import logging
+import random
+import resource
+import time
+import numpy as np
+import httpx
+from typing import Any, Awaitable, Callable, Dict, List
+
+from benchmarks.catalog import generate_catalog, generate_queries, generate_prefixes
+from benchmarks.fake_mongo import FakeMotorClient
+
+logger = logging.getLogger(__name__)
+
+
+def percentiles(latencies: List[float]) -> Dict[str, Any]:
+    """p50/p99/mean in milliseconds of latencies given in seconds."""
+    ms = np.array(latencies, dtype=np.float64) * 1000.0
+    if not len(ms):
+        return {"count": 0, "p50_ms": None, "p99_ms": None, "mean_ms": None}
+    return {"count": len(ms), "p50_ms": round(float(np.percentile(ms, 50)), 3),
+            "p99_ms": round(float(np.percentile(ms, 99)), 3), "mean_ms": round(float(ms.mean()), 3)}
+
+
+def summarize(latencies: List[float], elapsed: float, errors: int = 0, items_per_request: int = 1) -> Dict[str, Any]:
+    """Latency percentiles plus throughput in requests (and items) per second."""
+    summary = {**percentiles(latencies), "errors": errors,
+               "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed > 0 else None}
+    if items_per_request > 1:
+        summary["throughput_items_per_s"] = round(len(latencies) * items_per_request / elapsed, 2)
+    return summary
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux.
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0, 1)
+
+
+async def drive(send: Callable[[int], Awaitable[bool]], n_requests: int, concurrency: int,
+                items_per_request: int = 1) -> Dict[str, Any]:
+    """Runs `send(i)` for i in range(n_requests) from `concurrency` closed-loop clients."""
+    latencies: List[float] = []
+    errors = 0
+    requests = iter(range(n_requests))
+
+    async def client():
+        nonlocal errors
+        for i in requests:
+            start = time.perf_counter()
+            ok = await send(i)
+            latencies.append(time.perf_counter() - start)
+            errors += not ok
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(max(1, concurrency))))
+    return summarize(latencies, time.perf_counter() - started, errors, items_per_request)
+
+
+async def _wait_for_rebuild(main, timeout: float) -> Dict[str, Any]:
+    deadline = time.monotonic() + timeout
+    while True:
+        jobs = list(main.rebuild_jobs.values())
+        if jobs and jobs[-1].done:
+            job = jobs[-1]
+            if job.status != "succeeded":
+                raise RuntimeError(f"Rebuild failed: {job.error}")
+            return {"seconds": round(job.finished_at - job.started_at, 3), "items": job.n_items,
+                    "computed_embeddings": job.n_computed_embeddings}
+        if time.monotonic() > deadline:
+            raise TimeoutError("Rebuild did not finish in time.")
+        await asyncio.sleep(0.05)
+
+
+async def _ingestion_lag(main, collection, services: List[Dict[str, Any]], n_changes: int,
+                         interval_ms: float, timeout: float) -> Dict[str, Any]:
+    """
+    Scripts `n_changes` renames through the fake collection's change stream and
+    measures, per change, the time until the live engine serves the new name.
+    """
+    rng = random.Random(3)
+    pending: Dict[str, tuple] = {}
+    lags: List[float] = []
+    emitted = asyncio.Event()
+
+    async def watch():
+        while pending or not emitted.is_set():
+            engine = main.hybrid_engine
+            now = time.perf_counter()
+            for doc_id, (name, sent_at) in list(pending.items()):
+                item = engine.store.get(doc_id) if engine is not None else None
+                if item is not None and item.get("name") == name:
+                    lags.append(now - sent_at)
+                    del pending[doc_id]
+            await asyncio.sleep(0.002)
+
+    watcher = asyncio.create_task(watch())
+    for i, service in enumerate(rng.sample(services, min(n_changes, len(services)))):
+        name = f"{service['name']} renamed {i}"
+        pending[str(service["_id"])] = (name, time.perf_counter())
+        await collection.update_one({"_id": service["_id"]},
+                                    {"$set": {"name": name, "updatedAt": service["updatedAt"]}})
+        await asyncio.sleep(interval_ms / 1000.0)
+    emitted.set()
+    try:
+        await asyncio.wait_for(watcher, timeout)
+    except asyncio.TimeoutError:
+        pass
+    return {**percentiles(lags), "not_applied": len(pending)}
+
+
+async def run_size(n_services: int, n_requests: int = 500, concurrency: int = 8, batch_size: int = 16,
+                   n_changes: int = 200, change_interval_ms: float = 5.0, timeout: float = 3600.0) -> Dict[str, Any]:
+    """
+    One benchmark run at a catalog size, in this process. The caller must already
+    have pointed the app's settings at a scratch data directory and chosen an encoder.
+    """
+    from app.config import settings
+    from app.utils import database
+
+    categories, services = generate_catalog(n_services, settings.PREDEFINED_CATEGORIES)
+    client = FakeMotorClient()
+    db = client[settings.DATABASE_NAME]
+    db["categories"].load(categories)
+    db[settings.COLLECTION_NAME].load(services)
+    database.AsyncIOMotorClient = lambda *args, **kwargs: client
+
+    from app import main
+    logging.getLogger().setLevel(logging.WARNING)
+    results: Dict[str, Any] = {"n_services": n_services}
+
+    started = time.perf_counter()
+    async with main.app.router.lifespan_context(main.app):
+        results["startup_seconds"] = round(time.perf_counter() - started, 3)
+        results["rebuild"] = await _wait_for_rebuild(main, timeout)
+        # The first rebuild also loads the model; wait for the background warm-up too.
+        while not main.model_loaded():
+            await asyncio.sleep(0.05)
+
+        queries = generate_queries(2 * n_requests + batch_size, settings.PREDEFINED_CATEGORIES)
+        prefixes = generate_prefixes(n_requests, settings.PREDEFINED_CATEGORIES)
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as http:
+            async def search(i):
+                return (await http.get("/search", params={"q": queries[i]})).status_code == 200
+
+            async def autocomplete(i):
+                return (await http.get("/autocomplete", params={"prefix": prefixes[i]})).status_code == 200
+
+            async def batch(i):
+                start = n_requests + i * batch_size
+                payload = {"queries": [{"q": q} for q in queries[start:start + batch_size]]}
+                return (await http.post("/search/batch", json=payload)).status_code == 200
+
+            results["search"] = await drive(search, n_requests, concurrency)
+            results["autocomplete"] = await drive(autocomplete, n_requests, concurrency)
+            results["batch_search"] = await drive(batch, n_requests // batch_size or 1, concurrency, batch_size)
+
+        results["ingestion_lag"] = await _ingestion_lag(
+            main, db[settings.COLLECTION_NAME], services, n_changes, change_interval_ms, timeout)
+        results["index"] = {"type": main.hybrid_engine.fm.config.get("type"),
+                            "vectors": int(main.hybrid_engine.fm.index.ntotal)}
+        results["memory"] = main.hybrid_engine.memory_report()
+
+    results["peak_rss_mb"] = peak_rss_mb()
+    return results
@@ -0,0 +1,50 @@
+# FILE: benchmarks/stub_encoder.py
+import zlib
+import numpy as np
+from typing import Dict, List, Tuple
+
+
+class StubEncoder:
+    """
+    Deterministic hashing bag-of-words encoder with the SentenceTransformer surface
+    the app calls (encode, get_sentence_embedding_dimension). Texts sharing words
+    get similar vectors, so ranking still behaves, but nothing is downloaded or run
+    on torch, which keeps benchmark runs hermetic and isolates the engine's own cost.
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+        self._buckets: Dict[str, Tuple[int, float]] = {}
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def _bucket(self, token: str) -> Tuple[int, float]:
+        bucket = self._buckets.get(token)
+        if bucket is None:
+            digest = zlib.crc32(token.encode("utf-8"))
+            bucket = self._buckets[token] = (digest % self.dim, 1.0 if digest & 0x80000000 else -1.0)
+        return bucket
+
+    def encode(self, sentences: List[str] | str, batch_size: int = 32, show_progress_bar: bool = None,
+               convert_to_numpy: bool = True, **kwargs) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else sentences
+        rows, columns, signs = [], [], []
+        for row, text in enumerate(texts):
+            for token in (text or "").lower().split():
+                column, sign = self._bucket(token.strip(".,!?()&"))
+                rows.append(row)
+                columns.append(column)
+                signs.append(sign)
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        np.add.at(vectors, (np.array(rows, dtype=np.int64), np.array(columns, dtype=np.int64)),
+                  np.array(signs, dtype=np.float32))
+        return vectors[0] if single else vectors
+
+
+def install_stub_encoder(dim: int = 384):
+    """Routes the app's model loading to StubEncoder; call before anything encodes."""
+    from app.services import encoder
+    encoder.load_backend_model = lambda backend, model_name: StubEncoder(dim)
+    encoder.get_model.cache_clear()
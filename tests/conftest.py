@@ -0,0 +1,51 @@
+# FILE: tests/conftest.py
+import asyncio
+import numpy as np
+import pytest
+from app.models.faiss_manager import FaissManager
+from app.services.hybrid_search import HybridSearchEngine
+
+
+@pytest.fixture
+def unit_vectors():
+    """Factory for `n` random float32 vectors of norm 1, reproducible per seed."""
+    def make(n, dim=8, seed=0):
+        vectors = np.random.default_rng(seed).standard_normal((n, dim)).astype("float32")
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    return make
+
+
+@pytest.fixture
+def flat_engine():
+    """Factory for a HybridSearchEngine over an exact (flat) index of `items` and their `vectors`."""
+    def make(items, vectors):
+        vectors = np.asarray(vectors, dtype="float32")
+        fm = FaissManager(dim=vectors.shape[1], index_type="flat")
+        fm.build_index(items, vectors)
+        return HybridSearchEngine(fm, items)
+    return make
+
+
+@pytest.fixture
+def fixed_query_encoding(mocker):
+    """
+    Patches the query encoder so queries encode to fixed vectors: `encodings` is one
+    vector for every query, or a dict of vectors by query. Each call sleeps `delay`
+    seconds first. Returns the (encode, encode_many) mocks.
+    """
+    def patch(encodings, delay=0.0):
+        def vector(query):
+            chosen = encodings[query] if isinstance(encodings, dict) else encodings
+            return np.asarray(chosen, dtype="float32").reshape(-1)
+
+        async def encode(query):
+            await asyncio.sleep(delay)
+            return vector(query)[np.newaxis, :]
+
+        async def encode_many(queries):
+            await asyncio.sleep(delay)
+            return np.stack([vector(query) for query in queries])
+
+        return (mocker.patch("app.services.hybrid_search.query_encoder.encode", side_effect=encode),
+                mocker.patch("app.services.hybrid_search.query_encoder.encode_many", side_effect=encode_many))
+    return patch
@@ -0,0 +1,79 @@
+# FILE: tests/test_autocomplete.py
+from app.services.autocomplete import AutocompleteIndex
+
+
+def _item(item_id, name, rating=0.0, is_category=False):
+    item = {"_id": item_id, "name": name, "avgRating": rating}
+    if is_category:
+        item["isCategory"] = True
+    return item
+
+
+def test_matches_word_starts_and_ranks_by_popularity():
+    index = AutocompleteIndex([
+        _item("1", "Royal Wedding DJs", 3.5),
+        _item("2", "DJ Night Beats", 4.8),
+        _item("3", "DJs", is_category=True),
+        _item("4", "Catering Co", 5.0),
+    ])
+
+    assert index.suggest("dj") == ["DJs", "DJ Night Beats", "Royal Wedding DJs"]
+    assert index.suggest("wed") == ["Royal Wedding DJs"]
+    assert index.suggest("x") == []
+
+
+def test_upsert_and_remove_update_in_place():
+    index = AutocompleteIndex([_item("1", "Photo Studio", 4.0)])
+
+    index.upsert(_item("2", "Photo Booth", 4.5))
+    assert index.suggest("photo") == ["Photo Booth", "Photo Studio"]
+
+    index.upsert(_item("1", "Video Studio", 4.0))
+    assert index.suggest("photo") == ["Photo Booth"]
+    assert index.suggest("studio") == ["Video Studio"]
+
+    index.remove("2")
+    assert index.suggest("photo") == []
+
+
+def test_large_prefix_ranges_use_patched_top_k():
+    items = [_item(str(i), f"Decor {i}", rating=i / 100) for i in range(300)]
+    index = AutocompleteIndex(items, scan_limit=20, cache_depth=10)
+
+    assert index.suggest("decor", limit=3) == ["Decor 299", "Decor 298", "Decor 297"]
+
+    index.upsert(_item("5", "Decor 5", rating=10.0))
+    index.remove("299")
+    assert index.suggest("decor", limit=3) == ["Decor 5", "Decor 298", "Decor 297"]
+
+    for i in range(290, 299):
+        index.remove(str(i))
+    assert index.suggest("decor", limit=2) == ["Decor 5", "Decor 289"]
+
+
+def test_suggest_skips_items_removed_while_it_runs(mocker):
+    index = AutocompleteIndex([_item(str(i), f"Photo {i}", i) for i in range(6)], scan_limit=100)
+    index.suggest("photo")
+    lookup = index._range
+
+    def removed_between_lookups(prefix):
+        # The range is computed, then a change batch removes items before the scan.
+        lo, hi = lookup(prefix)
+        index.remove("5")
+        index.remove("2")
+        return lo, hi
+    mocker.patch.object(index, "_range", side_effect=removed_between_lookups)
+
+    # A stale range may miss live items, but never fails or returns removed ones.
+    suggestions = index.suggest("photo")
+    assert suggestions and set(suggestions) <= {"Photo 0", "Photo 1", "Photo 3", "Photo 4"}
+
+    mocker.stopall()
+    scan = index._scan
+
+    def removed_after_scan(lo, hi, depth):
+        ranked = scan(lo, hi, depth)
+        index.remove("4")
+        return ranked
+    mocker.patch.object(index, "_scan", side_effect=removed_after_scan)
+    assert index.suggest("photo") == ["Photo 3", "Photo 1", "Photo 0"]
@@ -0,0 +1,63 @@
+# FILE: tests/test_batch_search.py
+import asyncio
+import numpy as np
+import pytest
+from fastapi import HTTPException
+from app import main
+from app.models.pydantic_models import BatchSearchRequest
+from app.utils.response_cache import ResponseCache, SingleFlight
+
+ITEMS = [
+    {"_id": "c1", "name": "Catering", "isCategory": True},
+    {"_id": "s1", "name": "Spice Route", "category": {"name": "Catering"}},
+    {"_id": "s2", "name": "Lens Story", "category": {"name": "Photography"}},
+    {"_id": "s3", "name": "Beat Drop", "category": {"name": "DJs"}},
+]
+VECTORS = np.eye(4, dtype="float32")
+QUERIES = {"food": VECTORS[1], "camera": VECTORS[2], "music": VECTORS[3]}
+
+
+def test_batch_matches_single_searches_with_one_encode(flat_engine, fixed_query_encoding):
+    engine = flat_engine(ITEMS, VECTORS)
+    _, encode_many = fixed_query_encoding(QUERIES)
+
+    async def run():
+        batch = await engine.search_batch(["food", "Catering", "camera", "music"])
+        singles = [await engine.search(q) for q in ["food", "Catering", "camera", "music"]]
+        return batch, singles
+
+    batch, singles = asyncio.run(run())
+
+    encode_many.assert_called_once_with(["food", "camera", "music"])
+    assert batch == singles
+    assert batch[2]["services"][0]["item"]["_id"] == "s2"
+    assert [r["item"]["_id"] for r in batch[1]["categories"]] == ["c1"]
+
+
+def test_batch_reports_failed_queries_including_shared_searches(mocker, flat_engine):
+    engine = flat_engine(ITEMS, VECTORS)
+    cache, flight = ResponseCache(maxsize=10, ttl=60), SingleFlight()
+    generation = asyncio.run(cache.bump())
+    mocker.patch.object(main, "hybrid_engine", engine)
+    mocker.patch.object(main, "response_cache", cache)
+    mocker.patch.object(main, "search_flight", flight)
+    mocker.patch.object(engine, "search_batch", side_effect=RuntimeError("index unavailable"))
+
+    async def failing_search():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("encoder unavailable")
+
+    async def run():
+        # A concurrent /search is already computing "camera".
+        shared = asyncio.ensure_future(flight.do((generation, "camera"), failing_search))
+        await asyncio.sleep(0)
+        request = BatchSearchRequest(queries=[{"q": "food"}, {"q": "camera"}])
+        with pytest.raises(HTTPException) as raised:
+            await main.search_batch(request)
+        with pytest.raises(RuntimeError):
+            await shared
+        return raised.value
+
+    error = asyncio.run(run())
+    assert error.status_code == 500
+    assert "'food'" in error.detail and "'camera'" in error.detail
@@ -0,0 +1,61 @@
+# FILE: tests/test_benchmarks.py
+import asyncio
+import pytest
+from pymongo.errors import OperationFailure
+from app.config import settings
+from app.services.data_loader import fetch_and_extract_items, fetch_many_services
+from benchmarks.catalog import generate_catalog
+from benchmarks.fake_mongo import FakeMotorClient
+from benchmarks.stub_encoder import StubEncoder
+
+
+@pytest.fixture
+def fake_db(mocker):
+    categories, services = generate_catalog(50, settings.PREDEFINED_CATEGORIES)
+    client = FakeMotorClient()
+    db = client[settings.DATABASE_NAME]
+    db["categories"].load(categories)
+    db[settings.COLLECTION_NAME].load(services)
+    mocker.patch("app.utils.database.db.client", client)
+    return db, services
+
+
+def test_fake_collection_serves_the_loader_pipeline(fake_db):
+    db, services = fake_db
+
+    items = asyncio.run(fetch_and_extract_items())
+    fetched = asyncio.run(fetch_many_services([str(services[3]["_id"])]))
+
+    assert len(items) == 50 + len(settings.PREDEFINED_CATEGORIES)
+    service = fetched[str(services[3]["_id"])]
+    assert service["name"] == services[3]["name"]
+    assert service["category"]["_id"] == str(services[3]["categories"][0])
+    assert "categories" not in service
+
+
+def test_fake_change_stream_replays_and_rejects_unknown_tokens(fake_db):
+    db, services = fake_db
+    collection = db[settings.COLLECTION_NAME]
+
+    async def run():
+        stream = collection.watch()
+        await collection.update_one({"_id": services[0]["_id"]}, {"$set": {"name": "Renamed"}})
+        first = await stream.try_next()
+        await collection.delete_one({"_id": services[1]["_id"]})
+        resumed = collection.watch(resume_after=first["_id"])
+        with pytest.raises(OperationFailure):
+            await collection.watch(resume_after={"_data": "ffff"}).try_next()
+        return first, await resumed.try_next()
+
+    first, resumed = asyncio.run(run())
+    assert first["operationType"] == "update" and first["documentKey"]["_id"] == services[0]["_id"]
+    assert resumed["operationType"] == "delete"
+
+
+def test_stub_encoder_is_deterministic_and_word_sensitive():
+    encoder = StubEncoder(dim=64)
+    vectors = encoder.encode(["wedding photography", "wedding photography", "live music band"])
+
+    assert vectors.shape == (3, 64) and encoder.get_sentence_embedding_dimension() == 64
+    assert (vectors[0] == vectors[1]).all()
+    assert float(vectors[0] @ vectors[2]) != float(vectors[0] @ vectors[1])
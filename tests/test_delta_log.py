@@ -0,0 +1,84 @@
+# FILE: tests/test_delta_log.py
+import asyncio
+import numpy as np
+from app.utils.delta_log import DeltaLog, Snapshotter
+
+
+def test_replay_round_trips_records_and_skips_torn_tail(tmp_path):
+    path = str(tmp_path / "deltas.log")
+    log = DeltaLog(path)
+    log.append_upsert({"_id": "a", "name": "A"}, np.array([0.5, 0.25], dtype="float32"))
+    log.append_delete("b")
+    log.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"op": "upsert", "id": "c"')
+
+    records = list(DeltaLog(path).replay())
+
+    assert [(op, item_id) for op, item_id, _, _ in records] == [("upsert", "a"), ("delete", "b")]
+    assert records[0][2] == {"_id": "a", "name": "A"}
+    assert np.array_equal(records[0][3], [0.5, 0.25])
+
+
+def test_appends_after_a_torn_tail_stay_readable(tmp_path):
+    path = str(tmp_path / "deltas.log")
+    log = DeltaLog(path)
+    log.append_delete("a")
+    log.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"op": "upsert", "id": "torn"')
+
+    log = DeltaLog(path)
+    assert [item_id for _, item_id, _, _ in log.replay()] == ["a"]
+    log.append_delete("b")
+    log.append_upsert({"_id": "c"}, np.zeros(2, dtype="float32"))
+    log.close()
+
+    assert [(op, item_id) for op, item_id, _, _ in DeltaLog(path).replay()] == [
+        ("delete", "a"), ("delete", "b"), ("upsert", "c")]
+
+
+def test_followers_read_past_a_torn_record(tmp_path):
+    path = str(tmp_path / "deltas.log")
+    log = DeltaLog(path)
+    log.append_delete("a")
+    log.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"op": "upsert", "id": "torn"')
+
+    records, position = log.read_from(None)
+    assert [item_id for _, item_id, _, _ in records] == ["a"]
+    assert log.read_from(position) == ([], position)
+
+    # Appended past the torn write, as a writer that never replayed it would.
+    log.append_delete("b")
+    records, position = log.read_from(position)
+    assert [(op, item_id) for op, item_id, _, _ in records] == [("corrupt", None)]
+    log.append_delete("c")
+    records, _ = log.read_from(position)
+    assert [(op, item_id) for op, item_id, _, _ in records] == [("delete", "c")]
+    log.close()
+
+
+def test_snapshotter_compacts_at_size_threshold(tmp_path):
+    log = DeltaLog(str(tmp_path / "deltas.log"))
+    snapshots = []
+
+    async def snapshot():
+        snapshots.append(log.pending)
+        log.truncate()
+
+    async def run():
+        snapshotter = Snapshotter(log, snapshot, interval=60, max_deltas=3)
+        snapshotter.start()
+        for i in range(3):
+            log.append_delete(str(i))
+            snapshotter.notify()
+        await asyncio.sleep(0.05)
+        log.append_delete("tail")
+        await snapshotter.stop()
+
+    asyncio.run(run())
+
+    assert snapshots == [3, 1]
+    assert log.pending == 0
@@ -0,0 +1,35 @@
+# FILE: tests/test_embedding_store.py
+import numpy as np
+from unittest.mock import MagicMock
+from app.models.embedding_store import EmbeddingStore
+
+
+def _encode(items):
+    return np.array([[len(item["name"]), len(item.get("description", "")), 1.0]
+                     for item in items], dtype="float32")
+
+
+def test_rebuild_only_encodes_new_or_changed_items(tmp_path):
+    path = str(tmp_path / "embeddings.npy")
+    items = [{"_id": f"id{i}", "name": f"Service {i}", "description": "x"} for i in range(4)]
+    first, stats = EmbeddingStore(path).embed(items, _encode)
+    assert stats == {"reused": 0, "computed": 4}
+
+    items[1] = {"_id": "id1", "name": "Service 1", "description": "changed"}
+    items.append({"_id": "id4", "name": "New", "description": ""})
+    encode = MagicMock(side_effect=_encode)
+    second, stats = EmbeddingStore(path).embed(items, encode)
+
+    assert stats == {"reused": 3, "computed": 2}
+    assert [item["_id"] for item in encode.call_args[0][0]] == ["id1", "id4"]
+    assert np.array_equal(second[[0, 2, 3]], first[[0, 2, 3]])
+    assert np.array_equal(second, _encode(items))
+
+
+def test_vectors_of_another_encoder_are_not_reused(tmp_path):
+    path = str(tmp_path / "embeddings.npy")
+    items = [{"_id": "id0", "name": "Service 0"}]
+    EmbeddingStore(path, model_name="some/model").embed(items, _encode)
+
+    _, stats = EmbeddingStore(path, model_name="some/model@onnx-int8").embed(items, _encode)
+    assert stats == {"reused": 0, "computed": 1}
@@ -0,0 +1,80 @@
+# FILE: tests/test_encoder.py
+import asyncio
+import numpy as np
+import pytest
+from unittest.mock import MagicMock
+from app.services.encoder import BatchQueryEncoder, QueryEmbeddingCache
+
+
+def _fake_model(dim=8):
+    model = MagicMock()
+    model.encode.side_effect = lambda texts, **kwargs: np.random.rand(
+        len(texts), dim).astype("float32")
+    return model
+
+
+@pytest.fixture(autouse=True)
+def fresh_query_cache(mocker):
+    mocker.patch("app.services.encoder.query_embedding_cache",
+                 QueryEmbeddingCache(maxsize=10))
+
+
+def test_concurrent_queries_share_one_encode_call(mocker):
+    model = _fake_model()
+    mocker.patch("app.services.encoder.get_model", return_value=model)
+    encoder = BatchQueryEncoder(max_batch_size=16, max_wait_ms=20)
+
+    async def run():
+        results = await asyncio.gather(*(encoder.encode(f"q{i}") for i in range(5)))
+        await encoder.stop()
+        return results
+
+    results = asyncio.run(run())
+
+    assert model.encode.call_count == 1
+    assert all(r.shape == (1, 8) for r in results)
+    assert all(np.isclose(np.linalg.norm(r), 1.0) for r in results)
+
+
+def test_batches_are_capped_at_max_size(mocker):
+    model = _fake_model()
+    mocker.patch("app.services.encoder.get_model", return_value=model)
+    encoder = BatchQueryEncoder(max_batch_size=2, max_wait_ms=20)
+
+    async def run():
+        await asyncio.gather(*(encoder.encode(f"q{i}") for i in range(5)))
+        await encoder.stop()
+
+    asyncio.run(run())
+
+    assert model.encode.call_count == 3
+
+
+def test_query_cache_normalizes_and_counts(mocker):
+    model = _fake_model()
+    mocker.patch("app.services.encoder.get_model", return_value=model)
+    from app.services import encoder
+
+    first = encoder.encode_query("Wedding  DJ")
+    second = encoder.encode_query("  wedding dj ")
+
+    assert model.encode.call_count == 1
+    assert np.array_equal(first, second)
+    assert encoder.query_embedding_cache.hits == 1
+    assert encoder.query_embedding_cache.misses == 1
+
+
+def test_query_cache_evicts_lru_and_round_trips(tmp_path):
+    cache = QueryEmbeddingCache(maxsize=2)
+    for i, key in enumerate(["a", "b", "c"]):
+        cache.put(key, np.full(4, i, dtype="float32"))
+    cache.get("b")
+
+    path = str(tmp_path / "query_cache.npz")
+    cache.save(path, model_name="m")
+    restored = QueryEmbeddingCache(maxsize=2)
+
+    assert restored.load(path, model_name="m")
+    assert restored.get("a") is None
+    assert restored.get("c")[0] == 2
+    assert not QueryEmbeddingCache().load(path, model_name="other")
@@ -0,0 +1,45 @@
+# FILE: tests/test_encoder_backends.py
+import json
+import numpy as np
+import pytest
+from unittest.mock import MagicMock
+from app.services import encoder_backends
+from app.services.encoder_backends import parity_check, resolve_backend
+
+
+def _model(vectors):
+    model = MagicMock()
+    model.encode.side_effect = lambda texts, **kwargs: vectors[:len(texts)]
+    return model
+
+
+@pytest.fixture(autouse=True)
+def export_dir(tmp_path, mocker):
+    mocker.patch.object(encoder_backends.settings, "ENCODER_EXPORT_DIR", str(tmp_path))
+    resolve_backend.cache_clear()
+    yield tmp_path
+    resolve_backend.cache_clear()
+
+
+def test_parity_check_reports_cosine_and_recall():
+    rng = np.random.default_rng(0)
+    reference = rng.standard_normal((50, 16)).astype("float32")
+    texts = [f"text {i}" for i in range(50)]
+
+    close = parity_check(_model(reference + 0.001), _model(reference), texts, k=5)
+    assert close["passed"] and close["mean_cosine"] > 0.999 and close["recall_at_k"] > 0.99
+
+    unrelated = parity_check(_model(rng.standard_normal((50, 16))), _model(reference), texts, k=5)
+    assert not unrelated["passed"] and unrelated["recall_at_k"] < 0.5
+
+
+def test_backend_is_only_enabled_by_a_passing_parity_report(mocker, export_dir):
+    mocker.patch.object(encoder_backends.settings, "ENCODER_BACKEND", "onnx-int8")
+    assert resolve_backend("some/model") == "torch"
+
+    report_dir = export_dir / "some--model"
+    report_dir.mkdir()
+    (report_dir / "parity-onnx-int8.json").write_text(json.dumps({"passed": True}))
+    resolve_backend.cache_clear()
+    assert resolve_backend("some/model") == "onnx-int8"
+    assert encoder_backends.encoder_id("some/model") == "some/model@onnx-int8"
@@ -0,0 +1,53 @@
+# FILE: tests/test_exact_vectors.py
+import numpy as np
+from app.models.exact_vectors import ExactVectors
+from app.models.faiss_manager import FaissManager, id_to_int
+
+
+def test_quantized_search_is_reranked_exactly(unit_vectors):
+    vectors = unit_vectors(1500, 16)
+    items = [{"_id": f"item-{i}"} for i in range(1500)]
+    fm = FaissManager(dim=16, index_type="ivfpq")
+    fm.build_index(items, vectors)
+
+    query = vectors[:1]
+    distances, labels = fm.search(query, k=20)
+    by_label = {id_to_int(item["_id"]): i for i, item in enumerate(items)}
+    exact = np.array([vectors[by_label[label]] @ query[0] for label in labels[0]])
+
+    np.testing.assert_allclose(distances[0], exact, atol=1e-2)
+    assert np.all(np.diff(distances[0]) <= 0)
+    assert labels[0][0] == id_to_int("item-0")
+
+
+def test_upserts_removals_and_round_trip(tmp_path, unit_vectors):
+    vectors = unit_vectors(4, 16)
+    store = ExactVectors(16, np.array([1, 2, 3]), vectors[:3])
+    store.upsert(np.array([2, 9]), vectors[[3, 0]])
+    store.remove(np.array([1]))
+
+    scores = store.rescore(vectors[:1], np.array([[9, 2, 1, -1]]))
+    assert scores[0][0] > 0.99
+    np.testing.assert_allclose(scores[0][1], vectors[3] @ vectors[0], atol=1e-2)
+    assert np.isneginf(scores[0][2:]).all()
+
+    path = str(tmp_path / "faiss.index.vectors.npy")
+    assert store.save(path)
+    loaded = ExactVectors.load(path, 16)
+    assert len(loaded) == 3
+    np.testing.assert_allclose(loaded.rescore(vectors[:1], np.array([[9, 3]])),
+                               store.rescore(vectors[:1], np.array([[9, 3]])))
+
+
+def test_repeated_updates_reuse_freed_rows(unit_vectors):
+    vectors = unit_vectors(8, 16)
+    store = ExactVectors(16, np.arange(4), vectors[:4])
+    for i in range(100):
+        # FaissManager.update_items removes and re-adds every changed label.
+        store.remove(np.array([2, 10]))
+        store.upsert(np.array([2, 10]), vectors[[i % 8, (i + 1) % 8]])
+
+    assert len(store) == 5
+    assert store._overflow_size == 1
+    np.testing.assert_allclose(store.rescore(vectors[3:4], np.array([[10]])),
+                               [[vectors[100 % 8] @ vectors[3]]], atol=1e-2)
@@ -0,0 +1,73 @@
+# FILE: tests/test_filters.py
+import asyncio
+import numpy as np
+import pytest
+from app.models.faiss_manager import FaissManager, id_to_int
+from app.models.filter_index import FilterIndex, SearchFilters
+from app.utils.item_columns import ItemColumns, write_item_columns
+
+ITEMS = [
+    {"_id": "s1", "name": "Spice Route", "priceInfo": {"min": 500, "max": 900}, "avgRating": 4.5,
+     "category": {"_id": "c", "name": "Catering"}},
+    {"_id": "s2", "name": "Tandoor Tales", "priceInfo": 1500, "avgRating": 3.9,
+     "category": {"_id": "c", "name": "Catering"}},
+    {"_id": "s3", "name": "Lens Story", "priceInfo": {"min": 700}, "avgRating": 4.8,
+     "category": {"_id": "p", "name": "Photography"}},
+    {"_id": "catering", "name": "Catering", "isCategory": True},
+]
+
+
+def _labels(*item_ids):
+    return sorted(id_to_int(item_id) for item_id in item_ids)
+
+
+@pytest.mark.parametrize("from_columns", [False, True])
+def test_allowed_intersects_attributes_and_tracks_updates(tmp_path, from_columns):
+    items = ITEMS
+    if from_columns:
+        write_item_columns(ITEMS, str(tmp_path / "items.bin"))
+        items = ItemColumns(str(tmp_path / "items.bin"))
+    index = FilterIndex(items, max_unsorted=1)
+
+    assert index.allowed(SearchFilters()) is None
+    assert index.allowed(SearchFilters(category="catering")).tolist() == _labels("s1", "s2", "catering")
+    assert index.allowed(SearchFilters(category="Catering", max_price=1000)).tolist() == _labels("s1")
+    assert index.allowed(SearchFilters(min_rating=4.6)).tolist() == _labels("s3")
+
+    index.upsert({**ITEMS[1], "priceInfo": 800, "avgRating": 4.9})
+    index.remove("s3")
+    assert index.allowed(SearchFilters(max_price=1000)).tolist() == _labels("s1", "s2")
+    assert index.allowed(SearchFilters(min_rating=4.6)).tolist() == _labels("s2")
+
+
+@pytest.mark.parametrize("index_type", ["ivfflat", "hnsw", "flat"])
+def test_filtered_index_search_only_returns_allowed_labels(index_type, unit_vectors):
+    vectors = unit_vectors(3000, 16)
+    items = [{"_id": f"item-{i}"} for i in range(3000)]
+    fm = FaissManager(dim=16, index_type=index_type)
+    fm.build_index(items, vectors)
+
+    allowed = np.array(sorted(id_to_int(f"item-{i}") for i in (5, 1200, 2999)), dtype=np.int64)
+    _, labels = fm.search(vectors[1200:1201], k=10, allowed=allowed)
+
+    found = labels[0][labels[0] >= 0]
+    assert set(found) == set(allowed.tolist())
+    assert found[0] == id_to_int("item-1200")
+
+
+def test_engine_search_filters_and_pages(flat_engine, fixed_query_encoding):
+    engine = flat_engine(ITEMS, np.eye(4, dtype="float32"))
+    fixed_query_encoding([0.6, 0.5, 0.4, 0.1])
+
+    def ids(results, key):
+        return [r["item"]["_id"] for r in results[key]]
+
+    first = asyncio.run(engine.search("food", SearchFilters(category="catering"), 0, 1))
+    second = asyncio.run(engine.search("food", SearchFilters(category="catering"), 1, 1))
+    assert ids(first, "services") == ["s1"] and ids(first, "categories") == ["catering"]
+    assert ids(second, "services") == ["s2"] and ids(second, "categories") == []
+
+    cheap = asyncio.run(engine.search("food", SearchFilters(max_price=800)))
+    assert ids(cheap, "services") == ["s1", "s3"]
+    assert asyncio.run(engine.search("food", SearchFilters(category="DJs"))) == {
+        "categories": [], "services": []}
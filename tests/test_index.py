@@ -1,33 +1,35 @@
 # FILE: tests/test_index.py
 import numpy as np
 import pytest
-from app.models.faiss_manager import FaissManager
+from app.models.faiss_manager import FaissManager, id_to_int
 
 
 def test_faiss_flat_ip_build_and_search():
     dim = 8
     num_vectors = 100
-    fm = FaissManager(dim)
+    fm = FaissManager(dim, index_type="flat")
 
     vectors = np.random.randn(num_vectors, dim).astype('float32')
     vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    items = [{"_id": f"item-{i}"} for i in range(num_vectors)]
 
-    fm.build_index_flat_ip(vectors)
+    fm.build_index(items, vectors)
 
     assert fm.index is not None
     assert fm.index.ntotal == num_vectors
 
     query_vector = vectors[:1]
-    distances, indices = fm.search(query_vector, k=3)
+    distances, labels = fm.search(query_vector, k=3)
 
-    assert indices.shape == (1, 3)
-    assert indices[0][0] == 0
+    assert labels.shape == (1, 3)
+    assert labels[0][0] == id_to_int("item-0")
     assert pytest.approx(distances[0][0], 1e-6) == 1.0
 
 
-def test_search_before_build_raises_error():
+def test_search_before_build_returns_no_results():
     fm = FaissManager(dim=4)
     query = np.random.rand(1, 4).astype('float32')
 
-    with pytest.raises(RuntimeError, match="Index not built"):
-        fm.search(query)
+    distances, labels = fm.search(query)
+
+    assert labels.size == 0 and distances.size == 0
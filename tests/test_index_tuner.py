@@ -0,0 +1,54 @@
+# FILE: tests/test_index_tuner.py
+import faiss
+import pytest
+from app.models.faiss_manager import FaissManager, id_to_int
+from app.models.index_tuner import autotune
+
+
+def _items(n):
+    return [{"_id": f"item-{i}"} for i in range(n)]
+
+
+@pytest.mark.parametrize("index_type", ["flat", "ivfflat", "ivfpq", "sq8", "hnsw"])
+def test_index_types_build_and_search(index_type, unit_vectors):
+    vectors = unit_vectors(1200, 16)
+    fm = FaissManager(dim=16, index_type=index_type)
+    fm.build_index(_items(1200), vectors)
+
+    assert fm.config["type"] == index_type
+    assert fm.index.ntotal == 1200
+    _, labels = fm.search(vectors[:1], k=5)
+    assert id_to_int("item-0") in labels[0]
+
+
+def test_search_params_reach_index_under_idmap(unit_vectors):
+    fm = FaissManager(dim=16, index_type="ivfflat")
+    fm.build_index(_items(1200), unit_vectors(1200, 16))
+    assert faiss.extract_index_ivf(fm.index).nprobe == fm.config["nprobe"]
+
+
+def test_autotune_meets_recall_target(unit_vectors):
+    config = autotune(unit_vectors(3000, 16), 16, families=["ivfflat", "hnsw"],
+                      recall_target=0.9, k=10, sample_size=50)
+    assert config["type"] in ("ivfflat", "hnsw")
+    assert config["tuned"]["recall"] >= 0.9
+
+
+def test_hnsw_changes_survive_save_and_load(tmp_path, unit_vectors):
+    vectors = unit_vectors(200, 16)
+    fm = FaissManager(dim=16, index_type="hnsw")
+    fm.build_index(_items(200), vectors)
+    fm.remove_items(["item-0"])
+    fm.update_items([{"_id": "item-1"}], vectors[2:3])
+
+    _, labels = fm.search(vectors[:1], k=3)
+    assert id_to_int("item-0") not in labels[0]
+
+    path = str(tmp_path / "faiss.index")
+    assert fm.save(path)
+    loaded = FaissManager(dim=16, index_type="flat")
+    assert loaded.load(path)
+    assert loaded.config["type"] == "hnsw"
+    assert loaded.index.ntotal == 199
+    _, labels = loaded.search(vectors[2:3], k=2)
+    assert set(labels[0]) == {id_to_int("item-1"), id_to_int("item-2")}
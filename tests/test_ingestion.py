@@ -0,0 +1,67 @@
+# FILE: tests/test_ingestion.py
+import asyncio
+from app.services.ingestion import ChangeIngestor
+
+
+def test_events_are_coalesced_and_deduplicated():
+    batches = []
+
+    async def apply_batch(changes, resume_token):
+        batches.append((changes, resume_token))
+
+    async def run():
+        ingestor = ChangeIngestor(apply_batch, window_ms=20, max_batch=100)
+        ingestor.start()
+        ingestor.submit("a", "insert", {"_data": "1"})
+        ingestor.submit("b", "update", {"_data": "2"})
+        ingestor.submit("a", "delete", {"_data": "3"})
+        await asyncio.sleep(0.1)
+        await ingestor.stop()
+
+    asyncio.run(run())
+
+    assert batches == [({"b": "update", "a": "delete"}, {"_data": "3"})]
+
+
+def test_full_batch_flushes_before_window_and_stop_drains():
+    batches = []
+
+    async def apply_batch(changes, resume_token):
+        batches.append((list(changes), resume_token))
+
+    async def run():
+        ingestor = ChangeIngestor(apply_batch, window_ms=10_000, max_batch=2)
+        ingestor.start()
+        for i, doc_id in enumerate(["a", "b", "c"]):
+            ingestor.submit(doc_id, "update", i)
+        await asyncio.sleep(0.05)
+        await ingestor.stop()
+
+    asyncio.run(run())
+
+    assert batches == [(["a", "b"], 1), (["c"], 2)]
+
+
+def test_failed_batch_is_retried_and_holds_back_resume_tokens():
+    batches = []
+    failures = [RuntimeError("mongo unavailable")]
+
+    async def apply_batch(changes, resume_token):
+        if failures:
+            raise failures.pop()
+        batches.append((list(changes), resume_token))
+
+    async def run():
+        ingestor = ChangeIngestor(apply_batch, window_ms=5, max_batch=2, retry_base_ms=20)
+        ingestor.start()
+        ingestor.submit("a", "update", 1)
+        ingestor.submit("b", "update", 2)
+        await asyncio.sleep(0.01)
+        ingestor.submit("c", "update", 3)
+        await asyncio.sleep(0.1)
+        await ingestor.stop()
+
+    asyncio.run(run())
+
+    # The failed ids are applied first, and no token was persisted while they were pending.
+    assert batches == [(["a", "b"], None), (["c"], 3)]
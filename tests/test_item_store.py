@@ -0,0 +1,90 @@
+# FILE: tests/test_item_store.py
+import numpy as np
+from app.models.faiss_manager import id_to_int
+from app.models.item_store import ItemStore
+
+
+def _items(n):
+    return [{"_id": f"id{i}", "name": f"Item {i}"} for i in range(n)]
+
+
+def test_resolve_maps_faiss_labels_to_items():
+    store = ItemStore(_items(5))
+    labels = np.array([id_to_int("id3"), -1, id_to_int("missing"), id_to_int("id0")])
+
+    items = store.lookup(labels)
+
+    assert [item and item["_id"] for item in items] == ["id3", None, None, "id0"]
+
+
+def test_upsert_remove_and_compaction():
+    store = ItemStore(_items(8), compact_ratio=0.5, max_unsorted=2)
+
+    store.upsert({"_id": "id1", "name": "Renamed"})
+    store.upsert({"_id": "new", "name": "New"})
+    assert store.get("id1")["name"] == "Renamed"
+    assert store.lookup([id_to_int("new")])[0]["name"] == "New"
+
+    for i in range(4):
+        store.remove(f"id{i}")
+    assert len(store) == 5
+    assert store.lookup([id_to_int("id2")]) == [None]
+
+    store.remove("id4")
+    assert store._tombstones == 0
+    assert sorted(item["_id"] for item in store) == ["id5", "id6", "id7", "new"]
+    assert store.lookup([id_to_int("id7")])[0]["_id"] == "id7"
+
+
+def test_readded_item_resolves_after_tombstone():
+    store = ItemStore(_items(3))
+    store.remove("id1")
+    store.upsert({"_id": "id1", "name": "Back"})
+
+    assert store.lookup([id_to_int("id1")])[0]["name"] == "Back"
+
+
+def test_store_over_item_columns_hydrates_lazily(tmp_path):
+    from app.utils.item_columns import ItemColumns, write_item_columns
+    path = str(tmp_path / "items.bin")
+    write_item_columns([
+        {"_id": "s1", "name": "DJ Beats", "description": "Party DJ", "avgRating": 4.5,
+         "priceInfo": {"min": 100}, "category": {"_id": "c1", "name": "DJs"}},
+        {"_id": "djs", "name": "DJs", "isCategory": True},
+    ], path)
+    store = ItemStore(ItemColumns(path))
+
+    assert store._items == [0, 1]
+    item = store.lookup([id_to_int("s1")])[0]
+    assert item == {"_id": "s1", "name": "DJ Beats", "description": "Party DJ",
+                    "priceInfo": {"min": 100}, "avgRating": 4.5,
+                    "category": {"_id": "c1", "name": "DJs"}}
+
+    store.upsert({"_id": "s1", "name": "Edited"})
+    store.remove("djs")
+    store.compact()
+    assert [i["name"] for i in store] == ["Edited"]
+
+
+def test_snapshot_rows_round_trip_without_hydrating(tmp_path, mocker):
+    from app.utils.item_columns import ItemColumns, ItemRecord, write_item_rows
+    items = [{"_id": "s1", "name": "DJ Beats", "avgRating": 4.5, "priceInfo": {"min": 100},
+              "category": {"_id": "c1", "name": "DJs"}},
+             {"_id": "s2", "name": "Spice Route", "category": {"_id": "c2", "name": "Catering"}},
+             {"_id": "djs", "name": "DJs", "isCategory": True}]
+    store = ItemStore(items)
+    store.upsert({"_id": "s2", "name": "Spice Route", "description": "Thalis", "priceInfo": 250,
+                  "category": {"_id": "c2", "name": "Catering"}})
+    store.upsert({"_id": "new", "name": "New", "category": {"_id": "c1", "name": "DJs"}})
+    store.remove("djs")
+    expected = list(store)
+
+    hydrate = mocker.patch.object(ItemRecord, "item")
+    path = str(tmp_path / "items.bin")
+    write_item_rows(store.rows(), path)
+    hydrate.assert_not_called()
+
+    columns = ItemColumns(path)
+    assert [columns.item(row) for row in range(len(columns))] == expected
+    assert columns.prices.tolist() == [100.0, 250.0, 0.0]
+    assert len(columns.categories) == 2
@@ -0,0 +1,58 @@
+# FILE: tests/test_lexical.py
+import asyncio
+import numpy as np
+from app.services.lexical import LexicalIndex
+
+ITEMS = [
+    {"_id": "c1", "name": "DJs", "isCategory": True},
+    {"_id": "s1", "name": "Royal Wedding DJs", "description": "Sound for weddings",
+     "category": {"name": "DJs"}},
+    {"_id": "s2", "name": "Spice Route", "description": "North Indian catering",
+     "category": {"name": "Catering"}},
+    {"_id": "s3", "name": "Lens Story", "description": "Candid wedding photography",
+     "category": {"name": "Photography"}},
+]
+
+
+def test_bm25_ranks_and_updates_incrementally():
+    index = LexicalIndex(ITEMS)
+
+    assert [item_id for item_id, _ in index.search("wedding")] == ["s1", "s3"]
+    assert index.exact_matches("djs") == ["c1"]
+
+    index.upsert({"_id": "s3", "name": "Lens Story", "description": "Candid portraits"})
+    index.remove("s1")
+    assert index.search("wedding") == []
+    assert index.exact_matches("royal wedding djs") == []
+
+
+def test_common_terms_only_rescore_items_rarer_terms_matched():
+    items = [{"_id": f"s{i}", "name": f"Studio {i}", "description": "wedding photographer in delhi"}
+             for i in range(8)]
+    items.append({"_id": "jaipur", "name": "Pink City Studio", "description": "photographer in jaipur"})
+    index = LexicalIndex(items, max_df=0.5)
+
+    assert [item_id for item_id, _ in index.search("wedding photographer in jaipur")] == ["jaipur"]
+    # With no rarer term, common terms are scored as usual.
+    assert len(index.search("wedding photographer")) == 9
+    assert index.search("photographer jaipur")[0][1] > index.search("jaipur")[0][1]
+
+
+def test_exact_name_query_skips_the_encoder(flat_engine, fixed_query_encoding):
+    encode, _ = fixed_query_encoding(np.eye(4, dtype="float32")[0])
+
+    results = asyncio.run(flat_engine(ITEMS, np.eye(4, dtype="float32")).search("DJs"))
+
+    encode.assert_not_called()
+    assert [r["item"]["_id"] for r in results["categories"]] == ["c1"]
+    assert [r["item"]["_id"] for r in results["services"]] == ["s1"]
+
+
+def test_dense_and_lexical_candidates_are_fused(flat_engine, fixed_query_encoding):
+    fixed_query_encoding([0.0, 0.0, 1.0, 0.0])
+
+    results = asyncio.run(flat_engine(ITEMS, np.eye(4, dtype="float32")).search("photography weddings"))
+
+    services = [r["item"]["_id"] for r in results["services"]]
+    assert services[0] == "s3"
+    assert results["services"][0]["score"] > results["services"][1]["score"]
@@ -0,0 +1,46 @@
+# FILE: tests/test_memory.py
+import numpy as np
+from app.models.faiss_manager import FaissManager
+from app.models.item_store import ItemStore
+from app.services.hybrid_search import HybridSearchEngine
+from app.utils.item_columns import ItemRecord
+from app.utils.memory import deep_sizeof
+
+
+def test_deep_sizeof_counts_shared_objects_once_and_samples_long_containers():
+    shared = "x" * 10_000
+    assert deep_sizeof([shared, shared]) < deep_sizeof([shared, "y" * 10_000])
+
+    nested = {f"k{i}": {"name": f"value {i}" * 10} for i in range(5000)}
+    exact = deep_sizeof(nested, sample=10_000)
+    assert abs(deep_sizeof(nested, sample=100) - exact) < 0.1 * exact
+
+
+def test_upserts_are_stored_as_records_sharing_category_dicts():
+    store = ItemStore([])
+    category = {"_id": "c1", "name": "Catering"}
+    store.upsert({"_id": "a", "name": "A", "category": dict(category), "avgRating": 4.5, "tags": ["x"]})
+    store.upsert({"_id": "b", "name": "B", "category": dict(category)})
+
+    assert all(isinstance(entry, ItemRecord) for entry in store._items)
+    assert store._items[0].category is store._items[1].category
+    assert store.get("a") == {"_id": "a", "name": "A", "category": category, "avgRating": 4.5, "tags": ["x"]}
+
+
+def test_memory_report_covers_every_structure():
+    items = [{"_id": f"s{i}", "name": f"Service number {i}", "description": "Wedding catering"}
+             for i in range(200)]
+    fm = FaissManager(dim=8, index_type="flat")
+    fm.build_index(items, np.random.default_rng(0).random((200, 8), dtype="float32"))
+    engine = HybridSearchEngine(fm, items)
+
+    report = engine.memory_report()
+
+    assert report["items"] == 200
+    structures = report["structures"]
+    assert structures["vectors.index"]["bytes"] >= 200 * 8 * 4
+    assert structures["item_store.columns_in_memory"]["bytes"] > 0
+    # The lexical and autocomplete indexes hold per-term postings, so they grow with the catalog.
+    assert structures["lexical"]["bytes_per_item"] > 100
+    assert structures["autocomplete"]["bytes_per_item"] > 100
+    assert report["total_bytes"] == sum(s["bytes"] for name, s in structures.items() if not name.endswith("_mapped"))
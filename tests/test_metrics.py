@@ -0,0 +1,46 @@
+# FILE: tests/test_metrics.py
+import asyncio
+import numpy as np
+from fastapi import Response
+from app import main
+from app.utils.metrics import Histogram, Counter, SEARCH_STAGE_SECONDS
+
+
+def test_histogram_and_counter_render_prometheus_text():
+    histogram = Histogram("test_seconds", "Test latency.", ("stage",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, stage="encode")
+    histogram.observe(0.5, stage="encode")
+    counter = Counter("test_total", "Test count.", ("result",))
+    counter.inc(result="hit")
+
+    lines = histogram.render() + counter.render()
+
+    assert "# TYPE test_seconds histogram" in lines
+    assert 'test_seconds_bucket{stage="encode",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{stage="encode",le="+Inf"} 2' in lines
+    assert 'test_seconds_count{stage="encode"} 2' in lines
+    assert 'test_total{result="hit"} 1.0' in lines
+
+
+def test_search_records_every_stage(flat_engine, fixed_query_encoding):
+    items = [{"_id": f"s{i}", "name": f"Service {i}"} for i in range(4)]
+    engine = flat_engine(items, np.eye(4, dtype="float32"))
+    fixed_query_encoding([1.0, 0.0, 0.0, 0.0])
+
+    stages = ("encode", "faiss", "scoring", "separation", "serialization")
+    before = {stage: SEARCH_STAGE_SECONDS.count(stage=stage) for stage in stages}
+    engine.render("anything", asyncio.run(engine.search("anything")))
+
+    assert all(SEARCH_STAGE_SECONDS.count(stage=stage) == before[stage] + 1 for stage in stages)
+
+
+def test_readiness_probe_reports_state_without_searching(mocker):
+    mocker.patch.object(main, "hybrid_engine", None)
+    response = Response()
+    assert asyncio.run(main.readiness(response)).status == "initializing"
+    assert response.status_code == 503
+    assert asyncio.run(main.liveness()).status == "ok"
+
+    body = asyncio.run(main.metrics_endpoint()).body.decode()
+    assert "# TYPE search_stage_seconds histogram" in body
+    assert 'search_cache_hit_ratio{cache="response"}' in body
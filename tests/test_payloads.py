@@ -0,0 +1,33 @@
+# FILE: tests/test_payloads.py
+import json
+from datetime import datetime
+from app.models.item_store import ItemStore
+from app.models.pydantic_models import SearchResponse
+from app.utils.payloads import render_search_response
+
+
+def test_spliced_response_matches_the_pydantic_model():
+    items = [
+        {"_id": "s1", "name": "Spice Route", "description": "Ünïcode \"quoted\"",
+         "priceInfo": {"min": 500}, "category": {"_id": "c", "name": "Catering"}},
+        {"_id": "c1", "name": "Catering", "isCategory": True},
+    ]
+    store = ItemStore(items)
+    categories = [{"item": items[1], "score": 1.1}]
+    services = [{"item": items[0], "score": 0.25}]
+
+    body = render_search_response("spicy food", categories, services, store.fragment)
+
+    expected = SearchResponse(query="spicy food", categories=categories, services=services)
+    assert json.loads(body) == expected.model_dump()
+
+
+def test_fragments_follow_upserts_and_file_rows():
+    store = ItemStore([{"_id": "s1", "name": "Old"}])
+    store.upsert({"_id": "s1", "name": "New", "updatedAt": datetime(2024, 1, 2)})
+    store.upsert({"_id": "s2", "name": "Added"})
+
+    assert json.loads(store.fragment("s1")) == {"_id": "s1", "name": "New", "updatedAt": "2024-01-02T00:00:00"}
+    assert json.loads(store.fragment("s2"))["name"] == "Added"
+    store.remove("s2")
+    assert store.fragment("s2") is None
@@ -0,0 +1,20 @@
+# FILE: tests/test_rebuild.py
+import numpy as np
+from app.models.embedding_store import EmbeddingStore
+from app.services.rebuild import RebuildJob, build_engine
+
+
+def test_build_engine_reports_progress_and_builds_independent_engine(tmp_path, mocker):
+    mocker.patch("app.services.rebuild.create_blended_embeddings",
+                 side_effect=lambda items: np.random.rand(len(items), 8).astype("float32"))
+    mocker.patch("app.services.rebuild.settings.REBUILD_ENCODE_CHUNK", 2)
+    items = [{"_id": f"id{i}", "name": f"Service {i}"} for i in range(5)]
+    job = RebuildJob()
+
+    engine, stats = build_engine(items, 8, EmbeddingStore(str(tmp_path / "e.npy")), job)
+
+    assert stats == {"reused": 0, "computed": 5}
+    assert engine.fm.index.ntotal == 5 and len(engine.store) == 5
+    assert job.stage == "indexing" and 0.8 < job.progress < 1.0
+    job.finish()
+    assert job.to_dict()["status"] == "succeeded" and job.progress == 1.0
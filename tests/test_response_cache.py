@@ -0,0 +1,166 @@
+# FILE: tests/test_response_cache.py
+import asyncio
+import json
+import sqlite3
+import time
+import numpy as np
+from app import main
+from app.utils.delta_log import DeltaLog
+from app.utils.response_cache import ResponseCache, SingleFlight
+from app.utils.snapshots import SnapshotDirectory
+
+
+def test_entries_are_scoped_to_their_generation():
+    cache = ResponseCache(maxsize=10, ttl=60)
+    assert cache.generation is None
+    cache.set("q", b"unidentified", None)
+    assert asyncio.run(cache.get("q")) is None
+
+    first = asyncio.run(cache.bump())
+    cache.set("q", b"first", first)
+    assert asyncio.run(cache.get("q")) == b"first"
+
+    second = asyncio.run(cache.bump())
+    assert second != first and asyncio.run(cache.get("q")) is None
+    # Computed before the bump: dropped rather than stored as current.
+    cache.set("q", b"stale", first)
+    assert asyncio.run(cache.get("q")) is None
+
+
+def test_workers_share_entries_and_generations_through_the_store(tmp_path):
+    path = str(tmp_path / "responses.db")
+    writer, reader = ResponseCache(path=path), ResponseCache(path=path)
+    key = ("q", None, 0, 10, 5)
+
+    async def bump_and_store():
+        bumping = asyncio.ensure_future(writer.bump())
+        await asyncio.sleep(0)
+        # Bypassed while the store allocates the generation.
+        assert writer.generation is None
+        generation = await bumping
+        writer.set(key, b"body", generation)
+        return generation
+
+    generation = asyncio.run(bump_and_store())
+    # Shared writes are queued; closing the writer lets them land.
+    writer.close()
+    assert asyncio.run(reader.get(key)) is None
+    reader.adopt(generation)
+    assert asyncio.run(reader.get_many([key, "other"])) == [b"body", None]
+
+    # A promoted writer never reuses a generation, even across processes.
+    assert asyncio.run(ResponseCache(path=path).bump()) > generation
+    reader.adopt(None)
+    assert asyncio.run(reader.get(key)) is None
+    reader.close()
+
+
+def test_a_locked_store_reads_as_a_miss(tmp_path):
+    path = str(tmp_path / "responses.db")
+    writer, reader = ResponseCache(path=path), ResponseCache(path=path, read_timeout_ms=10)
+    generation = asyncio.run(writer.bump())
+    writer.set("q", b"body", generation)
+    writer.close()
+    reader.adopt(generation)
+
+    locker = sqlite3.connect(path)
+    locker.execute("PRAGMA locking_mode=EXCLUSIVE")
+    locker.execute("BEGIN EXCLUSIVE")
+    locker.execute("DELETE FROM meta")
+    started = time.monotonic()
+    assert asyncio.run(reader.get("q")) is None
+    assert time.monotonic() - started < 1.0
+
+    locker.rollback()
+    locker.close()
+    assert asyncio.run(reader.get("q")) == b"body"
+    reader.close()
+
+
+def test_single_flight_runs_concurrent_calls_once():
+    flight = SingleFlight()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return b"result"
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def run():
+        results = await asyncio.gather(*(flight.do("k", compute) for _ in range(10)))
+        errors = await asyncio.gather(*(flight.do("e", fail) for _ in range(3)), return_exceptions=True)
+        return results, errors
+
+    results, errors = asyncio.run(run())
+    assert results == [b"result"] * 10 and len(calls) == 1
+    assert all(isinstance(error, ValueError) for error in errors)
+    assert len(flight) == 0
+
+
+def test_single_flight_survives_a_cancelled_leader():
+    flight = SingleFlight()
+
+    async def compute():
+        await asyncio.sleep(0.02)
+        return b"result"
+
+    async def run():
+        leader = asyncio.ensure_future(flight.do("k", compute))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(flight.do("k", compute))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await waiter, leader.cancelled()
+
+    assert asyncio.run(run()) == (b"result", True)
+    assert len(flight) == 0
+
+
+def test_followers_take_the_generation_of_the_last_complete_batch(tmp_path):
+    snapshots = SnapshotDirectory(str(tmp_path / "snapshots"))
+    version = snapshots.publish(lambda *paths: True, generation=3)
+    assert snapshots.generation(version) == 3
+
+    log = DeltaLog(str(tmp_path / "deltas.log"))
+    log.append_delete("a")
+    log.append_generation(7)
+    records, position = log.read_from(None)
+    assert main._generation_after(records, 3) == 7
+    assert log.pending == 1
+
+    log.append_delete("b")
+    records, _ = log.read_from(position)
+    assert main._generation_after(records, 7) is None
+    assert main._generation_after([], 7) == 7
+    log.close()
+
+
+def test_search_coalesces_normalized_misses_and_invalidates_on_change(mocker, flat_engine, fixed_query_encoding):
+    items = [{"_id": f"s{i}", "name": f"Service {i}"} for i in range(4)]
+    cache = ResponseCache(maxsize=10, ttl=60)
+    asyncio.run(cache.bump())
+    mocker.patch.object(main, "hybrid_engine", flat_engine(items, np.eye(4, dtype="float32")))
+    mocker.patch.object(main, "response_cache", cache)
+    # Slow enough that both concurrent searches miss before either finishes.
+    encoder, _ = fixed_query_encoding([1.0, 0.0, 0.0, 0.0], delay=0.01)
+
+    def search(q):
+        return main.search(q, category=None, min_price=None, max_price=None, min_rating=None, offset=0, limit=50)
+
+    async def run():
+        return await asyncio.gather(search("wedding  Food"), search("WEDDING food"))
+
+    responses = asyncio.run(run())
+    assert encoder.call_count == 1
+    assert [json.loads(r.body)["query"] for r in responses] == ["wedding  Food", "WEDDING food"]
+    assert json.loads(responses[0].body)["services"] == json.loads(responses[1].body)["services"]
+
+    asyncio.run(search("wedding food"))
+    assert encoder.call_count == 1
+    asyncio.run(cache.bump())
+    asyncio.run(search("wedding food"))
+    assert encoder.call_count == 2
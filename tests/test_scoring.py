@@ -0,0 +1,78 @@
+# FILE: tests/test_scoring.py
+import asyncio
+import numpy as np
+from app.models.faiss_manager import FaissManager, id_to_int
+
+
+def _catalog(n_services):
+    items = [{"_id": f"s{i}", "name": f"Service {i}"} for i in range(n_services)]
+    items.append({"_id": "catering", "name": "Catering", "isCategory": True})
+    vectors = np.zeros((n_services + 1, 8), dtype="float32")
+    vectors[:n_services, 0] = 1.0
+    vectors[n_services, :2] = np.sqrt(0.5)
+    return items, vectors
+
+
+def test_categories_are_not_crowded_out_by_services(flat_engine, fixed_query_encoding):
+    engine = flat_engine(*_catalog(400))
+    fm = engine.fm
+    fixed_query_encoding(np.eye(8, dtype="float32")[0])
+
+    results = asyncio.run(engine.search("anything at all"))
+
+    assert fm.index.ntotal == 400 and fm.categories.ntotal == 1
+    assert [r["item"]["_id"] for r in results["categories"]] == ["catering"]
+    assert len(results["services"]) == 50
+    assert all(not r["item"].get("isCategory") for r in results["services"])
+
+
+def test_rank_drops_unknown_labels_and_duplicates(flat_engine):
+    engine = flat_engine(*_catalog(3))
+
+    labels = np.array([id_to_int("s1"), id_to_int("s1"), id_to_int("gone"), id_to_int("s0"), -1])
+    scores = np.array([0.9, 0.8, 0.7, 0.6, -np.inf], dtype=np.float32)
+    slots, ranked = engine._rank(labels, scores, np.empty(0, dtype=np.int64), 10)
+
+    assert [item["_id"] for item in engine.store.at(slots)] == ["s1", "s0"]
+    assert ranked.tolist() == [np.float32(0.9), np.float32(0.6)]
+
+    # Merged shard rows aren't sorted; a duplicate keeps its best hit wherever it is.
+    labels = np.array([id_to_int("s0"), id_to_int("s1"), id_to_int("s0")])
+    slots, ranked = engine._rank(labels, np.array([0.5, 0.6, 0.9], dtype=np.float32), np.empty(0, dtype=np.int64), 10)
+    assert [item["_id"] for item in engine.store.at(slots)] == ["s0", "s1"]
+    assert ranked.tolist() == [np.float32(0.9), np.float32(0.6)]
+
+
+def test_rank_rows_matches_ranking_each_row(flat_engine):
+    engine = flat_engine(*_catalog(4))
+    s = [id_to_int(f"s{i}") for i in range(4)]
+
+    # The same slot in different rows is kept in each; only the second row is fused.
+    labels = np.array([[s[0], s[1], s[0], id_to_int("gone")], [s[0], s[2], s[3], -1]])
+    scores = np.array([[0.5, 0.4, 0.9, 0.8], [0.9, 0.7, 0.6, -np.inf]], dtype=np.float32)
+    lexical = [np.empty(0, dtype=np.int64), np.array([s[3], s[1]])]
+    rows = engine._rank_rows(labels, scores, lexical, 3)
+
+    for row, (slots, ranked) in enumerate(rows):
+        expected_slots, expected_scores = engine._rank(labels[row], scores[row], lexical[row], 3)
+        assert slots.tolist() == expected_slots.tolist()
+        assert np.allclose(ranked, expected_scores)
+    assert [item["_id"] for item in engine.store.at(rows[0][0])] == ["s0", "s1"]
+    assert [item["_id"] for item in engine.store.at(rows[1][0])] == ["s3", "s0", "s2"]
+
+
+def test_category_index_persists_and_tracks_updates(tmp_path):
+    items, vectors = _catalog(3)
+    fm = FaissManager(dim=8, index_type="flat")
+    fm.build_index(items, vectors)
+    fm.add_items([{"_id": "djs", "name": "DJs", "isCategory": True}], np.eye(8, dtype="float32")[2:3])
+    path = str(tmp_path / "index.faiss")
+    assert fm.save(path)
+
+    loaded = FaissManager(dim=8)
+    assert loaded.load(path)
+    assert loaded.category_labels().tolist() == sorted([id_to_int("catering"), id_to_int("djs")])
+
+    loaded.remove_items(["catering"])
+    _, labels = loaded.search_categories(np.eye(8, dtype="float32")[:1], k=5)
+    assert labels[0].tolist() == [id_to_int("djs")]
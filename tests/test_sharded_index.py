@@ -0,0 +1,70 @@
+# FILE: tests/test_sharded_index.py
+import numpy as np
+from app.models.faiss_manager import FaissManager, id_to_int
+from app.models.sharded_index import ShardedFaissManager, create_faiss_manager
+
+
+def _catalog(vectors):
+    """Services with `vectors` plus one category item."""
+    items = [{"_id": f"item-{i}"} for i in range(len(vectors))]
+    items.append({"_id": "catering", "name": "Catering", "isCategory": True})
+    return items, np.vstack([vectors, np.eye(vectors.shape[1], dtype="float32")[:1]])
+
+
+def test_sharded_search_matches_a_single_index(unit_vectors):
+    items, vectors = _catalog(unit_vectors(300))
+    single = FaissManager(dim=8, index_type="flat")
+    single.build_index(items, vectors)
+    sharded = ShardedFaissManager(dim=8, shards=4, index_type="flat")
+    sharded.build_index(items, vectors)
+
+    assert sharded.index.ntotal == 300 and sharded.categories.ntotal == 1
+    assert all(shard.index.ntotal > 0 for shard in sharded.shards)
+    queries = vectors[:5]
+    assert np.array_equal(sharded.search(queries, k=10)[1], single.search(queries, k=10)[1])
+
+    allowed = np.array([id_to_int(f"item-{i}") for i in range(0, 300, 7)], dtype=np.int64)
+    assert np.array_equal(sharded.search(queries, k=10, allowed=allowed)[1],
+                          single.search(queries, k=10, allowed=allowed)[1])
+
+
+def test_changes_are_routed_to_the_owning_shard(unit_vectors):
+    items, vectors = _catalog(unit_vectors(100))
+    sharded = ShardedFaissManager(dim=8, shards=3, index_type="flat")
+    sharded.build_index(items, vectors)
+    before = [shard.index.ntotal for shard in sharded.shards]
+
+    new_vector = np.eye(8, dtype="float32")[3:4]
+    sharded.add_items([{"_id": "new"}], new_vector)
+    owner = id_to_int("new") % 3
+    assert [shard.index.ntotal for shard in sharded.shards] == [
+        count + (i == owner) for i, count in enumerate(before)]
+    assert sharded.index.ntotal == 101
+    assert sharded.search(new_vector, k=1)[1][0, 0] == id_to_int("new")
+
+    sharded.remove_items(["new", "item-0"])
+    assert sharded.index.ntotal == 99
+    assert id_to_int("new") not in sharded.search(new_vector, k=99)[1]
+
+
+def test_shards_persist_independently(tmp_path, unit_vectors):
+    items, vectors = _catalog(unit_vectors(120))
+    sharded = ShardedFaissManager(dim=8, shards=2, index_type="flat")
+    sharded.build_index(items, vectors)
+    path = str(tmp_path / "faiss.index")
+    assert sharded.save(path)
+    assert (tmp_path / "faiss.index.shard0").exists() and (tmp_path / "faiss.index.shard1").exists()
+
+    metadata = FaissManager.read_metadata(path)
+    loaded = create_faiss_manager(8, shards=metadata["config"]["shards"])
+    assert isinstance(loaded, ShardedFaissManager)
+    assert loaded.load(path, mmap=True)
+    assert loaded.index.ntotal == 120
+    assert loaded.category_labels().tolist() == [id_to_int("catering")]
+    # Read-only shards take changes through their overlays.
+    loaded.add_items([{"_id": "new"}], np.eye(8, dtype="float32")[3:4])
+    assert loaded.search(np.eye(8, dtype="float32")[3:4], k=1)[1][0, 0] == id_to_int("new")
+
+    (tmp_path / "faiss.index.shard1").unlink()
+    assert not ShardedFaissManager(dim=8, shards=2).load(path)
+    assert not ShardedFaissManager(dim=8, shards=3).load(path)
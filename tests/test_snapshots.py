@@ -0,0 +1,72 @@
+# FILE: tests/test_snapshots.py
+import os
+from app.models.faiss_manager import FaissManager, id_to_int
+from app.utils.delta_log import DeltaLog
+from app.utils.snapshots import SnapshotDirectory, WriterLease
+
+
+def test_only_one_writer_lease_at_a_time(tmp_path):
+    path = str(tmp_path / "writer.lock")
+    first, second = WriterLease(path), WriterLease(path)
+
+    assert first.try_acquire()
+    assert not second.try_acquire()
+    first.release()
+    assert second.try_acquire()
+    second.release()
+
+
+def test_publish_flips_current_and_prunes_old_versions(tmp_path):
+    snapshots = SnapshotDirectory(str(tmp_path), keep=2)
+
+    def write(items_path, index_path):
+        for path in (items_path, index_path):
+            with open(path, "w") as f:
+                f.write("x")
+        return True
+
+    for _ in range(3):
+        snapshots.publish(write)
+
+    assert snapshots.current_version() == 3
+    assert sorted(name for name in os.listdir(tmp_path) if name.startswith("v")) == [
+        "v000000000002", "v000000000003"]
+    assert snapshots.publish(lambda *paths: False) is None
+    assert snapshots.current_version() == 3
+
+
+def test_read_only_index_applies_changes_through_overlay(tmp_path, unit_vectors):
+    vectors = unit_vectors(20)
+    items = [{"_id": f"id{i}"} for i in range(20)]
+    writer = FaissManager(8)
+    writer.build_index(items, vectors)
+    path = str(tmp_path / "faiss.index")
+    writer.save(path)
+
+    reader = FaissManager(8)
+    assert reader.load(path, mmap=True) and reader.read_only
+    reader.remove_items(["id3"])
+    reader.update_items([{"_id": "id5"}], vectors[7:8])
+
+    _, labels = reader.search(vectors[3:4], k=20)
+    assert id_to_int("id3") not in labels[0]
+    _, labels = reader.search(vectors[7:8], k=2)
+    assert set(labels[0]) == {id_to_int("id5"), id_to_int("id7")}
+
+
+def test_followers_tail_the_delta_log(tmp_path):
+    writer = DeltaLog(str(tmp_path / "deltas.log"))
+    follower = DeltaLog(writer.path)
+    writer.append_delete("a")
+
+    records, position = follower.read_from(None)
+    assert [r[1] for r in records] == ["a"]
+
+    writer.append_delete("b")
+    records, position = follower.read_from(position)
+    assert [r[1] for r in records] == ["b"]
+
+    writer.truncate()
+    writer.append_delete("c")
+    records, _ = follower.read_from(position)
+    assert [r[1] for r in records] == ["c"]
@@ -0,0 +1,31 @@
+# FILE: tests/test_startup.py
+import subprocess
+import sys
+import numpy as np
+from app.models.faiss_manager import FaissManager
+
+
+def test_importing_the_app_does_not_load_the_model_stack():
+    code = ("import sys, app.main; "
+            "print('sentence_transformers' in sys.modules or 'torch' in sys.modules)")
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                            env={"MONGODB_URL": "mongodb://localhost:27017", "PATH": ""}, check=True)
+    assert output.stdout.strip() == "False"
+
+
+def test_index_snapshot_records_dimension_and_model(tmp_path, mocker):
+    items = [{"_id": f"item-{i}"} for i in range(4)]
+    fm = FaissManager(dim=4, index_type="flat", model_name="test-model@onnx")
+    fm.build_index(items, np.eye(4, dtype="float32"))
+    path = str(tmp_path / "index.faiss")
+    assert fm.save(path)
+
+    get_model = mocker.patch("app.services.encoder.get_model")
+    metadata = FaissManager.read_metadata(path)
+    assert metadata["dim"] == 4 and metadata["model_name"] == "test-model@onnx"
+    assert metadata["ntotal"] == 4
+
+    loaded = FaissManager(dim=metadata["dim"])
+    assert loaded.load(path)
+    assert loaded.model_name == "test-model@onnx"
+    get_model.assert_not_called()